@@ -1,7 +1,11 @@
+from typing import Optional
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from oci_object_discovery_service.internal import manifest, session
+from oci_object_discovery_service.internal.analytics import router as analytics_router
+from oci_object_discovery_service.internal.export import router as export_router
 from oci_object_discovery_service.internal.ui.routes import router as ui_router
 
 app = FastAPI(title="OCI Object Discovery Service API")
@@ -15,6 +19,8 @@ app.add_middleware(
 
 # expose under /api/ui
 app.include_router(ui_router, prefix="/api/ui", tags=["UI"])
+app.include_router(export_router, prefix="/api/v1", tags=["Export"])
+app.include_router(analytics_router, prefix="/api/v1", tags=["Analytics"])
 
 
 @app.get("/healthz")
@@ -34,12 +40,13 @@ def reload_manifests():
 
 
 @app.post("/api/v1/scans/trigger")
-def trigger_scan():
-    # Triggers an immediate scan for all jobs in the manifest
+def trigger_scan(priority: Optional[int] = None):
+    # Triggers an immediate scan for all jobs in the manifest; `priority`
+    # (higher runs first) overrides the jobs' own to jump the queue
     jobs = manifest.load_from_file("manifests/catalogue.yaml")
-    for j in jobs:
-        session.create_session(j)
-    return {"Total Sessions Created": len(jobs)}
+    # Jobs that already have a pending session are merged into it
+    created = sum(session.create_session(j, priority) for j in jobs)
+    return {"Total Sessions Created": created}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,35 @@
+import argparse
+
+from pymongo.errors import OperationFailure
+
+from oci_object_discovery_service.internal.db import objects_collection, repository
+from oci_object_discovery_service.utils.logger import logger
+
+
+# Sweep index of the legacy schema, superseded by (bucket, sid)
+LEGACY_INDEX = "bucket_1_scan_id_1"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rewrite objects stored in the legacy schema in the compact one; safe while scans run"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000, help="Objects per bulk write")
+    args = parser.parse_args()
+
+    stats = repository.migrate_objects(batch_size=args.batch_size)
+    logger.info(f"[migrate] Objects: {stats}")
+
+    if objects_collection.find_one({"data": {"$exists": True}}, {"_id": 1}):
+        logger.warning("[migrate] Some objects are still in the legacy schema; run again")
+        return
+    try:
+        objects_collection.drop_index(LEGACY_INDEX)
+        logger.info(f"[migrate] Dropped legacy index {LEGACY_INDEX}")
+    except OperationFailure:
+        # Already dropped, or the collection never had it
+        pass
+
+
+if __name__ == "__main__":
+    main()
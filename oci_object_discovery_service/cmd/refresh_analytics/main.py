@@ -0,0 +1,25 @@
+import argparse
+
+from oci_object_discovery_service.internal.db import repository
+from oci_object_discovery_service.utils.logger import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Aggregate stored objects for the analytics API, e.g. for buckets scanned before it existed"
+    )
+    parser.add_argument("--bucket", help="Only this bucket")
+    parser.add_argument("--namespace", help="Namespace of --bucket, if it was refreshed into its own collection")
+    args = parser.parse_args()
+
+    if args.bucket:
+        count = int(repository.refresh_bucket_analytics(args.bucket, args.namespace))
+    else:
+        count = repository.refresh_analytics()
+    # Cached analytics responses are keyed on the generation
+    repository.bump_catalogue_generation()
+    logger.info(f"[analytics] Aggregated {count} bucket(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,156 @@
-from oci_object_discovery_service.internal.oci.buckets import list_buckets
-from oci_object_discovery_service.internal.oci.objects import list_objects
+from oci_object_discovery_service.internal.oci.auth import configure_pool_size, default_pool_size, get_clients
+from oci_object_discovery_service.internal.oci.buckets import (
+    active_compartment_ids,
+    list_buckets,
+    list_compartments,
+    list_new_compartments,
+)
+from oci_object_discovery_service.internal.oci.objects import (
+    OrderedCheckpoint,
+    Shard,
+    discover_shards,
+    iter_object_pages,
+    page_records,
+    pending_shards,
+)
+from oci_object_discovery_service.internal.oci.objects_async import AsyncObjectLister
+from oci_object_discovery_service.internal.oci.ratelimit import current_rates
 from oci_object_discovery_service.internal.db.repository import (
     upsert_bucket,
     upsert_object,
+    find_bucket,
+    create_child_sessions,
+    complete_parent_if_done,
+    complete_waiting_parents,
+    heartbeat_session,
+    mark_session_failed,
+    session_lease_seconds,
+    upsert_object_fields,
+    object_fields,
+    bucket_writer,
+    object_writer,
+    delete_stale_objects,
+    start_bucket_stats,
+    add_bucket_stats,
+    finish_bucket_stats,
+    analytics_refresh,
+    analytics_min_interval,
+    refresh_bucket_analytics,
+    ObjectDeltaWriter,
+    SessionCheckpointer,
+    begin_staged_bucket,
+    staging_writer,
+    start_refresh,
     find_active_buckets,
+    find_compartment_tree,
+    save_compartment_tree,
+    add_compartments,
     claim_next_pending_session,
     mark_session_completed,
 )
 from oci_object_discovery_service.internal.db.models import BucketDoc, ObjectDoc
+from oci_object_discovery_service.internal.pipeline import Pipeline
+from oci_object_discovery_service.internal import notify
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from oci_object_discovery_service.utils.logger import logger
+import os
+import socket
+import threading
 import time
+from typing import NamedTuple, Optional
+
+
+scan_bucket_concurrency = int(os.getenv("SCAN_BUCKET_CONCURRENCY", "4"))
+scan_shard_concurrency = int(os.getenv("SCAN_SHARD_CONCURRENCY", "8"))
+auto_shard_min_objects = int(os.getenv("SCAN_AUTO_SHARD_MIN_OBJECTS", "100000"))
+# "full" rewrites every listed object; "incremental" writes only new/changed ones;
+# "refresh" writes the whole namespace to a staging collection swapped in at the end
+default_scan_mode = os.getenv("SCAN_MODE", "full")
+# "threads" (SDK calls on a thread pool) or "async" (asyncio + pooled httpx)
+scan_engine = os.getenv("SCAN_ENGINE", "threads")
+# Read listings as raw JSON and persist plain dicts, skipping SDK/pydantic models
+scan_fast_path = os.getenv("SCAN_FAST_PATH", "false").lower() in ("1", "true", "yes")
+# Threads per pipeline stage of the threads engine (fetch uses SCAN_SHARD_CONCURRENCY)
+scan_transform_workers = int(os.getenv("SCAN_TRANSFORM_WORKERS", "1"))
+scan_persist_workers = int(os.getenv("SCAN_PERSIST_WORKERS", "2"))
+# Identifies this worker as the lease owner of the sessions it claims
+worker_id = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+# Seconds between claim attempts while idle; with a notification backend this
+# only bounds how late expired leases are picked up
+worker_poll_interval = float(os.getenv("WORKER_POLL_INTERVAL", "30"))
+# Sessions (of any job, tenancy or region) processed at once by this worker
+worker_session_concurrency = int(os.getenv("WORKER_SESSION_CONCURRENCY", "4"))
+# Bucket scans running at once across all of this worker's sessions
+worker_scan_budget = int(os.getenv("WORKER_SCAN_BUDGET", "8"))
+
+# The cached compartment tree is listed again in full after this; refreshes in between only add new ones
+compartment_full_refresh_seconds = int(os.getenv("COMPARTMENT_FULL_REFRESH_SECONDS", "86400"))
+
+_scan_budget = threading.BoundedSemaphore(max(1, worker_scan_budget))
+
+
+def _compartment_ids(region: str) -> list:
+    """Active compartments of the tenancy, from the Mongo cache while it is fresh.
+
+    A stale cache is refreshed incrementally with the compartments created
+    since; deleted ones are dropped by the periodic full listing.
+    """
+    _, _, tenancy = get_clients(region)
+    tree = find_compartment_tree(tenancy) if tenancy else None
+    listed = None
+    if tenancy and not tree:
+        listed = find_compartment_tree(tenancy, compartment_full_refresh_seconds, "listed_at")
+    if tree:
+        compartments = tree.compartments
+        logger.info(f"[worker] Using cached compartment tree ({len(compartments)} compartments)")
+    elif listed:
+        added = list_new_compartments(region, {c["id"] for c in listed.compartments})
+        add_compartments(tenancy, added)
+        compartments = listed.compartments + added
+        logger.info(f"[worker] Refreshed compartment tree: {len(compartments)} compartments (+{len(added)} new)")
+    else:
+        tenancy, compartments = list_compartments(region)
+        added, removed = save_compartment_tree(tenancy, compartments)
+        logger.info(
+            f"[worker] Refreshed compartment tree: {len(compartments)} compartments "
+            f"(+{added} -{removed})"
+        )
+    return active_compartment_ids(tenancy, compartments)
+
+
+class LeaseLost(RuntimeError):
+    """The session being processed was reclaimed by another worker."""
+
+
+class _Lease:
+    """Renew a claimed session's lease from a background thread while it is processed."""
+
+    def __init__(self, session_id) -> None:
+        self.session_id = session_id
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{session_id}", daemon=True)
+
+    def __enter__(self) -> "_Lease":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def check(self) -> None:
+        """Raise `LeaseLost` once another worker owns the session; its work must stop."""
+        if self.lost:
+            raise LeaseLost(f"lease on session {self.session_id} was lost")
+
+    def _run(self) -> None:
+        while not self._stop.wait(session_lease_seconds / 3):
+            if not heartbeat_session(self.session_id, worker_id) and not self.lost:
+                self.lost = True
+                logger.warning(f"[worker] Lost lease on session {self.session_id}; another worker reclaimed it")
 
 
 def run_task_list_buckets(task: dict):
@@ -18,75 +158,386 @@ def run_task_list_buckets(task: dict):
     namespace = task["job"]["oci_namespace"]
     region = task["job"]["oci_region"]
     logger.info(f"[worker] Listing buckets in tenancy={tenancy_name} region={region}")
-    buckets = list_buckets(namespace, region)
+    buckets = list_buckets(namespace, region, _compartment_ids(region))
     count = 0
-    for bucket in buckets:
-        doc = BucketDoc(
-            name=bucket["name"],
-            namespace=bucket["namespace"],
-            data=bucket.get("data", bucket),
+    with bucket_writer() as writer:
+        for bucket in buckets:
+            doc = BucketDoc(
+                name=bucket["name"],
+                namespace=bucket["namespace"],
+                data=bucket.get("data", bucket),
+                updated_at=datetime.now(timezone.utc),
+                scan_id=task["_id"],
+            )
+            upsert_bucket(doc, writer)
+            count += 1
+    logger.info(
+        f"[worker] Stored {count} buckets in MongoDB for tenancy={tenancy_name} "
+        f"(batches={writer.stats['batches']} errors={writer.stats['errors']})"
+    )
+
+
+def _bucket_size(bucket: BucketDoc) -> Optional[int]:
+    """Approximate size of a bucket in bytes (None if unknown), used to schedule the largest first."""
+    try:
+        return int((bucket.data or {})["approximate_size"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class _BucketScan:
+    """Persistence side of scanning one bucket, shared by both listing engines.
+
+    Owns the bucket's writer (its own, so other buckets' write errors and
+    batches never hold up or mask its own), delta writer and checkpointer,
+    picks the shard plan, counts bucket stats and, once the listing is complete, flushes and sweeps
+    deleted objects. In refresh mode objects are appended to the session's
+    staging collection instead, and an interrupted bucket starts over.
+    """
+
+    def __init__(self, task: dict, bucket: BucketDoc, lease: Optional[_Lease] = None) -> None:
+        self.task = task
+        self.bucket = bucket
+        self.lease = lease
+        self.region = task["job"].get("oci_region")
+        self.scan_id = task.get("_id")
+        mode = task["job"].get("scan_mode") or default_scan_mode
+        self.refresh = mode == "refresh" and task.get("parent_id") is not None
+        if self.refresh:
+            begin_staged_bucket(self.scan_id, task["parent_id"], bucket.namespace, bucket.name)
+            writer = staging_writer(task["parent_id"], bucket.namespace)
+        else:
+            writer = object_writer(bucket.namespace)
+        self.writer = writer
+        self.delta = ObjectDeltaWriter(writer, self.scan_id) if mode == "incremental" else None
+        self.checkpoint = None
+        if self.scan_id is not None and not self.refresh:
+            self.checkpoint = SessionCheckpointer(
+                self.scan_id,
+                bucket.name,
+                task.get("checkpoints") or [],
+                flush=self.delta.flush if self.delta else writer.flush,
+            )
+        self.count = 0
+        self._lock = threading.Lock()
+        start_bucket_stats(bucket.name, bucket.namespace, self.scan_id)
+
+    def shards(self, target: int) -> list:
+        """Key-range shards to list; a resumed session keeps its recorded plan."""
+        shards = self.checkpoint.shards() if self.checkpoint else []
+        if shards:
+            logger.info(f"[worker] Resuming bucket {self.bucket.name} from {len(shards)} checkpointed shard(s)")
+            return shards
+        # Split big buckets into key-range shards listed concurrently
+        approximate_count = int((self.bucket.data or {}).get("approximate_count") or 0)
+        if approximate_count >= auto_shard_min_objects:
+            shards = discover_shards(self.bucket.namespace, self.bucket.name, self.region, target=target)
+            if self.checkpoint:
+                self.checkpoint.record_plan(shards)
+        return shards
+
+    def add(self, obj: dict) -> None:
+        self.add_many([obj])
+
+    def add_many(self, objs: list) -> None:
+        # Stop between pages once another worker owns the bucket task
+        self._check_lease()
+        for obj in objs:
+            self._store(obj)
+        add_bucket_stats(self.bucket.name, self.bucket.namespace, self.scan_id, objs)
+        with self._lock:
+            self.count += len(objs)
+
+    def _store(self, obj: dict) -> None:
+        if scan_fast_path:
+            fields = object_fields(
+                self.bucket.name, obj, scan_id=self.scan_id, updated_at=datetime.now(timezone.utc)
+            )
+            if self.refresh:
+                self.writer.insert(fields)
+            elif self.delta:
+                self.delta.add_fields(fields)
+            else:
+                upsert_object_fields(fields, self.writer)
+            return
+        doc = ObjectDoc(
+            bucket=self.bucket.name,
+            name=obj.get("name"),
+            data=obj,
             updated_at=datetime.now(timezone.utc),
-            scan_id=task["_id"],
+            scan_id=self.scan_id,
         )
-        upsert_bucket(doc)
-        count += 1
+        if self.refresh:
+            self.writer.insert(doc.to_mongo())
+        elif self.delta:
+            self.delta.add(doc)
+        else:
+            upsert_object(doc, self.writer)
+
+    def _check_lease(self) -> None:
+        if self.lease:
+            self.lease.check()
+
+    def finish(self) -> int:
+        bucket_name = self.bucket.name
+        # Everything listed must be persisted before sweeping what was not seen
+        if self.delta:
+            self.delta.flush()
+            logger.info(f"[worker] Bucket {bucket_name} delta: {self.delta.stats}")
+        else:
+            self.writer.flush()
+        # Sweeping or staging on behalf of the new owner would undo its work
+        self._check_lease()
+        if self.refresh:
+            # The snapshot swapped in must be complete
+            if self.writer.stats["errors"]:
+                raise RuntimeError(f"{self.writer.stats['errors']} objects of bucket {bucket_name} were not staged")
+        elif self.writer.stats["errors"]:
+            logger.warning(f"[worker] Write errors during bucket {bucket_name}; skipping deletion sweep")
+        elif self.scan_id is not None:
+            removed = delete_stale_objects(bucket_name, self.scan_id, self.bucket.namespace)
+            if removed:
+                logger.info(f"[worker] Removed {removed} deleted objects from bucket {bucket_name}")
+        finish_bucket_stats(bucket_name, self.bucket.namespace, self.scan_id)
+        if analytics_refresh and not self.refresh:
+            # A refresh is aggregated once its namespace is swapped in
+            refresh_bucket_analytics(bucket_name, self.bucket.namespace, min_interval=analytics_min_interval)
+
+        logger.info(
+            f"[worker] Listed {self.count} objects in bucket {bucket_name} "
+            f"(batches={self.writer.stats['batches']} errors={self.writer.stats['errors']})"
+        )
+        return self.count
+
+
+class _Page(NamedTuple):
+    shard: Shard
+    seq: int
+    items: list
+    next_start: Optional[str]
+
+
+def _scan_bucket(task: dict, bucket: BucketDoc, lease: Optional[_Lease] = None) -> int:
+    """Threads engine: fetch, transform and persist stages joined by bounded queues."""
+    logger.info(f"[worker] Scanning bucket {bucket.name}")
+    scan = _BucketScan(task, bucket, lease)
+    shards = scan.shards(target=scan_shard_concurrency * 4)
+    units = [("", s, e) for s, e in shards] or [("", None, None)]
+    pending = pending_shards(units, scan.checkpoint)
+    # Persist workers finish pages out of order; cursors are saved in page order
+    progress = OrderedCheckpoint(scan.checkpoint) if scan.checkpoint else None
+
+    def fetch(item):
+        unit, start = item
+        # Use real OCI SDK pagination, using the bucket's namespace and region from job
+        pages = iter_object_pages(
+            bucket.namespace, bucket.name, unit[0], scan.region, start=start, end=unit[2], raw=scan_fast_path
+        )
+        for seq, (objects, next_start) in enumerate(pages):
+            yield _Page(unit, seq, objects, next_start)
+
+    def transform(page: _Page):
+        return [page._replace(items=page_records(page.items, scan_fast_path))]
+
+    def persist(page: _Page) -> None:
+        scan.add_many(page.items)
+        if progress:
+            progress.done(page.shard, page.seq, page.next_start)
+
+    pipeline = (
+        Pipeline(f"bucket {bucket.name}")
+        .stage("fetch", fetch, workers=min(scan_shard_concurrency, len(pending)))
+        .stage("transform", transform, workers=scan_transform_workers)
+        .stage("persist", persist, workers=scan_persist_workers)
+    )
+    pipeline.run(pending)
+    logger.info(f"[worker] Bucket {bucket.name} pipeline: {pipeline.stats()}")
+    return scan.finish()
+
+
+async def _scan_bucket_async(
+    lister: AsyncObjectLister, task: dict, bucket: BucketDoc, lease: Optional[_Lease] = None
+) -> int:
+    """Async engine: list with the event loop; persistence runs in worker threads."""
+    logger.info(f"[worker] Scanning bucket {bucket.name}")
+    # Setting up the scan reads and writes Mongo (checkpoint, stats, writer)
+    scan = await asyncio.to_thread(_BucketScan, task, bucket, lease)
+    shards = await asyncio.to_thread(scan.shards, scan_shard_concurrency * 4)
+    async for page in lister.pages(bucket.namespace, bucket.name, shards, checkpoint=scan.checkpoint):
+        await asyncio.to_thread(scan.add_many, page)
+    return await asyncio.to_thread(scan.finish)
+
+
+def _scan_child(task: dict, scan, lease: _Lease) -> int:
+    """Scan the bucket of a claimed child task and record the outcome on it.
+
+    The outcome is only recorded while this worker still holds the lease; a
+    reclaimed task belongs to the worker that reclaimed it.
+    """
+    bucket = find_bucket(task["job"]["oci_namespace"], task["bucket"])
+    try:
+        if bucket is None:
+            raise RuntimeError(f"bucket {task['bucket']} is no longer known")
+        count = scan(task, bucket, lease)
+    except LeaseLost:
+        logger.warning(f"[worker] Abandoned bucket {task['bucket']}; session {task['_id']} was reclaimed")
+        return 0
+    except Exception as e:
+        logger.error(f"[worker] Failed scanning bucket {task['bucket']}: {e}")
+        mark_session_failed(task["_id"], str(e), worker_id)
+        return 0
+    if not mark_session_completed(task["_id"], worker_id):
+        logger.warning(f"[worker] Bucket {task['bucket']} scanned, but session {task['_id']} was reclaimed")
+    return count
+
+
+def _run_children(parent_id, task, scan) -> int:
+    """Scan bucket tasks of `parent_id`, starting with `task`, until none is left to claim.
+
+    Every scan holds a slot of the worker-wide scan budget; a task is only
+    claimed once a slot is free, so no lease is held while waiting for one.
+    """
+    total = 0
+    while True:
+        if task is None:
+            with _scan_budget:
+                claimed = claim_next_pending_session(worker_id, parent_id)
+                if claimed is None:
+                    return total
+                task = claimed.model_dump(by_alias=True)
+                with _Lease(task["_id"]) as lease:
+                    total += _scan_child(task, scan, lease)
+        else:
+            with _Lease(task["_id"]) as lease, _scan_budget:
+                total += _scan_child(task, scan, lease)
+        if complete_parent_if_done(parent_id):
+            logger.info(f"[worker] Completed list-objects session {parent_id}")
+        task = None
+
+
+async def _drain_children_async(parent_id, region: str, first) -> int:
+    loop = asyncio.get_running_loop()
+    async with AsyncObjectLister(region) as lister:
+
+        def scan(task: dict, bucket: BucketDoc, lease: _Lease) -> int:
+            coro = _scan_bucket_async(lister, task, bucket, lease)
+            return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+        # Claiming and lease handling block, so each bucket slot runs on its own thread
+        with ThreadPoolExecutor(max_workers=scan_bucket_concurrency) as ex:
+            counts = await asyncio.gather(
+                *(
+                    loop.run_in_executor(ex, _run_children, parent_id, first if i == 0 else None, scan)
+                    for i in range(scan_bucket_concurrency)
+                )
+            )
+    return sum(counts)
+
+
+def _drain_children(parent_id, region: str, first: Optional[dict] = None) -> None:
+    """Scan up to SCAN_BUCKET_CONCURRENCY bucket tasks of a session at a time.
+
+    Other workers claim the remaining bucket tasks of the same session
+    concurrently, so a scan spreads across every worker replica.
+    """
+    logger.info(f"[worker] Scanning bucket tasks of session {parent_id} ({scan_engine} engine)")
+    if scan_engine == "async":
+        total = asyncio.run(_drain_children_async(parent_id, region, first))
+    else:
+        with ThreadPoolExecutor(max_workers=scan_bucket_concurrency) as ex:
+            futures = [
+                ex.submit(_run_children, parent_id, first if i == 0 else None, _scan_bucket)
+                for i in range(scan_bucket_concurrency)
+            ]
+            total = sum(f.result() for f in futures)
+
     logger.info(
-        f"[worker] Stored {count} buckets in MongoDB for tenancy={tenancy_name}"
+        f"[worker] Stored {total} objects in MongoDB for session {parent_id} "
+        f"OCI request rate={ {r: round(v, 1) for r, v in current_rates().items()} }"
     )
 
 
 def run_task_list_objects(task: dict):
-    for bucket in find_active_buckets():
+    """Expand a list-objects session into one claimable task per bucket."""
+    buckets = []
+    for bucket in find_active_buckets(task["job"]["oci_namespace"]):
         logger.debug(f"[worker] Processing bucket: {bucket}")
-        bucket_name = bucket.name
-        if not bucket_name:
+        if not bucket.name:
             logger.warning(f"[worker] Skipping bucket without 'name': {bucket}")
             continue
+        buckets.append({"name": bucket.name, "size": _bucket_size(bucket)})
 
-        logger.info(f"[worker] Scanning bucket {bucket_name}")
-
-        # Use real OCI SDK pagination, using the bucket's namespace and region from job
-        job_region = task["job"].get("oci_region")
-        objects = list_objects(bucket.namespace, bucket_name, job_region)
-        count = 0
-
-        for obj in objects:
-            doc = ObjectDoc(
-                bucket=bucket_name,
-                name=obj.get("name"),
-                data=obj,
-                updated_at=datetime.now(timezone.utc),
-                scan_id=task.get("_id"),
-            )
-            upsert_object(doc)
-            count += 1
+    if (task["job"].get("scan_mode") or default_scan_mode) == "refresh":
+        start_refresh(task["_id"], task["job"]["oci_namespace"])
 
-        logger.info(
-            f"[worker] Stored {count} objects in MongoDB for bucket {bucket_name}"
-        )
+    # Bucket tasks are claimed largest first so the long tail of small buckets
+    # fills in around them and total scan time approaches that of the biggest.
+    created = create_child_sessions(task, buckets)
+    logger.info(f"[worker] Split list-objects session {task['_id']} into {created} bucket tasks")
+    # Wake idle workers to share the bucket tasks
+    notify.publish(task["_id"])
+    complete_parent_if_done(task["_id"])
 
 
 def process_task(task: dict):
-    job_name = task["job"]["name"]
-    if job_name == "list-buckets":
-        run_task_list_buckets(task)
+    if task.get("parent_id"):
+        # A bucket task of a list-objects session: help scan that session
+        _drain_children(task["parent_id"], task["job"]["oci_region"], task)
+        return
 
+    job_name = task["job"]["name"]
     if job_name == "list-objects":
-        run_task_list_objects(task)
+        with _Lease(task["_id"]):
+            run_task_list_objects(task)
+        _drain_children(task["_id"], task["job"]["oci_region"])
+        return
+
+    with _Lease(task["_id"]):
+        if job_name == "list-buckets":
+            run_task_list_buckets(task)
 
-    mark_session_completed(task["_id"])
+    mark_session_completed(task["_id"], worker_id)
     return
 
 
+def _run_session(task: dict) -> None:
+    """Process one claimed session; a failure is contained to that session."""
+    try:
+        process_task(task)
+    except Exception as e:
+        logger.error(f"[worker] Session {task['_id']} ({task['job']['name']}) failed: {e}")
+        mark_session_failed(task["_id"], str(e), worker_id)
+        if task.get("parent_id"):
+            complete_parent_if_done(task["parent_id"])
+
+
 def start_scan():
-    logger.info("[worker] listening for pending scan sessions")
-    while True:
-        task = claim_next_pending_session()
-        if task:
-            process_task(task.model_dump(by_alias=True))
-        else:
-            logger.info("[worker] no task found, sleeping...")
-            time.sleep(30)
+    # One pooled connection per concurrent listing thread of a region
+    configure_pool_size(max(default_pool_size, worker_scan_budget * scan_shard_concurrency))
+    notifier = notify.get_notifier()
+    if notifier:
+        notifier.subscribe()
+    logger.info(
+        f"[worker] listening for pending scan sessions "
+        f"(sessions={worker_session_concurrency} scan budget={worker_scan_budget})"
+    )
+    slots = threading.BoundedSemaphore(max(1, worker_session_concurrency))
+    with ThreadPoolExecutor(max_workers=max(1, worker_session_concurrency), thread_name_prefix="session") as ex:
+        while True:
+            # Claim only when a slot is free, so claimed sessions never sit unleased in a backlog
+            slots.acquire()
+            task = claim_next_pending_session(worker_id)
+            if task:
+                future = ex.submit(_run_session, task.model_dump(by_alias=True))
+                future.add_done_callback(lambda _: slots.release())
+                continue
+            slots.release()
+            complete_waiting_parents()
+            if notifier:
+                notifier.wait(worker_poll_interval)
+            else:
+                logger.info("[worker] no task found, sleeping...")
+                time.sleep(worker_poll_interval)
 
 
 if __name__ == "__main__":
@@ -1,28 +1,75 @@
+import os
 import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from apscheduler.schedulers.background import BackgroundScheduler
 from oci_object_discovery_service.internal import manifest, session
 from oci_object_discovery_service.utils.logger import logger
 
 
+# "skip": no new run while one is pending or running; "queue": allow one
+# pending run behind a running one (runs never pile up beyond that)
+coalesce_mode = os.getenv("SCHEDULER_COALESCE", "skip")
+# "interval": every frequency_minutes; "after_complete": frequency_minutes
+# after the previous run finished. A job's own `schedule` key overrides it.
+default_schedule = os.getenv("SCHEDULER_MODE", "interval")
+# Random delay added to each run, capped at a tenth of the job's interval
+jitter_seconds = int(os.getenv("SCHEDULER_JITTER_SECONDS", "30"))
+# How often "after_complete" jobs check whether their next run is due
+after_complete_check_seconds = int(os.getenv("SCHEDULER_CHECK_SECONDS", "60"))
+
+
 def run_job(job):
+    if coalesce_mode == "skip" and session.has_active_session(job):
+        logger.info(f"[scheduler] Skipping job {job['name']}: previous run has not finished")
+        return
     logger.info(
         f"[scheduler] Starting job {job['name']} (every {job['frequency_minutes']} minutes)"
     )
-    session.create_session(job)
+    if not session.create_session(job):
+        logger.info(f"[scheduler] Job {job['name']} already has a pending run; merged")
+
+
+def run_job_after_complete(job):
+    if session.has_active_session(job):
+        return
+    last = session.last_completed_at(job)
+    if last is not None:
+        if last.tzinfo is None:
+            last = last.replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) - last < timedelta(minutes=job["frequency_minutes"]):
+            return
+    run_job(job)
 
 
 def main():
     scheduler = BackgroundScheduler()
     jobs = manifest.load_from_file("manifests/catalogue.yaml")
+
+    # Spread jobs sharing a frequency evenly across their interval so they
+    # do not all hit OCI and Mongo at the same moment
+    by_frequency = defaultdict(list)
     for job in jobs:
-        scheduler.add_job(
-            run_job,
-            "interval",
-            minutes=job["frequency_minutes"],
-            args=[job],
-            id=job["name"],
-            replace_existing=True,
-        )
+        by_frequency[job["frequency_minutes"]].append(job)
+    now = datetime.now(timezone.utc)
+    for minutes, group in by_frequency.items():
+        period = minutes * 60
+        for i, job in enumerate(group):
+            start = now + timedelta(seconds=period * i / len(group))
+            if job.get("schedule", default_schedule) == "after_complete":
+                func, seconds = run_job_after_complete, min(period, after_complete_check_seconds)
+            else:
+                func, seconds = run_job, period
+            scheduler.add_job(
+                func,
+                "interval",
+                seconds=seconds,
+                start_date=start,
+                jitter=min(jitter_seconds, seconds // 10),
+                args=[job],
+                id=session.job_key(job),
+                replace_existing=True,
+            )
     scheduler.start()
     logger.info("[scheduler] started")
     try:
@@ -0,0 +1,17 @@
+import argparse
+
+from oci_object_discovery_service.internal.db import repository
+from oci_object_discovery_service.utils.logger import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add name search fields to objects stored before they existed")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Objects per bulk write")
+    args = parser.parse_args()
+
+    count = repository.backfill_search_fields(batch_size=args.batch_size)
+    logger.info(f"[search] Backfilled search fields on {count} objects")
+
+
+if __name__ == "__main__":
+    main()
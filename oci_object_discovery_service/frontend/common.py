@@ -27,9 +27,15 @@ async def fetch_buckets() -> List[Dict[str, Any]]:
 
 
 async def fetch_objects(
-    q: str | None = None, bucket: str | None = None, skip: int = 0, limit: int = 1000
+    q: str | None = None,
+    bucket: str | None = None,
+    cursor: str | None = None,
+    limit: int = 1000,
+    total: str = "estimate",
 ) -> Dict[str, Any]:
-    params: Dict[str, Any] = {"skip": skip, "limit": limit}
+    params: Dict[str, Any] = {"limit": limit, "total": total}
+    if cursor:
+        params["cursor"] = cursor
     if q and q.strip():
         params["q"] = q.strip()
     if bucket and bucket.strip() and bucket != "All":
@@ -39,7 +45,7 @@ async def fetch_objects(
         return {
             "results": [],
             "total": 0,
-            "skip": skip,
+            "next": None,
             "limit": limit,
             "error": data["error"],
         }
@@ -56,31 +62,15 @@ async def search_objects(keyword: str) -> List[Dict[str, Any]]:
 async def fetch_metrics() -> Dict[str, Any]:
     """Return dashboard metrics: bucket count, object count, total size in MB.
 
-    - Bucket count and total size are derived from /buckets.
-    - Object count uses /objects with limit=1 to read the total cheaply.
+    All read from /stats, which sums per-bucket stats kept by the scanner.
     """
-    buckets = await fetch_buckets()
-    bucket_count = len(buckets)
-    
-    total_size_mb = 0.0
-    for b in buckets:
-        try:
-            size_bytes = b.get("data", {}).get("approximate_size")
-            if size_bytes is None:
-                continue
-            total_size_mb += float(size_bytes) / (1024 * 1024)
-        except Exception:
-            continue
-
-    obj_resp = await api_get("/objects", params={"skip": 0, "limit": 1})
-    object_count = 0
-    if isinstance(obj_resp, dict) and "error" not in obj_resp:
-        object_count = int(obj_resp.get("total", 0) or 0)
-
+    data = await api_get("/stats")
+    if "error" in data:
+        return {"bucket_count": 0, "object_count": 0, "total_size_mb": 0.0}
     return {
-        "bucket_count": bucket_count,
-        "object_count": object_count,
-        "total_size_mb": total_size_mb,
+        "bucket_count": int(data.get("bucket_count", 0) or 0),
+        "object_count": int(data.get("object_count", 0) or 0),
+        "total_size_mb": float(data.get("total_bytes", 0) or 0) / (1024 * 1024),
     }
 
 
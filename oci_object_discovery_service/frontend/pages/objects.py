@@ -5,7 +5,6 @@ from nicegui import ui
 from oci_object_discovery_service.frontend.common import (
     fetch_buckets,
     fetch_objects,
-    search_objects,
     top_nav,
 )
 
@@ -15,10 +14,12 @@ def objects_page():
     ui.page_title("Objects · OCI ODS")
     top_nav("objects")
 
-    all_rows: List[Dict[str, Any]] = []
-    filtered_rows: List[Dict[str, Any]] = []
+    # Cursor of every page visited so far; the first page has none
+    cursors: List[str | None] = [None]
+    next_cursor: str | None = None
     page_index = 0
     page_size = 10
+    total: int | None = None
 
     def to_row(obj: Dict[str, Any]) -> Dict[str, Any]:
         try:
@@ -33,55 +34,44 @@ def objects_page():
             "sizeInMB": size_mb,
         }
 
-    def apply_filters():
-        nonlocal filtered_rows, page_index
-        b = bucket_select.value
-        rows = [to_row(o) for o in all_rows]
-        if b and b != "All":
-            rows = [r for r in rows if r.get("bucket") == b]
-        filtered_rows = rows
-        page_index = 0
-        update_table()
-
-    def update_table():
-        nonlocal page_index
-        total = len(filtered_rows)
-        if total == 0:
-            objects_table.rows = []
-            page_info.set_text("No results")
-            prev_btn.disable()
-            next_btn.disable()
-            return
-        start = page_index * page_size
-        end = start + page_size
-        objects_table.rows = filtered_rows[start:end]
-        total_pages = (total + page_size - 1) // page_size
-        page_info.set_text(
-            f"Page {page_index + 1} of {total_pages} · {total} result(s)"
+    async def load_page():
+        nonlocal next_cursor, total
+        status.set_text("Loading…")
+        data = await fetch_objects(
+            q=search_input.value,
+            bucket=bucket_select.value,
+            cursor=cursors[page_index],
+            limit=page_size,
+            # Count once per search, not on every page flip
+            total="estimate" if page_index == 0 else "none",
         )
+        if data.get("error"):
+            status.set_text("Objects endpoint unavailable")
+        else:
+            status.set_text("")
+        rows = [to_row(o) for o in data.get("results", [])]
+        next_cursor = data.get("next")
+        if page_index == 0:
+            total = data.get("total")
+        update_table(rows)
+
+    def update_table(rows: List[Dict[str, Any]]):
+        objects_table.rows = rows
+        if not rows and page_index == 0:
+            page_info.set_text("No results")
+        else:
+            info = f"Page {page_index + 1}"
+            if total is not None:
+                info += f" · ~{total:,} result(s)"
+            page_info.set_text(info)
         prev_btn.enable() if page_index > 0 else prev_btn.disable()
-        next_btn.enable() if page_index < total_pages - 1 else next_btn.disable()
+        next_btn.enable() if next_cursor else next_btn.disable()
 
     async def do_search():
-        nonlocal all_rows
-        q = search_input.value.strip()
-        if q:
-            status.set_text("Searching…")
-            results = await search_objects(q)
-            all_rows = results
-            status.set_text(f"Found {len(all_rows)} object(s)")
-        else:
-            status.set_text("Loading…")
-            data = await fetch_objects(q=None, bucket=None, skip=0, limit=1000)
-            if data.get("error"):
-                status.set_text(
-                    "Objects endpoint unavailable; enter a keyword to search"
-                )
-                all_rows = []
-            else:
-                all_rows = data.get("results", [])
-                status.set_text(f"Found {len(all_rows)} object(s)")
-        apply_filters()
+        nonlocal cursors, page_index
+        cursors = [None]
+        page_index = 0
+        await load_page()
 
     with ui.column().classes("p-6 gap-3"):
         ui.label("Objects").classes("text-lg font-medium")
@@ -93,7 +83,7 @@ def objects_page():
                 bucket_select = ui.select(options=["All"], value="All").classes(
                     "min-w-[240px]"
                 )
-                bucket_select.on_value_change(lambda e: apply_filters())
+                bucket_select.on_value_change(do_search)
 
             with ui.column().classes("items-end gap-1"):
                 ui.label("Search")
@@ -118,22 +108,22 @@ def objects_page():
                 page_info = ui.label("")
                 next_btn = ui.button("Next")
 
-        def go_prev():
+        async def go_prev():
             nonlocal page_index
             if page_index > 0:
                 page_index -= 1
-                update_table()
+                await load_page()
 
-        def go_next():
+        async def go_next():
             nonlocal page_index
-            total = len(filtered_rows)
-            total_pages = (total + page_size - 1) // page_size
-            if page_index < total_pages - 1:
+            if next_cursor:
+                del cursors[page_index + 1 :]
+                cursors.append(next_cursor)
                 page_index += 1
-                update_table()
+                await load_page()
 
-        prev_btn.on("click", lambda e: go_prev())
-        next_btn.on("click", lambda e: go_next())
+        prev_btn.on("click", go_prev)
+        next_btn.on("click", go_next)
 
         async def init():
             buckets = await fetch_buckets()
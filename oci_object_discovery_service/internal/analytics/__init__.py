@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Optional
+
+from fastapi import APIRouter, Query
+
+from oci_object_discovery_service.internal.db.analytics import (
+    AGE_BOUNDARIES_DAYS,
+    SIZE_BOUNDARIES,
+    ranges,
+)
+from oci_object_discovery_service.internal.ui.routes import cached, db
+
+
+analytics_collection = db[os.getenv("ANALYTICS_COLLECTION", "object_analytics")]
+
+router = APIRouter(prefix="/analytics")
+
+
+async def bucket_docs(fields: tuple[str, ...], bucket: Optional[str] = None) -> list[dict[str, Any]]:
+    """Per-bucket aggregations (see `internal.db.analytics`), never the objects themselves."""
+    query = {"bucket": bucket} if bucket else {}
+    projection = {"_id": 0, "bucket": 1, "computed_at": 1, **dict.fromkeys(fields, 1)}
+    return await analytics_collection.find(query, projection).to_list(length=None)
+
+
+def combine(docs: list[dict[str, Any]], group: str) -> dict[Any, dict[str, int]]:
+    """Objects and bytes per key of `group`, summed over buckets."""
+    totals: dict[Any, dict[str, int]] = {}
+    for doc in docs:
+        for row in doc.get(group) or []:
+            counters = totals.setdefault(row["key"], {"objects": 0, "bytes": 0})
+            counters["objects"] += row["objects"]
+            counters["bytes"] += row["bytes"]
+    return totals
+
+
+def respond(docs: list[dict[str, Any]], results: list[dict[str, Any]]) -> dict[str, Any]:
+    """Results with the time of the oldest aggregation they are built from."""
+    computed = [d["computed_at"] for d in docs if d.get("computed_at")]
+    return {"results": results, "computed_at": min(computed) if computed else None}
+
+
+def _by_bytes(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return sorted(rows, key=lambda r: r["bytes"], reverse=True)
+
+
+@router.get("/buckets")
+@cached
+async def buckets_analytics(
+    sort: str = Query(default="bytes", pattern="^(bytes|objects)$"),
+    limit: int = Query(default=100, ge=1, le=10000),
+):
+    """Buckets holding the most bytes (or objects)."""
+    docs = await bucket_docs(("namespace", "objects", "bytes"))
+    rows = [{k: d.get(k) for k in ("bucket", "namespace", "objects", "bytes")} for d in docs]
+    rows.sort(key=lambda r: r[sort] or 0, reverse=True)
+    return respond(docs, rows[:limit])
+
+
+@router.get("/storage-tiers")
+@cached
+async def storage_tiers_analytics(bucket: str | None = Query(default=None)):
+    """Objects and bytes per storage tier (null: not reported)."""
+    docs = await bucket_docs(("storage_tiers",), bucket)
+    totals = combine(docs, "storage_tiers")
+    return respond(docs, _by_bytes([{"storage_tier": k, **v} for k, v in totals.items()]))
+
+
+@router.get("/archival-states")
+@cached
+async def archival_states_analytics(bucket: str | None = Query(default=None)):
+    """Objects and bytes per archival state (null: not archived)."""
+    docs = await bucket_docs(("archival_states",), bucket)
+    totals = combine(docs, "archival_states")
+    return respond(docs, _by_bytes([{"archival_state": k, **v} for k, v in totals.items()]))
+
+
+@router.get("/prefixes")
+@cached
+async def prefixes_analytics(
+    bucket: str | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=10000),
+):
+    """
+    Top-level prefixes holding the most bytes, per bucket. `prefix` is ""
+    for objects at the bucket root and null for the sum of prefixes beyond
+    the ones kept per bucket (ANALYTICS_MAX_PREFIXES).
+    """
+    docs = await bucket_docs(("prefixes",), bucket)
+    rows = [{"bucket": d["bucket"], "prefix": r["key"], "objects": r["objects"], "bytes": r["bytes"]}
+            for d in docs for r in d.get("prefixes") or []]
+    return respond(docs, _by_bytes(rows)[:limit])
+
+
+def _histogram(docs: list[dict[str, Any]], group: str, boundaries: tuple, unit: str) -> list[dict[str, Any]]:
+    totals = combine(docs, group)
+    rows = []
+    for key, (low, high) in ranges(boundaries).items():
+        if key in totals:
+            rows.append({f"min_{unit}": low, f"max_{unit}": high, **totals[key]})
+    return rows
+
+
+@router.get("/sizes")
+@cached
+async def sizes_analytics(bucket: str | None = Query(default=None)):
+    """Size histogram: objects and bytes with min_bytes <= size < max_bytes (null: no bound)."""
+    docs = await bucket_docs(("sizes",), bucket)
+    return respond(docs, _histogram(docs, "sizes", SIZE_BOUNDARIES, "bytes"))
+
+
+@router.get("/ages")
+@cached
+async def ages_analytics(bucket: str | None = Query(default=None)):
+    """
+    Age histogram by time last modified, in days as of `computed_at`, e.g.
+    min_days=365 for objects not modified in a year. Objects without a
+    modification time have null bounds.
+    """
+    docs = await bucket_docs(("ages",), bucket)
+    return respond(docs, _histogram(docs, "ages", AGE_BOUNDARIES_DAYS, "days"))
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from oci_object_discovery_service.utils.logger import logger
+
+
+# "memory" (per process LRU), "redis" (shared between API replicas) or "none"
+cache_backend = os.getenv("CACHE_BACKEND", "memory")
+cache_ttl_seconds = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+cache_max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+cache_prefix = os.getenv("CACHE_PREFIX", "ods:cache:")
+redis_host = os.getenv("REDIS_HOST")
+redis_port = int(os.getenv("REDIS_PORT", "6379"))
+
+
+class ResponseCache:
+    """Encoded API responses by key.
+
+    Keys embed the catalogue generation (see `internal.ui.routes`), so
+    entries of older generations are simply never asked for again and age
+    out; the TTL bounds how long any entry is served.
+    """
+
+    name = "base"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes) -> None:
+        raise NotImplementedError
+
+
+class MemoryCache(ResponseCache):
+    """LRU with a TTL, local to the process."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = cache_max_entries, ttl: float = cache_ttl_seconds) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    async def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisCache(ResponseCache):
+    """Entries in redis with an expiry, shared by every API replica."""
+
+    name = "redis"
+
+    def __init__(self, host: str, port: int = redis_port, ttl: float = cache_ttl_seconds) -> None:
+        import redis
+        import redis.asyncio
+
+        self._errors = (redis.RedisError, OSError)
+        self.ttl = ttl
+        self._client = redis.asyncio.Redis(host=host, port=port, socket_connect_timeout=5)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self._client.get(cache_prefix + key)
+        except self._errors as e:
+            logger.warning(f"[cache] Redis get failed: {e}")
+            return None
+
+    async def set(self, key: str, value: bytes) -> None:
+        try:
+            await self._client.set(cache_prefix + key, value, ex=max(1, int(self.ttl)))
+        except self._errors as e:
+            logger.warning(f"[cache] Redis set failed: {e}")
+
+
+_cache: Optional[ResponseCache] = None
+_cache_ready = False
+_cache_lock = threading.Lock()
+
+
+def _build_cache(backend: str) -> Optional[ResponseCache]:
+    if backend == "redis":
+        if redis_host:
+            try:
+                return RedisCache(redis_host)
+            except Exception as e:
+                logger.warning(f"[cache] Redis at {redis_host}:{redis_port} unavailable: {e}")
+        # Caching in memory is still better than not at all
+        return MemoryCache()
+    if backend == "memory":
+        return MemoryCache()
+    return None
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """The process-wide response cache for `CACHE_BACKEND`, or None when disabled."""
+    global _cache, _cache_ready
+    with _cache_lock:
+        if not _cache_ready:
+            _cache = _build_cache(cache_backend)
+            _cache_ready = True
+            logger.info(f"[cache] Using {_cache.name if _cache else 'no'} response cache")
+    return _cache
+
+
+def set_cache(cache: Optional[ResponseCache]) -> None:
+    """Replace the process-wide cache (e.g. with a fresh `MemoryCache` in tests)."""
+    global _cache, _cache_ready
+    with _cache_lock:
+        _cache = cache
+        _cache_ready = True
@@ -1,7 +1,10 @@
 from pymongo import MongoClient
+from pymongo.errors import OperationFailure
 import os
 from dotenv import load_dotenv
 
+from oci_object_discovery_service.internal.db.search import search_ngrams
+
 load_dotenv()
 
 mongo_uri = os.getenv("MONGO_URI", "mongodb://mongo:27017")
@@ -9,6 +12,14 @@ database_name = os.getenv("database_name", "ods")
 buckets_collection_name = os.getenv("BUCKETS_COLLECTION", "buckets")
 objects_collection_name = os.getenv("OBJECTS_COLLECTION", "objects")
 sessions_collection_name = os.getenv("SESSIONS_COLLECTION", "scan_sessions")
+compartments_collection_name = os.getenv("COMPARTMENTS_COLLECTION", "compartments")
+object_partitions_collection_name = os.getenv("OBJECT_PARTITIONS_COLLECTION", "object_partitions")
+catalogue_state_collection_name = os.getenv("CATALOGUE_STATE_COLLECTION", "catalogue_state")
+bucket_stats_collection_name = os.getenv("BUCKET_STATS_COLLECTION", "bucket_stats")
+analytics_collection_name = os.getenv("ANALYTICS_COLLECTION", "object_analytics")
+session_queues_collection_name = os.getenv("SESSION_QUEUES_COLLECTION", "session_queues")
+# Completed/failed sessions are deleted this many days after completion (0 keeps them)
+session_retention_days = int(os.getenv("SESSION_RETENTION_DAYS", "30"))
 
 client = MongoClient(mongo_uri)
 db = client[database_name]
@@ -16,7 +27,101 @@ db = client[database_name]
 buckets_collection = db[buckets_collection_name]
 buckets_collection.create_index([("name", 1), ("namespace", 1)], unique=True)
 
+
+
+def create_object_indexes(collection) -> None:
+    """Indexes of an objects collection (the main one, or a namespace partition)."""
+    collection.create_index([("bucket", 1), ("name", 1)], unique=True)
+    # Deletion sweep; field names are those of the compact schema (see schema.py)
+    collection.create_index([("bucket", 1), ("sid", 1)])
+    # Name search (see internal/db/search.py); fields are filled in at write time
+    # Also the sort of search result pages (see page_order in internal/ui/routes.py)
+    collection.create_index([("name_lc", 1), ("bucket", 1), ("name", 1)])
+    collection.create_index([("bucket", 1), ("name_lc", 1), ("name", 1)])
+    # Superseded by the two above
+    existing = collection.index_information()
+    for name in ("name_lc_1", "bucket_1_name_lc_1"):
+        if name in existing:
+            collection.drop_index(name)
+    collection.create_index([("name_tokens", 1)])
+    if search_ngrams:
+        collection.create_index([("name_grams", 1)])
+
+
 objects_collection = db[objects_collection_name]
-objects_collection.create_index([("bucket", 1), ("name", 1)], unique=True)
+create_object_indexes(objects_collection)
+
+# Namespaces whose objects live in their own collection, swapped in by full refreshes
+object_partitions_collection = db[object_partitions_collection_name]
+object_partitions_collection.create_index([("namespace", 1)], unique=True)
+
+# Catalogue-wide markers, e.g. the generation API caches are keyed on
+catalogue_state_collection = db[catalogue_state_collection_name]
+
+# Object counts and bytes per bucket, maintained by the scanner
+bucket_stats_collection = db[bucket_stats_collection_name]
+bucket_stats_collection.create_index([("namespace", 1), ("bucket", 1)], unique=True)
+# Stats used to be keyed on the bucket name alone, which other namespaces may share
+if "bucket_1" in bucket_stats_collection.index_information():
+    bucket_stats_collection.drop_index("bucket_1")
+
+# Aggregations of each bucket's objects, refreshed after scans (see analytics.py)
+analytics_collection = db[analytics_collection_name]
+analytics_collection.create_index([("namespace", 1), ("bucket", 1)], unique=True)
+# Analytics used to be keyed on the bucket name alone, which other namespaces may share
+if "bucket_1" in analytics_collection.index_information():
+    analytics_collection.drop_index("bucket_1")
 
 sessions_collection = db[sessions_collection_name]
+# Claims only walk the head of these partial indexes, however much history accumulates
+sessions_collection.create_index(
+    [("priority", -1), ("vtime", 1), ("created_at", 1)],
+    name="queue_pending",
+    partialFilterExpression={"status": "pending"},
+)
+sessions_collection.create_index(
+    [("parent_id", 1), ("priority", -1), ("vtime", 1)],
+    name="queue_pending_children",
+    partialFilterExpression={"status": "pending"},
+)
+sessions_collection.create_index(
+    [("heartbeat_at", 1)],
+    name="queue_leases",
+    partialFilterExpression={"status": "in_progress"},
+)
+sessions_collection.create_index([("status", 1)], name="queue_waiting", partialFilterExpression={"status": "waiting"})
+# At most one pending run per job; later runs are merged into it
+sessions_collection.create_index(
+    [("job_key", 1)],
+    name="job_pending",
+    unique=True,
+    partialFilterExpression={"status": "pending", "job_key": {"$exists": True}},
+)
+sessions_collection.create_index(
+    [("job_key", 1), ("status", 1), ("completed_at", -1)],
+    name="job_history",
+    partialFilterExpression={"job_key": {"$exists": True}},
+)
+# One child task per bucket of a parent session
+sessions_collection.create_index(
+    [("parent_id", 1), ("bucket", 1)],
+    unique=True,
+    partialFilterExpression={"parent_id": {"$exists": True}},
+)
+if session_retention_days > 0:
+    retention = session_retention_days * 86400
+    try:
+        sessions_collection.create_index([("completed_at", 1)], name="session_retention", expireAfterSeconds=retention)
+    except OperationFailure:
+        # Retention changed since the index was built
+        db.command(
+            "collMod",
+            sessions_collection_name,
+            index={"name": "session_retention", "expireAfterSeconds": retention},
+        )
+
+# Virtual clock of each session queue, for fair sharing between tenancies/regions
+session_queues_collection = db[session_queues_collection_name]
+
+compartments_collection = db[compartments_collection_name]
+compartments_collection.create_index([("tenancy", 1)], unique=True)
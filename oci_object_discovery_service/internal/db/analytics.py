@@ -0,0 +1,163 @@
+"""Aggregations behind the analytics API.
+
+Each bucket's objects are aggregated once, after a scan of the bucket (or a
+refresh of its namespace) finishes, into one document of the analytics
+collection. The API then only combines those per-bucket documents and
+never aggregates the objects collections itself.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from . import schema
+
+KIB = 1024
+MIB = 1024 * KIB
+GIB = 1024 * MIB
+# Lower bounds of the size and age histograms; the last range is open ended
+SIZE_BOUNDARIES = (0, KIB, MIB, 16 * MIB, 128 * MIB, GIB, 10 * GIB, 100 * GIB)
+AGE_BOUNDARIES_DAYS = (0, 30, 90, 180, 365, 730, 1825)
+# Ages of objects without a modification time
+UNKNOWN = "unknown"
+GROUPS = ("storage_tiers", "archival_states", "prefixes", "sizes", "ages")
+
+_COUNTERS = {"objects": {"$sum": 1}, "bytes": {"$sum": "$size"}}
+_OPEN_END = 2**62
+
+
+def _grouped(key: Any) -> list[dict[str, Any]]:
+    return [{"$group": {"_id": key, **_COUNTERS}}]
+
+
+def _histogram(value: Any, boundaries: tuple) -> list[dict[str, Any]]:
+    return [
+        {
+            "$bucket": {
+                "groupBy": value,
+                "boundaries": [*boundaries, _OPEN_END],
+                "default": UNKNOWN,
+                "output": _COUNTERS,
+            }
+        }
+    ]
+
+
+def _either(field: str, legacy: str, default: Any = None) -> dict[str, Any]:
+    """`field` of a compact document, or `data.<legacy>` of one not migrated yet."""
+    return {"$ifNull": [f"${field}", {"$ifNull": [f"$data.{legacy}", default]}]}
+
+
+# Time last modified: a date, or an ISO string in legacy documents (each
+# branch is only evaluated for the documents it applies to)
+_MODIFIED = {
+    "$cond": [
+        {"$ifNull": [f"${schema.TIME_MODIFIED}", False]},
+        f"${schema.TIME_MODIFIED}",
+        {"$cond": [{"$ifNull": ["$data.time_modified", False]}, {"$toDate": "$data.time_modified"}, None]},
+    ]
+}
+
+
+def bucket_pipeline(bucket: str, now: datetime, max_prefixes: int) -> list[dict[str, Any]]:
+    """Pipeline aggregating the objects of `bucket` in one pass.
+
+    Reads both the compact and the legacy schema. The leading match is
+    served by the (bucket, name) index; every group is then computed from
+    the same projected stream by `$facet`.
+    """
+    return [
+        {"$match": {schema.BUCKET: bucket}},
+        {
+            "$project": {
+                "_id": 0,
+                "size": _either(schema.SIZE, "size", 0),
+                "tier": _either(schema.STORAGE_TIER, "storage_tier"),
+                "state": _either(schema.ARCHIVAL_STATE, "archival_state"),
+                # Top-level prefix ("logs/" of "logs/2024/a.gz"); "" for objects at the root
+                "prefix": {
+                    "$let": {
+                        "vars": {"parts": {"$split": [f"${schema.NAME}", "/"]}},
+                        "in": {
+                            "$cond": [
+                                {"$gt": [{"$size": "$$parts"}, 1]},
+                                {"$concat": [{"$arrayElemAt": ["$$parts", 0]}, "/"]},
+                                "",
+                            ]
+                        },
+                    }
+                },
+                "age_days": {
+                    "$let": {
+                        "vars": {"modified": _MODIFIED},
+                        "in": {
+                            "$cond": [
+                                # Missing times must not count as age 0 ($max ignores nulls)
+                                {"$ifNull": ["$$modified", False]},
+                                {"$max": [0, {"$divide": [{"$subtract": [now, "$$modified"]}, 86400000]}]},
+                                # Below every boundary: counted as UNKNOWN
+                                -1,
+                            ]
+                        },
+                    }
+                },
+            }
+        },
+        {
+            "$facet": {
+                "totals": _grouped(None),
+                "storage_tiers": _grouped("$tier"),
+                "archival_states": _grouped("$state"),
+                "prefixes": [*_grouped("$prefix"), {"$sort": {"bytes": -1}}, {"$limit": max_prefixes}],
+                "sizes": _histogram("$size", SIZE_BOUNDARIES),
+                "ages": _histogram("$age_days", AGE_BOUNDARIES_DAYS),
+            }
+        },
+    ]
+
+
+def _enum(values: tuple, key: Any) -> Any:
+    if isinstance(key, int) and 0 <= key < len(values):
+        return values[key]
+    return key
+
+
+def bucket_summary(facets: dict[str, Any]) -> dict[str, Any]:
+    """Analytics document of a bucket from the output of `bucket_pipeline`.
+
+    Groups are lists of {"key", "objects", "bytes"}; tiers and states are
+    named (missing ones are null), histogram keys are range lower bounds.
+    Prefixes beyond the kept ones are summed into a null key.
+    """
+    totals = (facets.get("totals") or [{}])[0]
+    doc: dict[str, Any] = {"objects": totals.get("objects", 0), "bytes": totals.get("bytes", 0)}
+    for group in GROUPS:
+        rows: dict[Any, dict[str, Any]] = {}
+        for row in facets.get(group) or []:
+            key = row["_id"]
+            if group == "storage_tiers":
+                key = _enum(schema.STORAGE_TIERS, key)
+            elif group == "archival_states":
+                key = _enum(schema.ARCHIVAL_STATES, key)
+            # Codes and the names legacy documents hold become the same key
+            merged = rows.setdefault(key, {"key": key, "objects": 0, "bytes": 0})
+            merged["objects"] += row["objects"]
+            merged["bytes"] += row["bytes"]
+        doc[group] = list(rows.values())
+    other = {
+        "key": None,
+        "objects": doc["objects"] - sum(r["objects"] for r in doc["prefixes"]),
+        "bytes": doc["bytes"] - sum(r["bytes"] for r in doc["prefixes"]),
+    }
+    if other["objects"]:
+        doc["prefixes"].append(other)
+    return doc
+
+
+def ranges(boundaries: tuple) -> dict[Any, tuple[Any, Any]]:
+    """(lower, upper) bound of each histogram key; the last range has no upper bound."""
+    bounds = {low: (low, high) for low, high in zip(boundaries, boundaries[1:])}
+    bounds[boundaries[-1]] = (boundaries[-1], None)
+    bounds[UNKNOWN] = (None, None)
+    return bounds
@@ -6,6 +6,8 @@ from typing import Any, Optional
 from bson import ObjectId
 from pydantic import BaseModel, Field, ConfigDict
 
+from . import schema
+
 
 class MongoBase(BaseModel):
     """Base model with Mongo `_id` mapping and sensible defaults."""
@@ -25,11 +27,17 @@ class MongoBase(BaseModel):
 
 
 class Job(MongoBase):
+    # Keep manifest keys that are not modelled here
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True, extra="allow")
+
     name: str
     oci_tenancy_name: str
     oci_namespace: str
     oci_region: str
     frequency_minutes: Optional[int] = None
+    scan_mode: Optional[str] = None
+    # Higher runs first
+    priority: Optional[int] = None
 
 
 class BucketDoc(MongoBase):
@@ -47,10 +55,51 @@ class ObjectDoc(MongoBase):
     updated_at: Optional[datetime] = None
     scan_id: Optional[ObjectId] = None
 
+    def to_mongo(self) -> dict[str, Any]:
+        # Stored in the compact schema, with its search fields
+        doc = schema.to_stored(self.bucket, {**self.data, "name": self.name}, scan_id=self.scan_id, updated_at=self.updated_at)
+        return {"_id": self.id, **doc} if self.id else doc
+
+    @classmethod
+    def from_mongo(cls, data: dict[str, Any] | None) -> Optional["ObjectDoc"]:
+        if not data:
+            return None
+        return cls.model_validate(schema.from_stored(data))
+
+
+class CompartmentTree(MongoBase):
+    tenancy: str
+    # Flat list of {id, parent_id, name, lifecycle_state}
+    compartments: list[dict[str, Any]]
+    refreshed_at: datetime
+    # Last full listing; refreshes in between only add new compartments
+    listed_at: Optional[datetime] = None
+
 
 class ScanSession(MongoBase):
     job: Job | dict[str, Any]
     status: str
     created_at: datetime
+    # Queue order: highest priority first, then lowest virtual start time
+    priority: int = 0
+    # Identifies the manifest job of a top-level session (see repository.job_key)
+    job_key: Optional[str] = None
+    # "<tenancy>/<region>": sessions of different queues share workers fairly
+    queue: Optional[str] = None
+    vtime: Optional[int] = None
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    # Worker holding the lease while in_progress; renewed through heartbeat_at
+    lease_owner: Optional[str] = None
+    # Per bucket/shard pagination cursors: {bucket, prefix, start, end, next_start, done}
+    checkpoints: list[dict[str, Any]] = Field(default_factory=list)
+    # Child (per-bucket) task of a list-objects session
+    parent_id: Optional[ObjectId] = None
+    bucket: Optional[str] = None
+    # Approximate bucket size in bytes (None if unknown)
+    size: Optional[int] = None
+    error: Optional[str] = None
+    # Set on a parent once it is expanded / completed
+    children_total: Optional[int] = None
+    children_failed: Optional[int] = None
@@ -1,41 +1,763 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Iterable, Optional
+import os
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Optional
 
 from bson import ObjectId
+from pymongo import InsertOne, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError, OperationFailure, PyMongoError
 
-from . import buckets_collection, objects_collection, sessions_collection
-from .models import BucketDoc, ObjectDoc, ScanSession
+from . import (
+    analytics_collection,
+    bucket_stats_collection,
+    buckets_collection,
+    catalogue_state_collection,
+    compartments_collection,
+    create_object_indexes,
+    db,
+    object_partitions_collection,
+    objects_collection,
+    objects_collection_name,
+    session_queues_collection,
+    sessions_collection,
+)
+from .models import BucketDoc, CompartmentTree, ObjectDoc, ScanSession
+from . import analytics, schema
+from .search import search_fields
+from oci_object_discovery_service.utils.logger import logger
+
+
+bulk_write_batch_size = int(os.getenv("BULK_WRITE_BATCH_SIZE", "1000"))
+bulk_write_flush_interval = float(os.getenv("BULK_WRITE_FLUSH_INTERVAL", "5"))
+checkpoint_interval = float(os.getenv("SCAN_CHECKPOINT_INTERVAL", "30"))
+# An in-progress session whose heartbeat is older than this is reclaimed
+session_lease_seconds = int(os.getenv("SESSION_LEASE_SECONDS", "600"))
+compartment_cache_ttl = int(os.getenv("COMPARTMENT_CACHE_TTL_SECONDS", "3600"))
+# Aggregate a bucket's objects for the analytics API after each scan of it
+analytics_refresh = os.getenv("ANALYTICS_REFRESH", "true").lower() in ("1", "true", "yes")
+# Top-level prefixes kept per bucket (by bytes); the rest are summed up
+analytics_max_prefixes = int(os.getenv("ANALYTICS_MAX_PREFIXES", "1000"))
+# Scans re-aggregate a bucket at most this often (0: after every scan)
+analytics_min_interval = int(os.getenv("ANALYTICS_MIN_INTERVAL_SECONDS", "3600"))
+
+
+# -------- Bulk writes --------
+
+
+class BulkWriter:
+    """Buffer upserts and flush them as unordered ``bulk_write`` batches.
+
+    A batch is flushed when it reaches ``batch_size`` operations or when
+    ``flush_interval`` seconds have passed since the last flush; a shared
+    background thread enforces the interval while no operations arrive, so a
+    buffered tail never waits for the next ``add`` or ``flush``. Errors,
+    including a batch lost to a connection error, are reported per batch through ``on_error`` (defaults to logging) and counted
+    in ``stats``; a failing batch does not stop later batches. Safe to share
+    between threads: ``flush`` returns only once every batch taken so far,
+    including ones being written by other threads, has been written. Use as
+    a context manager so the tail is flushed.
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        *,
+        batch_size: int = bulk_write_batch_size,
+        flush_interval: float = bulk_write_flush_interval,
+        on_error: Optional[Callable[[list[dict[str, Any]]], None]] = None,
+    ) -> None:
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        self.stats = {"batches": 0, "upserted": 0, "modified": 0, "matched": 0, "errors": 0}
+        self._ops: list[Any] = []
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # Tickets of batches taken but not yet written, in take order
+        self._inflight: set[int] = set()
+        self._next_ticket = 0
+        self._last_flush = time.monotonic()
+        if self.flush_interval > 0:
+            _interval_flusher.watch(self)
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def upsert(self, key: dict[str, Any], fields: dict[str, Any]) -> None:
+        self.add(UpdateOne(key, {"$set": fields}, upsert=True))
+
+    def replace(self, key: dict[str, Any], doc: dict[str, Any]) -> None:
+        self.add(ReplaceOne(key, doc, upsert=True))
+
+    def insert(self, doc: dict[str, Any]) -> None:
+        self.add(InsertOne(doc))
+
+    def add(self, op: Any) -> None:
+        with self._lock:
+            self._ops.append(op)
+            due = (
+                len(self._ops) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            ticket, batch = self._take() if due else (None, None)
+        if batch:
+            self._write(ticket, batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            ticket, batch = self._take()
+            # Batches taken from here on are not waited for
+            last = self._next_ticket
+        if batch:
+            self._write(ticket, batch)
+        with self._idle:
+            self._idle.wait_for(lambda: not self._inflight or min(self._inflight) >= last)
+
+    def flush_if_due(self) -> None:
+        """Write the buffered operations if ``flush_interval`` has passed since the last flush."""
+        with self._lock:
+            due = self._ops and time.monotonic() - self._last_flush >= self.flush_interval
+            ticket, batch = self._take() if due else (None, None)
+        if batch:
+            self._write(ticket, batch)
+
+    def _take(self) -> tuple[Optional[int], list[Any]]:
+        batch, self._ops = self._ops, []
+        self._last_flush = time.monotonic()
+        if not batch:
+            return None, batch
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self._inflight.add(ticket)
+        return ticket, batch
+
+    def _write(self, ticket: int, batch: list[Any]) -> None:
+        try:
+            res = self.collection.bulk_write(batch, ordered=False)
+            details = res.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+        except PyMongoError as e:
+            # Nothing is known to have been written (e.g. the connection dropped):
+            # count every op as failed so callers do not act on a lost batch
+            details = {"writeErrors": [{"index": i, "errmsg": str(e)} for i in range(len(batch))]}
+        finally:
+            with self._idle:
+                self._inflight.discard(ticket)
+                self._idle.notify_all()
+        errors = details.get("writeErrors", [])
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["upserted"] += details.get("nUpserted", 0)
+            self.stats["modified"] += details.get("nModified", 0)
+            self.stats["matched"] += details.get("nMatched", 0)
+            self.stats["errors"] += len(errors)
+        if errors:
+            if self.on_error:
+                self.on_error(errors)
+            else:
+                logger.warning(
+                    f"[bulk] {len(errors)}/{len(batch)} writes failed in batch for "
+                    f"{self.collection.name}; first error: {errors[0].get('errmsg')}"
+                )
+
+
+class _IntervalFlusher:
+    """One daemon thread calling `flush_if_due` on every live BulkWriter.
+
+    Writers are held weakly, so one that is dropped without a final flush
+    stops being watched.
+    """
+
+    def __init__(self, tick: float = 1.0) -> None:
+        self.tick = tick
+        self._writers: "weakref.WeakSet[BulkWriter]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, writer: BulkWriter) -> None:
+        with self._lock:
+            self._writers.add(writer)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="bulk-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.tick)
+            with self._lock:
+                writers = list(self._writers)
+            for writer in writers:
+                try:
+                    writer.flush_if_due()
+                except Exception as e:
+                    logger.warning(f"[bulk] Timed flush of {writer.collection.name} failed: {e}")
+            del writers
+
+
+_interval_flusher = _IntervalFlusher()
+
+
+class ObjectDeltaWriter:
+    """Incremental object writes on top of a BulkWriter.
+
+    Listed objects are buffered and compared, one batch at a time, with the
+    stored etag and modification time via the `(bucket, name)` index. New or
+    changed objects are upserted in full. Unchanged objects only get their
+    `scan_id` bumped, so `delete_stale_objects` can sweep deleted objects at
+    the end of the bucket. Meant to be used by a single bucket scan, possibly
+    from several threads.
+    """
+
+    def __init__(self, writer: BulkWriter, scan_id: Optional[ObjectId], *, batch_size: Optional[int] = None) -> None:
+        self.writer = writer
+        self.scan_id = scan_id
+        self.batch_size = batch_size or writer.batch_size
+        self.stats = {"new": 0, "changed": 0, "unchanged": 0}
+        self._docs: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._comparing = 0
+
+    def __enter__(self) -> "ObjectDeltaWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def add(self, doc: ObjectDoc) -> None:
+        self.add_fields(doc.to_mongo())
+
+    def add_fields(self, fields: dict[str, Any]) -> None:
+        """Like `add` for a document already built by `object_fields`."""
+        with self._lock:
+            self._docs.append(fields)
+            batch = self._take() if len(self._docs) >= self.batch_size else None
+        if batch:
+            self._compare_taken(batch)
+
+    def flush(self) -> None:
+        """Write everything added so far, including batches other threads are comparing."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._compare_taken(batch)
+        with self._idle:
+            while self._comparing:
+                self._idle.wait()
+        self.writer.flush()
+
+    def _take(self) -> list[dict[str, Any]]:
+        docs, self._docs = self._docs, []
+        if docs:
+            self._comparing += 1
+        return docs
+
+    def _compare_taken(self, docs: list[dict[str, Any]]) -> None:
+        try:
+            self._compare(docs)
+        finally:
+            with self._idle:
+                self._comparing -= 1
+                self._idle.notify_all()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def _compare(self, docs: list[dict[str, Any]]) -> None:
+        by_bucket: dict[str, list[dict[str, Any]]] = {}
+        for doc in docs:
+            by_bucket.setdefault(doc["bucket"], []).append(doc)
+        for bucket, group in by_bucket.items():
+            stored = {
+                raw["name"]: raw
+                for raw in self.writer.collection.find(
+                    {"bucket": bucket, "name": {"$in": [d["name"] for d in group]}},
+                    schema.VERSION_PROJECTION,
+                )
+            }
+            unchanged: list[str] = []
+            for doc in group:
+                prev = stored.get(doc["name"])
+                if prev is None:
+                    self._count("new")
+                # Documents in the legacy schema are rewritten in the compact one
+                elif not schema.is_legacy(prev) and schema.version(prev) == schema.version(doc):
+                    unchanged.append(doc["name"])
+                    continue
+                else:
+                    self._count("changed")
+                upsert_object_fields(doc, self.writer)
+            if unchanged:
+                self._count("unchanged", len(unchanged))
+                self.writer.add(
+                    UpdateMany(
+                        {"bucket": bucket, "name": {"$in": unchanged}},
+                        {"$set": {schema.SCAN_ID: self.scan_id}},
+                    )
+                )
+
+
+def bucket_writer(**kwargs) -> BulkWriter:
+    return BulkWriter(buckets_collection, **kwargs)
+
+
+def object_writer(namespace: Optional[str] = None, **kwargs) -> BulkWriter:
+    """Writer for the objects of `namespace` (see `objects_collection_for`)."""
+    return BulkWriter(objects_collection_for(namespace), **kwargs)
 
 
 # -------- Buckets --------
 
 
-def upsert_bucket(doc: BucketDoc) -> None:
-    buckets_collection.update_one(
-        {"name": doc.name, "namespace": doc.namespace},
-        {"$set": doc.to_mongo()},
-        upsert=True,
-    )
+def upsert_bucket(doc: BucketDoc, writer: Optional[BulkWriter] = None) -> None:
+    key = {"name": doc.name, "namespace": doc.namespace}
+    if writer is not None:
+        writer.upsert(key, doc.to_mongo())
+        return
+    buckets_collection.update_one(key, {"$set": doc.to_mongo()}, upsert=True)
 
 
-def find_active_buckets() -> Iterable[BucketDoc]:
-    # Return all buckets; the real API payload does not expose lifecycleState
-    # as used previously under metadata.*. If needed, filter using fields in
-    # BucketDoc.data.
-    cursor = buckets_collection.find()
+def find_bucket(namespace: str, name: str) -> Optional[BucketDoc]:
+    raw = buckets_collection.find_one({"name": name, "namespace": namespace})
+    return BucketDoc.from_mongo(raw)  # type: ignore[return-value]
+
+
+def find_active_buckets(namespace: Optional[str] = None) -> Iterable[BucketDoc]:
+    # Return all buckets (of `namespace` if given); the real API payload does
+    # not expose lifecycleState as used previously under metadata.*. If
+    # needed, filter using fields in BucketDoc.data.
+    cursor = buckets_collection.find({"namespace": namespace} if namespace else {})
     for raw in cursor:
         yield BucketDoc.from_mongo(raw)  # type: ignore[return-value]
 
 
+# -------- Compartments --------
+
+
+def find_compartment_tree(
+    tenancy: str, max_age: int = compartment_cache_ttl, field: str = "refreshed_at"
+) -> Optional[CompartmentTree]:
+    """Return the cached compartment tree if its `field` time is within `max_age` seconds.
+
+    `refreshed_at` moves on every refresh, `listed_at` only when the whole
+    tree was listed.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+    raw = compartments_collection.find_one({"tenancy": tenancy, field: {"$gte": cutoff}})
+    return CompartmentTree.from_mongo(raw)  # type: ignore[return-value]
+
+
+def save_compartment_tree(tenancy: str, compartments: list[dict[str, Any]]) -> tuple[int, int]:
+    """Store a fully listed tree; returns (added, removed) compared with the cached one.
+
+    When nothing changed only the refresh times are written.
+    """
+    now = datetime.now(timezone.utc)
+    prev = compartments_collection.find_one({"tenancy": tenancy}, {"compartments": 1}) or {}
+    old = {c["id"]: c for c in prev.get("compartments", [])}
+    new = {c["id"]: c for c in compartments}
+    update: dict[str, Any] = {"refreshed_at": now, "listed_at": now}
+    if old != new:
+        update["compartments"] = compartments
+    compartments_collection.update_one({"tenancy": tenancy}, {"$set": update}, upsert=True)
+    return len(new.keys() - old.keys()), len(old.keys() - new.keys())
+
+
+def add_compartments(tenancy: str, compartments: list[dict[str, Any]]) -> None:
+    """Append compartments created since the tree was listed and mark it refreshed."""
+    update: dict[str, Any] = {"$set": {"refreshed_at": datetime.now(timezone.utc)}}
+    if compartments:
+        update["$push"] = {"compartments": {"$each": compartments}}
+    compartments_collection.update_one({"tenancy": tenancy}, update)
+
+
 # -------- Objects --------
 
 
-def upsert_object(doc: ObjectDoc) -> None:
-    objects_collection.update_one(
-        {"bucket": doc.bucket, "name": doc.name},
-        {"$set": doc.to_mongo()},
+def upsert_object(doc: ObjectDoc, writer: Optional[BulkWriter] = None) -> None:
+    upsert_object_fields(doc.to_mongo(), writer)
+
+
+def object_fields(
+    bucket: str,
+    record: dict[str, Any],
+    *,
+    scan_id: Optional[ObjectId] = None,
+    updated_at: Optional[datetime] = None,
+) -> dict[str, Any]:
+    """Stored form of a listed object, equal to `ObjectDoc(...).to_mongo()`.
+
+    Used by the scan fast path to skip building and dumping a pydantic model
+    per object.
+    """
+    return schema.to_stored(bucket, record, scan_id=scan_id, updated_at=updated_at)
+
+
+def upsert_object_fields(fields: dict[str, Any], writer: Optional[BulkWriter] = None) -> None:
+    """Write a stored object, through `writer` or straight to the main collection."""
+    # Replaced as a whole: fields that became empty are dropped, not left behind
+    key = {"bucket": fields["bucket"], "name": fields["name"]}
+    if writer is not None:
+        writer.replace(key, fields)
+        return
+    objects_collection.replace_one(key, fields, upsert=True)
+
+
+def _shares_main_collection(bucket: str, namespace: Optional[str]) -> bool:
+    """Whether a bucket of the same name in another namespace also lives in the main collection.
+
+    Objects there are keyed by bucket name only, and bucket names are
+    unique per namespace, not globally.
+    """
+    others = set(buckets_collection.distinct("namespace", {"name": bucket, "namespace": {"$ne": namespace}}))
+    if not others:
+        return False
+    partitioned = set(object_partitions_collection.distinct("namespace", {"namespace": {"$in": list(others)}}))
+    return bool(others - partitioned)
+
+
+def delete_stale_objects(bucket: str, scan_id: ObjectId, namespace: Optional[str] = None) -> int:
+    """Delete objects of `bucket` not seen by scan `scan_id`; returns the count.
+
+    Nothing is deleted from the main collection while another namespace has
+    a bucket of the same name there, as the sweep could not tell them apart.
+    """
+    collection = objects_collection_for(namespace)
+    if collection is objects_collection and _shares_main_collection(bucket, namespace):
+        logger.warning(
+            f"[worker] Bucket name {bucket} exists in several namespaces; skipping deletion sweep "
+            f"(a refresh scan gives namespace {namespace} a collection of its own)"
+        )
+        return 0
+    res = collection.delete_many({"bucket": bucket, schema.SCAN_ID: {"$ne": scan_id}})
+    return res.deleted_count
+
+
+def migrate_objects(batch_size: int = 1000) -> dict[str, int]:
+    """Rewrite objects stored in the legacy schema in the compact one, online.
+
+    Each document is replaced only if it is still in the legacy form, so
+    writes of concurrent scans are never overwritten; returns counts of
+    migrated and skipped documents.
+    """
+    writer = object_writer(batch_size=batch_size)
+    stats = {"migrated": 0, "skipped": 0}
+    for raw in objects_collection.find({"data": {"$exists": True}}, batch_size=batch_size):
+        try:
+            doc = schema.legacy_to_stored(raw)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"[migrate] Skipping object {raw.get('_id')}: {e}")
+            stats["skipped"] += 1
+            continue
+        writer.add(ReplaceOne({"_id": raw["_id"], "data": {"$exists": True}}, doc))
+    writer.flush()
+    stats["migrated"] = writer.stats["modified"]
+    return stats
+
+
+def backfill_search_fields(batch_size: int = 1000) -> int:
+    """Add search fields to objects stored before they existed; returns the count."""
+    writer = object_writer(batch_size=batch_size)
+    count = 0
+    cursor = objects_collection.find({"name_lc": {"$exists": False}}, {"name": 1}, batch_size=batch_size)
+    for raw in cursor:
+        writer.add(UpdateOne({"_id": raw["_id"]}, {"$set": search_fields(raw["name"])}))
+        count += 1
+    writer.flush()
+    return count
+
+
+# -------- Object partitions --------
+
+
+def partition_collection_name(namespace: str) -> str:
+    return f"{objects_collection_name}.{namespace}"
+
+
+def staging_collection_name(namespace: str, session_id: ObjectId) -> str:
+    return f"{objects_collection_name}.staging.{namespace}.{session_id}"
+
+
+def objects_collection_for(namespace: Optional[str]) -> Collection:
+    """Collection holding the objects of `namespace`.
+
+    A namespace lives in the main objects collection until its first full
+    refresh swaps in a collection of its own.
+    """
+    if namespace:
+        partition = object_partitions_collection.find_one({"namespace": namespace}, {"collection": 1})
+        if partition:
+            return db[partition["collection"]]
+    return objects_collection
+
+
+def start_refresh(session_id: ObjectId, namespace: str) -> None:
+    """Create the staging collection a full refresh of `namespace` is written to.
+
+    It starts without indexes, so bucket scans only append to it;
+    `complete_parent_if_done` builds the indexes and swaps it in.
+    """
+    name = staging_collection_name(namespace, session_id)
+    try:
+        db.create_collection(name)
+    except CollectionInvalid:
+        # Expanded again after a worker lost the session
+        pass
+    sessions_collection.update_one({"_id": session_id}, {"$set": {"staging": name}})
+
+
+def staging_writer(parent_id: ObjectId, namespace: str, **kwargs) -> BulkWriter:
+    return BulkWriter(db[staging_collection_name(namespace, parent_id)], **kwargs)
+
+
+def begin_staged_bucket(session_id: ObjectId, parent_id: ObjectId, namespace: str, bucket: str) -> None:
+    """Prepare to stage a bucket; drops what an interrupted earlier attempt staged."""
+    prev = sessions_collection.find_one_and_update({"_id": session_id}, {"$set": {"staged": True}})
+    if prev and prev.get("staged"):
+        res = db[staging_collection_name(namespace, parent_id)].delete_many({"bucket": bucket})
+        logger.info(f"[refresh] Dropped {res.deleted_count} objects staged by an earlier attempt at bucket {bucket}")
+
+
+def _moved_buckets(namespace: str) -> list[dict[str, str]]:
+    """{namespace, bucket} of the buckets a first refresh of `namespace` moves out of the main collection.
+
+    Objects there are keyed by bucket name only, so a name another namespace
+    also has there is left alone; see `_shares_main_collection`.
+    """
+    moved = []
+    for b in buckets_collection.find({"namespace": namespace}, {"name": 1}):
+        if _shares_main_collection(b["name"], namespace):
+            logger.warning(
+                f"[refresh] Bucket name {b['name']} exists in several namespaces; "
+                f"leaving its objects in the main collection"
+            )
+            continue
+        moved.append({"namespace": namespace, "bucket": b["name"]})
+    return moved
+
+
+def _swap_staging(parent: dict[str, Any], failed: int) -> bool:
+    """Swap a finished refresh's staging collection in; False while another worker does it.
+
+    The swap is a single renameCollection, so readers see either the old or
+    the new snapshot of the namespace. A refresh with failed buckets, or
+    whose staged objects cannot be indexed, is discarded and the previous
+    snapshot stays.
+    """
+    now = datetime.now(timezone.utc)
+    claimed = sessions_collection.update_one(
+        {
+            "_id": parent["_id"],
+            "$or": [
+                {"swap_started_at": {"$exists": False}},
+                {"swap_started_at": {"$lt": now - timedelta(seconds=session_lease_seconds)}},
+            ],
+        },
+        {"$set": {"swap_started_at": now}},
+    )
+    if not claimed.modified_count:
+        return False
+    namespace = parent["job"]["oci_namespace"]
+    staging = db[parent["staging"]]
+    if parent["staging"] not in db.list_collection_names(filter={"name": parent["staging"]}):
+        # Swapped (or dropped) before the worker doing it went away
+        return True
+    if failed:
+        staging.drop()
+        logger.warning(f"[refresh] {failed} bucket(s) failed; kept the previous objects of namespace {namespace}")
+        return True
+    started = time.monotonic()
+    try:
+        create_object_indexes(staging)
+    except OperationFailure as e:
+        # e.g. duplicates staged by a worker that kept writing after losing its
+        # lease: the build would fail again on every retry
+        staging.drop()
+        logger.warning(f"[refresh] Unable to index staged objects ({e}); kept the previous objects of namespace {namespace}")
+        return True
+    target = partition_collection_name(namespace)
+    moved = [] if object_partitions_collection.find_one({"namespace": namespace}, {"_id": 1}) else _moved_buckets(namespace)
+    staging.rename(target, dropTarget=True)
+    partition = object_partitions_collection.find_one_and_update(
+        {"namespace": namespace},
+        {
+            "$set": {"collection": target, "refreshed_at": now, "session_id": parent["_id"]},
+            # First refresh: the namespace's objects now live in the partition, and
+            # readers skip its buckets in the main collection until they are deleted
+            "$setOnInsert": {"moved_buckets": moved},
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    if partition.get("moved_buckets"):
+        # Also finishes a cleanup interrupted by a worker going away
+        names = [m["bucket"] for m in partition["moved_buckets"]]
+        objects_collection.delete_many({"bucket": {"$in": names}})
+        object_partitions_collection.update_one({"_id": partition["_id"]}, {"$unset": {"moved_buckets": ""}})
+    logger.info(f"[refresh] Swapped in objects of namespace {namespace} ({time.monotonic() - started:.1f}s)")
+    if analytics_refresh:
+        refresh_namespace_analytics(namespace)
+    return True
+
+
+# -------- Bucket stats --------
+
+_STATS_COUNTERS = ("objects", "bytes")
+
+
+def object_stats(records: Iterable[dict[str, Any]]) -> dict[str, int]:
+    """Counters for `records`: objects and bytes, in total and per storage tier and archival state."""
+    stats: dict[str, int] = {}
+    for record in records:
+        size = int(record.get("size") or 0)
+        tier = record.get("storage_tier") or "unknown"
+        state = record.get("archival_state") or "none"
+        for group in ("", f"storage_tiers.{tier}.", f"archival_states.{state}."):
+            stats[group + "objects"] = stats.get(group + "objects", 0) + 1
+            stats[group + "bytes"] = stats.get(group + "bytes", 0) + size
+    return stats
+
+
+def start_bucket_stats(bucket: str, namespace: str, scan_id: Optional[ObjectId]) -> None:
+    """Start counting a scan of `bucket`; a resumed scan keeps what it counted so far.
+
+    Stats are kept per (namespace, bucket), as bucket names are only unique
+    within a namespace. Pages persisted after the last saved cursor of an
+    interrupted scan are listed and counted again on resume, so such a scan
+    may overcount slightly.
+    """
+    scan = {"scan_id": scan_id, "started_at": datetime.now(timezone.utc)}
+    query: dict[str, Any] = {"namespace": namespace, "bucket": bucket}
+    if scan_id is not None:
+        query["scan.scan_id"] = {"$ne": scan_id}
+    try:
+        bucket_stats_collection.update_one(query, {"$set": {"scan": scan}}, upsert=True)
+    except DuplicateKeyError:
+        # Already counting this scan
+        pass
+
+
+def add_bucket_stats(bucket: str, namespace: str, scan_id: Optional[ObjectId], records: list[dict[str, Any]]) -> None:
+    """Count a persisted page of `records` towards the scan in progress."""
+    stats = object_stats(records)
+    if stats:
+        bucket_stats_collection.update_one(
+            {"namespace": namespace, "bucket": bucket, "scan.scan_id": scan_id},
+            {"$inc": {f"scan.{k}": v for k, v in stats.items()}},
+        )
+
+
+def finish_bucket_stats(bucket: str, namespace: str, scan_id: Optional[ObjectId]) -> None:
+    """Publish the counters of a completed scan as the bucket's current stats.
+
+    A scan lists every object of the bucket, so its counters replace the
+    previous ones, including tiers and states that no longer occur.
+    """
+    doc = bucket_stats_collection.find_one(
+        {"namespace": namespace, "bucket": bucket, "scan.scan_id": scan_id}, {"scan": 1}
+    )
+    if doc is None:
+        return
+    scan = doc["scan"]
+    current = {k: scan.get(k, 0) for k in _STATS_COUNTERS}
+    for group in ("storage_tiers", "archival_states"):
+        current[group] = scan.get(group, {})
+    current["updated_at"] = datetime.now(timezone.utc)
+    current["scan_id"] = scan_id
+    bucket_stats_collection.update_one({"_id": doc["_id"]}, {"$set": current, "$unset": {"scan": ""}})
+
+
+# -------- Object analytics --------
+
+
+def _analytics_source(bucket: str, namespace: Optional[str]) -> tuple[Collection, Optional[str]]:
+    """Collection holding `bucket`'s objects and the namespace its analytics are keyed on.
+
+    Objects of namespaces sharing a bucket name in the main collection cannot
+    be told apart, so they are aggregated together under a null namespace.
+    """
+    collection = objects_collection_for(namespace)
+    if collection is objects_collection and _shares_main_collection(bucket, namespace):
+        return collection, None
+    return collection, namespace
+
+
+def _aggregate_bucket(collection: Collection, bucket: str, namespace: Optional[str]) -> None:
+    now = datetime.now(timezone.utc)
+    pipeline = analytics.bucket_pipeline(bucket, now, analytics_max_prefixes)
+    facets = next(collection.aggregate(pipeline, allowDiskUse=True), {})
+    doc = analytics.bucket_summary(facets)
+    doc.update({"bucket": bucket, "namespace": namespace, "computed_at": now})
+    analytics_collection.replace_one({"namespace": namespace, "bucket": bucket}, doc, upsert=True)
+    if namespace is not None and collection is objects_collection:
+        # The name is not shared any more: drop the row aggregated for several namespaces
+        analytics_collection.delete_one({"namespace": None, "bucket": bucket})
+
+
+def refresh_bucket_analytics(bucket: str, namespace: Optional[str] = None, *, min_interval: int = 0) -> bool:
+    """Re-aggregate the objects of `bucket` for the analytics API.
+
+    Skipped if the bucket was aggregated less than `min_interval` seconds
+    ago. Analytics are derived data: a failure is logged and the previous
+    aggregation of the bucket stays until its next scan.
+    """
+    started = time.monotonic()
+    try:
+        collection, key = _analytics_source(bucket, namespace)
+        if min_interval:
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_interval)
+            if analytics_collection.find_one({"namespace": key, "bucket": bucket, "computed_at": {"$gte": cutoff}}, {"_id": 1}):
+                logger.debug(f"[analytics] Bucket {bucket} was aggregated less than {min_interval}s ago")
+                return False
+        _aggregate_bucket(collection, bucket, key)
+    except PyMongoError as e:
+        logger.warning(f"[analytics] Aggregating bucket {bucket} failed: {e}")
+        return False
+    logger.info(f"[analytics] Aggregated bucket {bucket} ({time.monotonic() - started:.1f}s)")
+    return True
+
+
+def refresh_namespace_analytics(namespace: str) -> int:
+    """Re-aggregate every bucket of a namespace partition, e.g. after a refresh swapped it in."""
+    buckets = db[partition_collection_name(namespace)].distinct("bucket")
+    return sum(refresh_bucket_analytics(bucket, namespace) for bucket in buckets)
+
+
+def refresh_analytics() -> int:
+    """Re-aggregate every bucket holding objects; returns how many were aggregated."""
+    partitioned = set(object_partitions_collection.distinct("namespace"))
+    namespaces = {
+        b["name"]: b.get("namespace")
+        for b in buckets_collection.find({}, {"name": 1, "namespace": 1})
+        if b.get("namespace") not in partitioned
+    }
+    count = sum(
+        refresh_bucket_analytics(bucket, namespaces.get(bucket)) for bucket in objects_collection.distinct("bucket")
+    )
+    for namespace in partitioned:
+        count += refresh_namespace_analytics(namespace)
+    return count
+
+
+# -------- Catalogue generation --------
+
+
+def bump_catalogue_generation() -> None:
+    """Mark the catalogue as changed, so cached API responses are not served any more."""
+    catalogue_state_collection.update_one(
+        {"_id": "generation"},
+        {"$inc": {"value": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
         upsert=True,
     )
 
@@ -43,23 +765,336 @@ def upsert_object(doc: ObjectDoc) -> None:
 # -------- Scan Sessions --------
 
 
-def create_session(job: dict) -> ObjectId:
+_CLOCK = "__clock__"
+
+
+def _queue_key(job: dict) -> str:
+    return f"{job.get('oci_tenancy_name')}/{job.get('oci_region')}"
+
+
+def _reserve_vtime(queue: str, n: int = 1) -> int:
+    """First of `n` consecutive virtual start times for `queue`.
+
+    Start-time fair queueing: a queue's next session starts at the later of
+    its own last start and the global clock (the latest start claimed), so
+    an idle queue cannot bank credit and a busy one cannot starve others;
+    pending sessions of different queues are claimed round-robin.
+    """
+    clock = (session_queues_collection.find_one({"_id": _CLOCK}) or {}).get("vtime", 0)
+    session_queues_collection.update_one({"_id": queue}, {"$max": {"vtime": clock}}, upsert=True)
+    raw = session_queues_collection.find_one_and_update(
+        {"_id": queue}, {"$inc": {"vtime": n}}, return_document=ReturnDocument.AFTER
+    )
+    return raw["vtime"] - n + 1
+
+
+# Statuses of a top-level session that has not finished yet
+ACTIVE_STATUSES = ["pending", "in_progress", "waiting"]
+
+
+def job_key(job: dict) -> str:
+    """Stable identity of a manifest job across its sessions."""
+    return "/".join(str(job.get(k)) for k in ("name", "oci_tenancy_name", "oci_namespace", "oci_region"))
+
+
+def create_session(job: dict, priority: Optional[int] = None) -> Optional[ObjectId]:
+    """Queue a session for `job`; returns None when merged into its pending run.
+
+    A job has at most one pending session: another request while one is
+    waiting to be claimed only raises that session's priority if needed.
+    """
     now = datetime.now(timezone.utc)
-    session = ScanSession(job=job, status="pending", created_at=now)
-    res = sessions_collection.insert_one(session.to_mongo())
+    queue = _queue_key(job)
+    session = ScanSession(
+        job=job,
+        status="pending",
+        created_at=now,
+        priority=priority if priority is not None else (job.get("priority") or 0),
+        job_key=job_key(job),
+        queue=queue,
+        vtime=_reserve_vtime(queue),
+    )
+    try:
+        res = sessions_collection.insert_one(session.to_mongo())
+    except DuplicateKeyError:
+        sessions_collection.update_one(
+            {"job_key": session.job_key, "status": "pending"}, {"$max": {"priority": session.priority}}
+        )
+        return None
     return res.inserted_id
 
 
-def claim_next_pending_session() -> Optional[ScanSession]:
+def find_active_session(job: dict) -> Optional[ScanSession]:
+    """The pending or running session of `job`, if any."""
+    raw = sessions_collection.find_one({"job_key": job_key(job), "status": {"$in": ACTIVE_STATUSES}})
+    return ScanSession.from_mongo(raw)  # type: ignore[return-value]
+
+
+def last_completed_at(job: dict) -> Optional[datetime]:
+    raw = sessions_collection.find_one(
+        {"job_key": job_key(job), "status": "completed"},
+        {"completed_at": 1},
+        sort=[("completed_at", -1)],
+    )
+    return raw.get("completed_at") if raw else None
+
+
+def claim_next_pending_session(owner: Optional[str] = None, parent_id: Optional[ObjectId] = None) -> Optional[ScanSession]:
+    """Claim a pending session, or reclaim one whose worker stopped heartbeating.
+
+    The claim is a lease held by `owner` for `session_lease_seconds` and
+    renewed by `heartbeat_session`. Expired leases are reclaimed first; then
+    pending sessions go by priority, then virtual start time (fair across
+    tenancy/region queues), then age. With `parent_id` only children of that
+    session are considered. Both lookups walk a partial index, so a claim
+    costs the same however many finished sessions are kept.
+    """
+    now = datetime.now(timezone.utc)
+    expired = now - timedelta(seconds=session_lease_seconds)
+    scope: dict[str, Any] = {} if parent_id is None else {"parent_id": parent_id}
+    update = {"$set": {"status": "in_progress", "started_at": now, "heartbeat_at": now, "lease_owner": owner}}
     raw = sessions_collection.find_one_and_update(
-        {"status": "pending"},
-        {"$set": {"status": "in_progress", "started_at": datetime.now(timezone.utc)}},
+        {
+            **scope,
+            "status": "in_progress",
+            "$or": [
+                {"heartbeat_at": {"$lt": expired}},
+                {"heartbeat_at": None, "started_at": {"$lt": expired}},
+            ],
+        },
+        update,
+        sort=[("heartbeat_at", 1)],
+        return_document=ReturnDocument.AFTER,
     )
+    if raw is None:
+        raw = sessions_collection.find_one_and_update(
+            {**scope, "status": "pending"},
+            update,
+            sort=[("priority", -1), ("vtime", 1), ("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+    if raw is not None and raw.get("vtime") is not None:
+        session_queues_collection.update_one({"_id": _CLOCK}, {"$max": {"vtime": raw["vtime"]}}, upsert=True)
     return ScanSession.from_mongo(raw)  # type: ignore[return-value]
 
 
-def mark_session_completed(session_id: ObjectId) -> None:
+def heartbeat_session(session_id: ObjectId, owner: Optional[str] = None) -> bool:
+    """Renew the lease; False if `owner` no longer holds it (it was reclaimed)."""
+    query: dict[str, Any] = {"_id": session_id}
+    if owner is not None:
+        query["lease_owner"] = owner
+    res = sessions_collection.update_one(query, {"$set": {"heartbeat_at": datetime.now(timezone.utc)}})
+    return res.matched_count > 0
+
+
+def create_child_sessions(parent: dict, buckets: list[dict[str, Any]]) -> int:
+    """Expand a session into one pending child task per bucket.
+
+    `buckets` are {name, size} dicts, size in bytes or None if unknown. Idempotent: a reclaimed parent that is
+    expanded again does not duplicate children. The parent then waits in
+    status "waiting" until `complete_parent_if_done` sees every child done.
+    """
+    now = datetime.now(timezone.utc)
+    parent_id = parent["_id"]
+    queue = parent.get("queue") or _queue_key(parent["job"])
+    # Within the queue, largest buckets first; those of unknown size before
+    # them, as any of them may be the largest
+    buckets = sorted(buckets, key=lambda b: (b.get("size") is None, b.get("size") or 0), reverse=True)
+    vtime = _reserve_vtime(queue, len(buckets)) if buckets else 0
+    ops = []
+    for i, b in enumerate(buckets):
+        child = ScanSession(
+            job=parent["job"],
+            status="pending",
+            created_at=now,
+            priority=parent.get("priority") or 0,
+            queue=queue,
+            vtime=vtime + i,
+            size=b.get("size"),
+        ).to_mongo()
+        ops.append(
+            UpdateOne({"parent_id": parent_id, "bucket": b["name"]}, {"$setOnInsert": child}, upsert=True)
+        )
+    if ops:
+        sessions_collection.bulk_write(ops, ordered=False)
     sessions_collection.update_one(
-        {"_id": session_id},
+        {"_id": parent_id, "status": {"$ne": "completed"}},
+        {"$set": {"status": "waiting", "children_total": len(buckets), "heartbeat_at": now}},
+    )
+    return len(buckets)
+
+
+def complete_parent_if_done(parent_id: ObjectId) -> bool:
+    """Complete the parent once none of its children is pending or in progress.
+
+    A full refresh is swapped in (or discarded) first, see `_swap_staging`.
+    """
+    open_children = sessions_collection.count_documents(
+        {"parent_id": parent_id, "status": {"$in": ["pending", "in_progress"]}}
+    )
+    if open_children:
+        return False
+    failed = sessions_collection.count_documents({"parent_id": parent_id, "status": "failed"})
+    parent = sessions_collection.find_one({"_id": parent_id, "status": {"$ne": "completed"}}, {"job": 1, "staging": 1})
+    if parent is None:
+        return False
+    if parent.get("staging") and not _swap_staging(parent, failed):
+        return False
+    res = sessions_collection.update_one(
+        {"_id": parent_id, "status": {"$ne": "completed"}},
+        {
+            "$set": {
+                "status": "completed",
+                "completed_at": datetime.now(timezone.utc),
+                "children_failed": failed,
+            }
+        },
+    )
+    if res.modified_count and parent.get("staging"):
+        # A refresh only becomes visible once swapped in
+        bump_catalogue_generation()
+    return res.modified_count > 0
+
+
+def save_checkpoint(
+    session_id: ObjectId,
+    bucket: str,
+    shard: tuple[str, Optional[str], Optional[str]],
+    next_start: Optional[str],
+    done: bool,
+) -> None:
+    """Upsert one bucket/shard cursor in the session's `checkpoints` array."""
+    prefix, start, end = shard
+    now = datetime.now(timezone.utc)
+    match = {"bucket": bucket, "prefix": prefix, "start": start, "end": end}
+    res = sessions_collection.update_one(
+        {"_id": session_id, "checkpoints": {"$elemMatch": match}},
+        {
+            "$set": {
+                "checkpoints.$.next_start": next_start,
+                "checkpoints.$.done": done,
+                "checkpoints.$.updated_at": now,
+                "heartbeat_at": now,
+            }
+        },
+    )
+    if res.matched_count == 0:
+        sessions_collection.update_one(
+            {"_id": session_id},
+            {
+                "$push": {"checkpoints": {**match, "next_start": next_start, "done": done, "updated_at": now}},
+                "$set": {"heartbeat_at": now},
+            },
+        )
+
+
+class SessionCheckpointer:
+    """Resume/save listing cursors of one bucket within a scan session.
+
+    Implements the `Checkpoint` protocol of `internal.oci.objects`. Cursors
+    are written at most every `interval` seconds per shard (finished shards
+    always), and `flush` is called first so that nothing listed before a
+    saved cursor is still sitting in a write buffer.
+    """
+
+    def __init__(
+        self,
+        session_id: ObjectId,
+        bucket: str,
+        checkpoints: Iterable[dict[str, Any]] = (),
+        *,
+        flush: Optional[Callable[[], None]] = None,
+        interval: float = checkpoint_interval,
+    ) -> None:
+        self.session_id = session_id
+        self.bucket = bucket
+        self.flush = flush
+        self.interval = interval
+        self._saved = {
+            (c.get("prefix", ""), c.get("start"), c.get("end")): c
+            for c in checkpoints
+            if c.get("bucket") == bucket
+        }
+        self._last_save: dict[tuple, float] = {}
+
+    def shards(self) -> list[tuple[Optional[str], Optional[str]]]:
+        """Key ranges recorded by an earlier attempt, to reuse the same shard plan."""
+        return sorted(
+            ((s, e) for p, s, e in self._saved if p == ""),
+            key=lambda r: (r[0] is not None, r[0] or ""),
+        )
+
+    def record_plan(self, shards: Iterable[tuple[Optional[str], Optional[str]]]) -> None:
+        """Record a fresh shard plan up front, so a resumed scan also covers shards never started."""
+        now = datetime.now(timezone.utc)
+        entries = [
+            {"bucket": self.bucket, "prefix": "", "start": s, "end": e, "next_start": None, "done": False, "updated_at": now}
+            for s, e in shards
+            if ("", s, e) not in self._saved
+        ]
+        if not entries:
+            return
+        sessions_collection.update_one(
+            {"_id": self.session_id},
+            {"$push": {"checkpoints": {"$each": entries}}, "$set": {"heartbeat_at": now}},
+        )
+        for c in entries:
+            self._saved[("", c["start"], c["end"])] = c
+
+    def resume(self, shard: tuple) -> tuple[Optional[str], bool]:
+        saved = self._saved.get(tuple(shard))
+        if not saved:
+            return None, False
+        return saved.get("next_start"), bool(saved.get("done"))
+
+    def save(self, shard: tuple, next_start: Optional[str], done: bool) -> None:
+        key = tuple(shard)
+        now = time.monotonic()
+        if not done and now - self._last_save.get(key, now - self.interval) < self.interval:
+            return
+        if self.flush:
+            self.flush()
+        save_checkpoint(self.session_id, self.bucket, key, next_start, done)
+        self._last_save[key] = now
+
+
+def complete_waiting_parents() -> int:
+    """Complete parents whose last child finished without completing them (e.g. a crash)."""
+    return sum(complete_parent_if_done(raw["_id"]) for raw in sessions_collection.find({"status": "waiting"}, {"_id": 1}))
+
+
+def _owned(session_id: ObjectId, owner: Optional[str]) -> dict[str, Any]:
+    """Filter matching a running session, held by `owner` when given."""
+    query: dict[str, Any] = {"_id": session_id, "status": {"$in": ["pending", "in_progress"]}}
+    if owner is not None:
+        query.update({"status": "in_progress", "lease_owner": owner})
+    return query
+
+
+def mark_session_completed(session_id: ObjectId, owner: Optional[str] = None) -> bool:
+    """Complete a running session; with `owner`, only while it still holds the lease.
+
+    False if the session was reclaimed by another worker (or already finished).
+    """
+    res = sessions_collection.update_one(
+        _owned(session_id, owner),
         {"$set": {"status": "completed", "completed_at": datetime.now(timezone.utc)}},
     )
+    if res.modified_count:
+        bump_catalogue_generation()
+    return res.modified_count > 0
+
+
+def mark_session_failed(session_id: ObjectId, error: str, owner: Optional[str] = None) -> bool:
+    """Fail a session that is still pending or running (finished ones are left alone).
+
+    With `owner`, only while it still holds the lease.
+    """
+    res = sessions_collection.update_one(
+        _owned(session_id, owner),
+        {"$set": {"status": "failed", "error": error, "completed_at": datetime.now(timezone.utc)}},
+    )
+    if res.modified_count:
+        # Whatever it wrote before failing is visible too
+        bump_catalogue_generation()
+    return res.modified_count > 0
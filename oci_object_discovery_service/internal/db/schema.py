@@ -0,0 +1,219 @@
+"""Storage form of object documents.
+
+Objects are stored flat, with short field names, native types and enum
+codes, instead of the API shape::
+
+    {"bucket", "name", "data": {"name", "size", "etag", "md5", "storage_tier",
+     "archival_state", "time_created", "time_modified"}, "updated_at", "scan_id"}
+
+`to_stored` and `from_stored` convert between the two; code outside the
+repository only ever sees the API shape. `from_stored` also reads documents
+written before the compact schema (see `cmd/migrate_objects`).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from bson import ObjectId
+
+from .search import search_fields
+
+BUCKET = "bucket"
+NAME = "name"
+SIZE = "sz"
+ETAG = "et"
+MD5 = "md"
+STORAGE_TIER = "tr"
+ARCHIVAL_STATE = "ar"
+TIME_CREATED = "tc"
+TIME_MODIFIED = "tm"
+UPDATED_AT = "u"
+SCAN_ID = "sid"
+# Record keys without a field of their own
+EXTRA = "x"
+
+# Fields of documents in the previous (API-shaped) schema
+LEGACY_FIELDS = ("data", "updated_at", "scan_id")
+# Derived search fields, never part of the API shape
+SEARCH_FIELDS = ("name_lc", "name_tokens", "name_grams")
+
+# Enum codes; values not listed here are stored as strings
+STORAGE_TIERS = ("Standard", "InfrequentAccess", "Archive")
+ARCHIVAL_STATES = ("Archived", "Restoring", "Restored")
+
+_RECORD_FIELDS = {
+    "size": SIZE,
+    "etag": ETAG,
+    "md5": MD5,
+    "storage_tier": STORAGE_TIER,
+    "archival_state": ARCHIVAL_STATE,
+    "time_created": TIME_CREATED,
+    "time_modified": TIME_MODIFIED,
+}
+_ENUMS = {STORAGE_TIER: STORAGE_TIERS, ARCHIVAL_STATE: ARCHIVAL_STATES}
+_DATES = (TIME_CREATED, TIME_MODIFIED)
+
+
+def _to_datetime(value: Any) -> Any:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value
+
+
+def _to_iso(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Mongo returns naive UTC datetimes
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    return value
+
+
+def _truncate(value: Any) -> Any:
+    """A datetime as Mongo stores it: naive UTC, millisecond precision."""
+    value = _to_datetime(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+def to_stored(
+    bucket: str,
+    record: dict[str, Any],
+    *,
+    scan_id: Optional[ObjectId] = None,
+    updated_at: Optional[datetime] = None,
+) -> dict[str, Any]:
+    """Storage form of a listed object record, including its search fields."""
+    doc: dict[str, Any] = {BUCKET: bucket, NAME: record["name"]}
+    extra = {}
+    for key, value in record.items():
+        if value is None or key == "name":
+            continue
+        field = _RECORD_FIELDS.get(key)
+        if field is None:
+            extra[key] = value
+        elif field in _ENUMS:
+            values = _ENUMS[field]
+            doc[field] = values.index(value) if value in values else value
+        elif field in _DATES:
+            doc[field] = _to_datetime(value)
+        elif field == SIZE:
+            doc[field] = int(value)
+        else:
+            doc[field] = value
+    if extra:
+        doc[EXTRA] = extra
+    if updated_at is not None:
+        doc[UPDATED_AT] = updated_at
+    if scan_id is not None:
+        doc[SCAN_ID] = scan_id
+    doc.update(search_fields(record["name"]))
+    return doc
+
+
+def from_stored(raw: dict[str, Any], fields: Optional[list[str]] = None) -> dict[str, Any]:
+    """API shape of a stored object document, compact or legacy.
+
+    `fields` (API field names such as "name" or "data.size") limits the
+    result to those fields; see `projection`.
+    """
+    if fields is not None:
+        return _select(from_stored(raw), fields)
+    if is_legacy(raw):
+        return {k: v for k, v in raw.items() if k not in SEARCH_FIELDS}
+    data: dict[str, Any] = {"name": raw.get(NAME)}
+    for key, field in _RECORD_FIELDS.items():
+        value = raw.get(field)
+        if field in _ENUMS and isinstance(value, int):
+            value = _ENUMS[field][value]
+        elif field in _DATES:
+            value = _to_iso(value)
+        data[key] = value
+    data.update(raw.get(EXTRA) or {})
+    doc: dict[str, Any] = {}
+    if "_id" in raw:
+        doc["_id"] = raw["_id"]
+    doc.update({"bucket": raw.get(BUCKET), "name": raw.get(NAME), "data": data})
+    if raw.get(UPDATED_AT) is not None:
+        doc["updated_at"] = raw[UPDATED_AT]
+    if raw.get(SCAN_ID) is not None:
+        doc["scan_id"] = raw[SCAN_ID]
+    return doc
+
+
+def is_legacy(raw: dict[str, Any]) -> bool:
+    return "data" in raw
+
+
+def legacy_to_stored(raw: dict[str, Any]) -> dict[str, Any]:
+    """Compact form of a legacy document, keeping its `_id`."""
+    record = dict(raw.get("data") or {})
+    record["name"] = raw["name"]
+    doc = to_stored(raw["bucket"], record, scan_id=raw.get("scan_id"), updated_at=raw.get("updated_at"))
+    return {"_id": raw["_id"], **doc}
+
+
+def version(raw: dict[str, Any]) -> tuple[Any, Any]:
+    """(etag, time modified) of a stored document, to tell whether an object changed."""
+    if is_legacy(raw):
+        data = raw.get("data") or {}
+        return data.get("etag"), _truncate(data.get("time_modified"))
+    return raw.get(ETAG), _truncate(raw.get(TIME_MODIFIED))
+
+
+# API field -> stored fields holding it, in either schema
+_API_FIELDS: dict[str, tuple[str, ...]] = {
+    "_id": ("_id",),
+    "bucket": (BUCKET,),
+    "name": (NAME,),
+    "updated_at": (UPDATED_AT, "updated_at"),
+    "scan_id": (SCAN_ID, "scan_id"),
+    "data": (*_RECORD_FIELDS.values(), EXTRA, "data"),
+    "data.name": (NAME,),
+    **{f"data.{key}": (field, f"data.{key}") for key, field in _RECORD_FIELDS.items()},
+}
+API_FIELDS = tuple(_API_FIELDS)
+
+
+def projection(fields: list[str]) -> dict[str, Any]:
+    """Mongo projection fetching only the stored fields behind API `fields`.
+
+    `bucket` and `name` are always fetched, as listings page on them.
+    """
+    unknown = [f for f in fields if f not in _API_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; expected some of {list(API_FIELDS)}")
+    stored = {BUCKET: 1, NAME: 1}
+    for f in fields:
+        stored.update(dict.fromkeys(_API_FIELDS[f], 1))
+    if "_id" not in fields:
+        stored["_id"] = 0
+    # "data" and "data.x" would collide on legacy documents
+    if "data" in stored:
+        stored = {k: v for k, v in stored.items() if not k.startswith("data.")}
+    return stored
+
+
+def _select(doc: dict[str, Any], fields: list[str]) -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    for f in fields:
+        top, _, sub = f.partition(".")
+        if top not in doc:
+            continue
+        if sub:
+            if isinstance(doc[top], dict) and sub in doc[top]:
+                out.setdefault(top, {})[sub] = doc[top][sub]
+        else:
+            out[top] = doc[top]
+    return out
+
+
+# Fields `version` needs, for either schema
+VERSION_PROJECTION = {NAME: 1, ETAG: 1, TIME_MODIFIED: 1, "data.etag": 1, "data.time_modified": 1}
+# Fields left out of API responses
+API_PROJECTION = {field: 0 for field in SEARCH_FIELDS}
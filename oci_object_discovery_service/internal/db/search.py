@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import re
+from typing import Any
+
+# Index 3-grams of object names for substring search. Opt-in: they cost
+# roughly one multikey index entry per character of every name. Without them
+# substring queries scan the name_lc index (not the documents).
+search_ngrams = os.getenv("SEARCH_NGRAMS", "false").lower() in ("1", "true", "yes")
+NGRAM = 3
+# Grams of a query matched through the index; the regex checks the rest
+QUERY_GRAMS = 3
+
+SEARCH_MODES = ("substring", "prefix", "segment")
+# Mode of requests that do not pick one: one an index serves. Without n-grams
+# a substring query walks the whole name_lc index, so it must be asked for.
+DEFAULT_SEARCH_MODE = os.getenv("SEARCH_DEFAULT_MODE", "substring" if search_ngrams else "prefix")
+
+
+def name_tokens(name_lc: str) -> list[str]:
+    """Path segments of a lowercased object name."""
+    return [t for t in name_lc.split("/") if t]
+
+
+def name_grams(name_lc: str) -> list[str]:
+    return sorted({name_lc[i : i + NGRAM] for i in range(len(name_lc) - NGRAM + 1)})
+
+
+def _selectivity(gram: str) -> tuple:
+    # Letters vary far more between names than digits and separators ("/20", ".gz")
+    return (sum(c.isalpha() for c in gram), sum(c.isalnum() for c in gram), len(set(gram)))
+
+
+def query_grams(ql: str) -> list[str]:
+    """The most selective grams of a lowercased query, most selective first.
+
+    Mongo builds the index bounds of an `$all` from its first element only,
+    so that one decides how many candidates are fetched.
+    """
+    return sorted(name_grams(ql), key=_selectivity, reverse=True)[:QUERY_GRAMS]
+
+
+def search_fields(name: str) -> dict[str, Any]:
+    """Search fields stored with an object, derived from its name at write time."""
+    name_lc = name.lower()
+    fields: dict[str, Any] = {"name_lc": name_lc, "name_tokens": name_tokens(name_lc)}
+    if search_ngrams:
+        fields["name_grams"] = name_grams(name_lc)
+    return fields
+
+
+def search_query(q: str, mode: str = "substring") -> dict[str, Any]:
+    """Mongo filter for a case-insensitive name search that an index can serve.
+
+    - prefix: anchored regex on `name_lc` (index range scan).
+    - segment: whole path segments, e.g. "logs" or "logs/2024", looked up in
+      `name_tokens` and checked for adjacency on `name_lc`.
+    - substring: with SEARCH_NGRAMS, the query's most selective grams narrow
+      candidates through the multikey `name_grams` index, then the regex on
+      `name_lc` checks the exact match. Otherwise, and for queries shorter
+      than an n-gram, only the unanchored regex is used, which scans the
+      whole `name_lc` index.
+    """
+    ql = q.strip().lower()
+    if mode == "prefix":
+        return {"name_lc": {"$regex": "^" + re.escape(ql)}}
+    if mode == "segment":
+        tokens = name_tokens(ql)
+        if not tokens:
+            return {}
+        path = "/".join(re.escape(t) for t in tokens)
+        return {"name_tokens": {"$all": tokens}, "name_lc": {"$regex": f"(^|/){path}(/|$)"}}
+    query: dict[str, Any] = {"name_lc": {"$regex": re.escape(ql)}}
+    if search_ngrams and len(ql) >= NGRAM:
+        query["name_grams"] = {"$all": query_grams(ql)}
+    return query
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import csv
+import io
+import os
+import re
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from oci_object_discovery_service.internal.db import schema
+from oci_object_discovery_service.internal.db.schema import API_PROJECTION, from_stored
+from oci_object_discovery_service.internal.ui.encoding import dumps
+from oci_object_discovery_service.internal.ui.routes import object_sources
+from oci_object_discovery_service.utils.logger import logger
+
+
+# Documents fetched per round trip and rows encoded per chunk
+export_batch_size = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+COLUMNS = (
+    "bucket",
+    "name",
+    "size",
+    "etag",
+    "md5",
+    "storage_tier",
+    "archival_state",
+    "time_created",
+    "time_modified",
+    "updated_at",
+)
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+router = APIRouter()
+
+
+def export_query(
+    bucket: Optional[str] = None,
+    prefix: Optional[str] = None,
+    modified_after: Optional[datetime] = None,
+    modified_before: Optional[datetime] = None,
+    updated_after: Optional[datetime] = None,
+) -> dict[str, Any]:
+    query: dict[str, Any] = {}
+    if bucket:
+        query["bucket"] = bucket
+    if prefix:
+        # The lowercase prefix is served by the name_lc index; the exact one filters
+        query["name_lc"] = {"$regex": "^" + re.escape(prefix.lower())}
+        query["name"] = {"$regex": "^" + re.escape(prefix)}
+    modified: dict[str, Any] = {}
+    if modified_after:
+        modified["$gte"] = modified_after
+    if modified_before:
+        modified["$lt"] = modified_before
+    if modified:
+        query[schema.TIME_MODIFIED] = modified
+    if updated_after:
+        query[schema.UPDATED_AT] = {"$gte": updated_after}
+    return query
+
+
+def export_row(raw: dict[str, Any]) -> dict[str, Any]:
+    """Flat row of a stored object; times are ISO strings."""
+    doc = from_stored(raw)
+    row = {k: v for k, v in doc["data"].items() if k in COLUMNS}
+    row["bucket"] = doc["bucket"]
+    row["name"] = doc["name"]
+    updated_at = doc.get("updated_at")
+    if isinstance(updated_at, datetime):
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        updated_at = updated_at.isoformat()
+    row["updated_at"] = updated_at
+    return row
+
+
+async def iter_batches(query: dict[str, Any], batch_size: int = export_batch_size) -> AsyncIterator[list[dict[str, Any]]]:
+    """Rows matching `query`, a batch at a time, from server-side cursors over every partition."""
+    batch: list[dict[str, Any]] = []
+    for source in await object_sources():
+        async for raw in source.collection.find(source.query(query), API_PROJECTION, batch_size=batch_size):
+            batch.append(export_row(raw))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class NdjsonEncoder:
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: list[dict[str, Any]]) -> bytes:
+        return b"".join(dumps(row) + b"\n" for row in rows)
+
+    def close(self) -> bytes:
+        return b""
+
+
+class CsvEncoder:
+    def header(self) -> bytes:
+        return self.encode([dict(zip(COLUMNS, COLUMNS))])
+
+    def encode(self, rows: list[dict[str, Any]]) -> bytes:
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writerows(rows)
+        return buf.getvalue().encode()
+
+    def close(self) -> bytes:
+        return b""
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file whose contents are drained after every row group."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out, self._chunks = b"".join(self._chunks), []
+        return out
+
+
+class ParquetEncoder:
+    """One Parquet row group per batch; needs the optional `pyarrow` package."""
+
+    def __init__(self) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export needs pyarrow installed on the server")
+        self._pa = pa
+        self.schema = pa.schema(
+            [(c, pa.int64() if c == "size" else pa.string()) for c in COLUMNS]
+        )
+        self._sink = _Sink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="snappy")
+
+    def header(self) -> bytes:
+        return self._sink.drain()
+
+    def encode(self, rows: list[dict[str, Any]]) -> bytes:
+        table = self._pa.Table.from_pylist(rows, schema=self.schema)
+        self._writer.write_table(table)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def _encoder(fmt: str):
+    if fmt == "csv":
+        return CsvEncoder()
+    if fmt == "parquet":
+        return ParquetEncoder()
+    return NdjsonEncoder()
+
+
+async def stream_export(
+    batches: AsyncIterator[list[dict[str, Any]]], encoder, compress: bool = False
+) -> AsyncIterator[bytes]:
+    """Encode `batches` chunk by chunk, optionally gzipped; memory stays at one batch."""
+    gz = zlib.compressobj(wbits=31) if compress else None
+
+    def out(data: bytes) -> Iterable[bytes]:
+        if gz is not None:
+            data = gz.compress(data)
+        if data:
+            yield data
+
+    rows = 0
+    for chunk in out(encoder.header()):
+        yield chunk
+    async for batch in batches:
+        rows += len(batch)
+        for chunk in out(encoder.encode(batch)):
+            yield chunk
+    for chunk in out(encoder.close()):
+        yield chunk
+    if gz is not None:
+        yield gz.flush()
+    logger.info(f"[export] Streamed {rows} objects")
+
+
+@router.get("/export")
+async def export_objects(
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv|parquet)$"),
+    bucket: str | None = Query(default=None),
+    prefix: str | None = Query(default=None),
+    modified_after: datetime | None = Query(default=None),
+    modified_before: datetime | None = Query(default=None),
+    updated_after: datetime | None = Query(default=None),
+    gzip: bool = Query(default=False),
+):
+    """
+    Stream every matching object in one response (chunked transfer).
+    Rows are flat: bucket, name, size, etag, md5, storage_tier,
+    archival_state, time_created, time_modified, updated_at. `gzip=true`
+    compresses the stream (Content-Encoding: gzip).
+    """
+    encoder = _encoder(format)
+    query = export_query(bucket, prefix, modified_after, modified_before, updated_after)
+    media_type, extension = FORMATS[format]
+    headers = {"Content-Disposition": f'attachment; filename="objects.{extension}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        stream_export(iter_batches(query), encoder, compress=gzip),
+        media_type=media_type,
+        headers=headers,
+    )
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Optional
+
+from oci_object_discovery_service.utils.logger import logger
+
+
+# "auto" tries redis, then Mongo change streams; "redis", "mongo", "memory" or "none"
+notify_backend = os.getenv("NOTIFY_BACKEND", "auto")
+notify_channel = os.getenv("NOTIFY_CHANNEL", "ods:scan_sessions")
+redis_host = os.getenv("REDIS_HOST")
+redis_port = int(os.getenv("REDIS_PORT", "6379"))
+
+
+class Notifier:
+    """Wakes idle workers when scan sessions become claimable.
+
+    `publish` is called after sessions are created; `wait` blocks until a
+    notification arrives or `timeout` passes. Once `subscribe` was called, a
+    notification published while nobody is waiting is not lost: the next
+    `wait` returns immediately. Workers claim after every wait, so spurious
+    wake-ups are harmless.
+    """
+
+    name = "base"
+
+    def subscribe(self) -> None:
+        """Start receiving notifications; call before the first claim so none are missed."""
+
+    def publish(self, session_id: Optional[object] = None) -> None:
+        raise NotImplementedError
+
+    def wait(self, timeout: float) -> bool:
+        """Return True if woken by a notification, False on timeout."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryNotifier(Notifier):
+    """Single-process notifier, for tests and running everything in one process."""
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._pending = 0
+
+    def publish(self, session_id: Optional[object] = None) -> None:
+        with self._cond:
+            self._pending += 1
+            self._cond.notify_all()
+
+    def wait(self, timeout: float) -> bool:
+        with self._cond:
+            woken = self._cond.wait_for(lambda: self._pending > 0, timeout)
+            self._pending = 0
+            return woken
+
+
+class RedisNotifier(Notifier):
+    """Redis pub/sub on `notify_channel`.
+
+    Once subscribed, messages published between two waits are buffered on
+    the connection rather than missed.
+    """
+
+    name = "redis"
+
+    def __init__(self, host: str, port: int = redis_port, channel: str = notify_channel) -> None:
+        import redis
+
+        self._errors = (redis.RedisError, OSError)
+        self.channel = channel
+        self._client = redis.Redis(host=host, port=port, socket_connect_timeout=5)
+        self._client.ping()
+        self._pubsub = None
+
+    def subscribe(self) -> None:
+        if self._pubsub is None:
+            self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(self.channel)
+
+    def publish(self, session_id: Optional[object] = None) -> None:
+        try:
+            self._client.publish(self.channel, str(session_id or ""))
+        except self._errors as e:
+            # The session is already stored; workers still find it by polling
+            logger.warning(f"[notify] Unable to publish to redis: {e}")
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        try:
+            self.subscribe()
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                if self._pubsub.get_message(timeout=remaining):
+                    # Coalesce a burst of notifications into one wake-up
+                    while self._pubsub.get_message(timeout=0):
+                        pass
+                    return True
+        except self._errors as e:
+            logger.warning(f"[notify] Redis subscription failed, polling instead: {e}")
+            self._pubsub = None
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            return False
+
+    def close(self) -> None:
+        if self._pubsub is not None:
+            self._pubsub.close()
+        self._client.close()
+
+
+class MongoChangeStreamNotifier(Notifier):
+    """Watches inserts into the sessions collection; needs a replica set.
+
+    Publishing is a no-op: inserting a session is the notification.
+    """
+
+    name = "mongo"
+
+    def __init__(self) -> None:
+        from oci_object_discovery_service.internal.db import sessions_collection
+
+        self._collection = sessions_collection
+        # Fails fast on a standalone server, where change streams are unavailable
+        self._collection.watch(max_await_time_ms=1).close()
+        self._event = threading.Event()
+        self._opened = threading.Event()
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="notify-mongo", daemon=True)
+            self._thread.start()
+            # Inserts before the stream is open would not be reported
+            self._opened.wait(5)
+
+    def _watch(self) -> None:
+        from pymongo.errors import PyMongoError
+
+        while not self._closed.is_set():
+            try:
+                with self._collection.watch([{"$match": {"operationType": "insert"}}], max_await_time_ms=1000) as stream:
+                    self._opened.set()
+                    while not self._closed.is_set():
+                        if stream.try_next() is not None:
+                            self._event.set()
+            except PyMongoError as e:
+                logger.warning(f"[notify] Change stream interrupted, reopening: {e}")
+                self._closed.wait(5)
+
+    def publish(self, session_id: Optional[object] = None) -> None:
+        pass
+
+    def wait(self, timeout: float) -> bool:
+        self.subscribe()
+        woken = self._event.wait(timeout)
+        self._event.clear()
+        return woken
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+_notifier: Optional[Notifier] = None
+_notifier_ready = False
+_notifier_lock = threading.Lock()
+
+
+def _build_notifier(backend: str) -> Optional[Notifier]:
+    if backend == "memory":
+        return InMemoryNotifier()
+    if backend in ("redis", "auto") and redis_host:
+        try:
+            return RedisNotifier(redis_host)
+        except Exception as e:
+            logger.warning(f"[notify] Redis at {redis_host}:{redis_port} unavailable: {e}")
+    if backend in ("mongo", "auto"):
+        try:
+            return MongoChangeStreamNotifier()
+        except Exception as e:
+            logger.warning(f"[notify] Mongo change streams unavailable: {e}")
+    return None
+
+
+def get_notifier() -> Optional[Notifier]:
+    """The process-wide notifier for `NOTIFY_BACKEND`, or None to fall back to polling."""
+    global _notifier, _notifier_ready
+    with _notifier_lock:
+        if not _notifier_ready:
+            _notifier = None if notify_backend == "none" else _build_notifier(notify_backend)
+            _notifier_ready = True
+            logger.info(f"[notify] Using {_notifier.name if _notifier else 'no'} notification backend")
+    return _notifier
+
+
+def set_notifier(notifier: Optional[Notifier]) -> None:
+    """Replace the process-wide notifier (e.g. with an `InMemoryNotifier` in tests)."""
+    global _notifier, _notifier_ready
+    with _notifier_lock:
+        _notifier = notifier
+        _notifier_ready = True
+
+
+def publish(session_id: Optional[object] = None) -> None:
+    """Tell waiting workers that sessions are ready to be claimed."""
+    notifier = get_notifier()
+    if notifier:
+        notifier.publish(session_id)
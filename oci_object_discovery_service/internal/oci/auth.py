@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import os
-from typing import Optional, Tuple
+import threading
+from typing import Dict, Optional, Tuple
 
 from oci import config as oci_config
 from oci.auth.signers import InstancePrincipalsSecurityTokenSigner
@@ -11,34 +12,98 @@ from oci.identity import IdentityClient
 from oci_object_discovery_service.utils.logger import logger
 
 
-def get_clients(region: str, profile: Optional[str] = None) -> Tuple[ObjectStorageClient, IdentityClient, Optional[str]]:
-    """Return OCI clients (ObjectStorage, Identity) and the tenancy OCID.
+Clients = Tuple[ObjectStorageClient, IdentityClient, Optional[str]]
 
-    Prefers local config (default or profile), falls back to instance principals.
-    Region is required for both modes. Tenancy OCID is taken from config when
-    available, otherwise from the signer if present, otherwise from env
-    `OCI_TENANCY_OCID`.
+# HTTP connections kept per client; raise to match the number of listing threads
+default_pool_size = int(os.getenv("OCI_CONNECTION_POOL_SIZE", "32"))
+
+_clients: Dict[Tuple[Optional[str], Optional[str], bool], Clients] = {}
+_clients_lock = threading.Lock()
+
+
+class _SerializedInstancePrincipalsSigner(InstancePrincipalsSecurityTokenSigner):
+    """Instance principals signer that is safe to share between threads.
+
+    The SDK signer swaps its token and signing keys in place on every call,
+    and concurrent callers can each trigger a token refresh. Holding one lock
+    across the refresh check and the signature lets exactly one thread
+    refresh an expiring token while the others wait and reuse it.
     """
+
+    def __init__(self, *args, **kwargs):
+        self._sign_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def __call__(self, request, enforce_content_headers=True):
+        with self._sign_lock:
+            return super().__call__(request, enforce_content_headers)
+
+
+def _size_connection_pool(client, pool_size: int) -> None:
+    """Remount the client's HTTPS adapter with a connection pool of `pool_size`."""
+    session = client.base_client.session
+    adapter = session.get_adapter("https://")
+    # Reuse the SDK's own adapter class to keep its transport behaviour
+    session.mount("https://", type(adapter)(pool_connections=pool_size, pool_maxsize=pool_size))
+
+
+def _build_clients(region: Optional[str], profile: Optional[str], pool_size: int, raw: bool) -> Clients:
     # Try local config first
     try:
-        profile = profile or os.getenv("OCI_PROFILE")
         cfg = oci_config.from_file(profile_name=profile)  # raises if not present
         cfg["region"] = region or cfg.get("region")
-        object_client = ObjectStorageClient(cfg)
+        object_client = ObjectStorageClient(cfg, skip_deserialization=raw)
         identity_client = IdentityClient(cfg)
         tenancy = cfg.get("tenancy")
         logger.info("Using OCI local config%s" % (f" profile={profile}" if profile else ""))
-        return object_client, identity_client, tenancy
     except Exception as e:
         logger.info(f"Falling back to Instance Principals signer: {e}")
 
-    # Fallback: Instance Principals
-    signer = InstancePrincipalsSecurityTokenSigner()
-    cfg = {"region": region}
-    object_client = ObjectStorageClient(config=cfg, signer=signer)
-    identity_client = IdentityClient(config=cfg, signer=signer)
-    tenancy = getattr(signer, "tenancy_id", None) or os.getenv("OCI_TENANCY_OCID")
-    if not tenancy:
-        logger.warning("Unable to determine tenancy OCID; set OCI_TENANCY_OCID env if needed")
+        # Fallback: Instance Principals
+        signer = _SerializedInstancePrincipalsSigner()
+        cfg = {"region": region}
+        object_client = ObjectStorageClient(config=cfg, signer=signer, skip_deserialization=raw)
+        identity_client = IdentityClient(config=cfg, signer=signer)
+        tenancy = getattr(signer, "tenancy_id", None) or os.getenv("OCI_TENANCY_OCID")
+        if not tenancy:
+            logger.warning("Unable to determine tenancy OCID; set OCI_TENANCY_OCID env if needed")
+
+    _size_connection_pool(object_client, pool_size)
     return object_client, identity_client, tenancy
 
+
+def get_clients(region: str, profile: Optional[str] = None, *, raw: bool = False) -> Clients:
+    """Return OCI clients (ObjectStorage, Identity) and the tenancy OCID.
+
+    Prefers local config (default or profile), falls back to instance principals.
+    Region is required for both modes. Tenancy OCID is taken from config when
+    available, otherwise from the signer if present, otherwise from env
+    `OCI_TENANCY_OCID`.
+
+    Clients are built once per (region, profile) and shared: they are safe to
+    use from many threads, reuse pooled TLS connections (`default_pool_size`
+    per client) and, for instance principals, share one signer whose token is
+    refreshed under a lock.
+
+    With `raw`, the ObjectStorage client skips SDK model deserialization and
+    returns response bodies as parsed JSON (dicts with camelCase keys).
+    """
+    profile = profile or os.getenv("OCI_PROFILE")
+    key = (region, profile, raw)
+    clients = _clients.get(key)
+    if clients is None:
+        with _clients_lock:
+            clients = _clients.get(key)
+            if clients is None:
+                clients = _build_clients(region, profile, default_pool_size, raw)
+                _clients[key] = clients
+    return clients
+
+
+def configure_pool_size(pool_size: int) -> None:
+    """Set the HTTP connection pool size for new and already built clients."""
+    global default_pool_size
+    with _clients_lock:
+        default_pool_size = max(1, pool_size)
+        for object_client, _, _ in _clients.values():
+            _size_connection_pool(object_client, default_pool_size)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import List
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set, Tuple
 
 from oci import pagination
 from oci.object_storage import ObjectStorageClient
@@ -10,58 +12,140 @@ from .auth import get_clients
 from oci_object_discovery_service.utils.logger import logger
 
 
-def _list_all_compartments(identity_client: IdentityClient, tenancy_ocid: str) -> List[str]:
-    """Return all active compartment OCIDs including the root tenancy."""
-    comp_ids: List[str] = [tenancy_ocid]
+list_buckets_concurrency = int(os.getenv("LIST_BUCKETS_CONCURRENCY", "16"))
+
+
+def _compartment_dict(c) -> dict:
+    return {
+        "id": c.id,
+        "parent_id": getattr(c, "compartment_id", None),
+        "name": getattr(c, "name", None),
+        "lifecycle_state": getattr(c, "lifecycle_state", None),
+    }
+
+
+def _list_all_compartments(identity_client: IdentityClient, tenancy_ocid: str) -> List[dict]:
+    """Return every compartment under the tenancy (any lifecycle state)."""
     resp = pagination.list_call_get_all_results(
         identity_client.list_compartments,
         tenancy_ocid,
         compartment_id_in_subtree=True,
         access_level="ANY",
     )
-    for c in resp.data:
-        if getattr(c, "lifecycle_state", None) == "ACTIVE":
-            comp_ids.append(c.id)
-    return comp_ids
+    return [_compartment_dict(c) for c in resp.data]
+
+
+def _tenancy_identity(region: str) -> Tuple[str, IdentityClient]:
+    _, identity_client, tenancy = get_clients(region)
+    if not tenancy:
+        raise RuntimeError("Tenancy OCID not available; set OCI_TENANCY_OCID or use local config")
+    return tenancy, identity_client
+
+
+def list_compartments(region: str) -> Tuple[str, List[dict]]:
+    """Return the tenancy OCID and its compartment tree as flat dicts."""
+    tenancy, identity_client = _tenancy_identity(region)
+    return tenancy, _list_all_compartments(identity_client, tenancy)
+
+
+def list_new_compartments(region: str, known: Set[str]) -> List[dict]:
+    """Compartments created since the ones in `known` were listed.
+
+    Pages newest first and stops at the first known compartment, so a
+    tenancy without new compartments costs one request. Deleted or renamed
+    compartments are only seen by a full `list_compartments`.
+    """
+    tenancy, identity_client = _tenancy_identity(region)
+    added: List[dict] = []
+    for c in pagination.list_call_get_all_results_generator(
+        identity_client.list_compartments,
+        "record",
+        tenancy,
+        compartment_id_in_subtree=True,
+        access_level="ANY",
+        sort_by="TIMECREATED",
+        sort_order="DESC",
+    ):
+        if c.id in known:
+            break
+        added.append(_compartment_dict(c))
+    return added
+
+
+def active_compartment_ids(tenancy: str, compartments: List[dict]) -> List[str]:
+    """Active compartment OCIDs including the root tenancy."""
+    return [tenancy] + [c["id"] for c in compartments if c.get("lifecycle_state") == "ACTIVE"]
+
+
+def _bucket_size_fields(object_client: ObjectStorageClient, namespace: str, name: str) -> dict:
+    """Return approximate object count/size; bucket summaries do not carry them."""
+    try:
+        b = object_client.get_bucket(
+            namespace, name, fields=["approximateCount", "approximateSize"]
+        ).data
+    except Exception as e:
+        logger.debug(f"Unable to read size of bucket {name}: {e}")
+        return {}
+    return {
+        "approximate_count": getattr(b, "approximate_count", None),
+        "approximate_size": getattr(b, "approximate_size", None),
+    }
 
 
-def list_buckets(namespace: str, region: str) -> list[dict]:
+def _list_compartment_buckets(object_client: ObjectStorageClient, namespace: str, comp_id: str) -> List[dict]:
+    try:
+        resp = pagination.list_call_get_all_results(
+            object_client.list_buckets, namespace, comp_id
+        )
+    except Exception as e:
+        logger.warning(f"Error listing buckets in compartment {comp_id}: {e}")
+        return []
+    results: List[dict] = []
+    for b in resp.data:
+        # Build a fixed, snake_case dict using known fields
+        time_created = getattr(b, "time_created", None)
+        results.append(
+            {
+                "compartment_id": comp_id,
+                "created_by": getattr(b, "created_by", None),
+                "defined_tags": getattr(b, "defined_tags", None),
+                "etag": getattr(b, "etag", None),
+                "freeform_tags": getattr(b, "freeform_tags", None),
+                "name": getattr(b, "name", None),
+                "namespace": namespace,
+                "time_created": time_created.isoformat() if time_created else None,
+            }
+        )
+    return results
+
+
+def list_buckets(
+    namespace: str,
+    region: str,
+    compartment_ids: Optional[List[str]] = None,
+    *,
+    concurrency: int = list_buckets_concurrency,
+) -> list[dict]:
     """List buckets across all compartments for the tenancy in the given region.
 
     Note: OCI API requires a compartment OCID to list buckets; we enumerate
-    all accessible compartments under the tenancy and aggregate results.
+    all accessible compartments under the tenancy (unless `compartment_ids`
+    is given, e.g. from a cached tree) and aggregate results. Compartments,
+    then per-bucket size lookups, are fanned out over `concurrency` threads.
     """
-    object_client, identity_client, tenancy = get_clients(region)
-    if not tenancy:
-        raise RuntimeError("Tenancy OCID not available; set OCI_TENANCY_OCID or use local config")
+    object_client, _, _ = get_clients(region)
+    if compartment_ids is None:
+        tenancy, compartments = list_compartments(region)
+        compartment_ids = active_compartment_ids(tenancy, compartments)
 
-    results: list[dict] = []
-    for comp_id in _list_all_compartments(identity_client, tenancy):
-        try:
-            resp = pagination.list_call_get_all_results(
-                object_client.list_buckets, namespace, comp_id
-            )
-            for b in resp.data:
-                # Build a fixed, snake_case dict using known fields
-                time_created = getattr(b, "time_created", None)
-                api_data = {
-                    "compartment_id": comp_id,
-                    "created_by": getattr(b, "created_by", None),
-                    "defined_tags": getattr(b, "defined_tags", None),
-                    "etag": getattr(b, "etag", None),
-                    "freeform_tags": getattr(b, "freeform_tags", None),
-                    "name": getattr(b, "name", None),
-                    "namespace": namespace,
-                    "time_created": time_created.isoformat() if time_created else None,
-                }
-                results.append(
-                    {
-                        "name": api_data["name"],
-                        "namespace": api_data["namespace"],
-                        "data": api_data,
-                    }
-                )
-        except Exception as e:
-            logger.warning(f"Error listing buckets in compartment {comp_id}: {e}")
-            continue
-    return results
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+        per_compartment = ex.map(
+            lambda comp_id: _list_compartment_buckets(object_client, namespace, comp_id),
+            compartment_ids,
+        )
+        api_data = [b for buckets in per_compartment for b in buckets]
+        sizes = ex.map(lambda b: _bucket_size_fields(object_client, namespace, b["name"]), api_data)
+        for b, size in zip(api_data, sizes):
+            b.update(size)
+
+    return [{"name": b["name"], "namespace": b["namespace"], "data": b} for b in api_data]
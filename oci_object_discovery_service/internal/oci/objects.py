@@ -1,34 +1,199 @@
 from __future__ import annotations
 
 import math
+import random
+import threading
 import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Generator, Iterable, Iterator, List, Optional, Tuple
+from typing import Callable, Generator, Iterable, Iterator, List, NamedTuple, Optional, Protocol, Tuple
 
 from oci.exceptions import ServiceError
+from oci.retry import NoneRetryStrategy
 from oci.object_storage.models import ListObjects
 
 from .auth import get_clients
+from .ratelimit import AdaptiveRateLimiter, get_rate_limiter
 from oci_object_discovery_service.utils.logger import logger
 
 
 RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Listing calls are retried by `_call_with_retries` only, never again inside
+# the SDK, so every throttle reaches the shared rate limiter
+NO_SDK_RETRY = NoneRetryStrategy()
 
+# A unit of listing work: (prefix, start, end) with start inclusive, end exclusive
+Shard = Tuple[str, Optional[str], Optional[str]]
 
-def _call_with_retries(func, *args, max_retries: int = 5, base_delay: float = 0.5, factor: float = 2.0, **kwargs):
-    """Call SDK function with exponential backoff on retryable ServiceError."""
+
+class Checkpoint(Protocol):
+    """Persists per-shard pagination cursors so a listing can be resumed."""
+
+    def resume(self, shard: Shard) -> Tuple[Optional[str], bool]:
+        """Return (next_start, done) recorded for `shard`."""
+        ...
+
+    def save(self, shard: Shard, next_start: Optional[str], done: bool) -> None:
+        """Record that every object of `shard` before `next_start` was consumed."""
+        ...
+
+
+class _Cancelled(Exception):
+    """Unwinds a listing thread whose consumer has gone away."""
+
+
+class _PageEnd(NamedTuple):
+    shard: Shard
+    next_start: Optional[str]
+
+
+# camelCase field names requested from (and returned by) ListObjects
+LIST_FIELDS = "name,size,md5,timeCreated,timeModified,etag,storageTier,archivalState"
+
+
+def _record_from_model(obj) -> dict:
+    """Build the object record from an SDK `ObjectSummary` model."""
+    tc = getattr(obj, "time_created", None)
+    tm = getattr(obj, "time_modified", None)
+    return {
+        "name": getattr(obj, "name", None),
+        "size": getattr(obj, "size", None),
+        "etag": getattr(obj, "etag", None),
+        "md5": getattr(obj, "md5", None),
+        "storage_tier": getattr(obj, "storage_tier", None),
+        "archival_state": getattr(obj, "archival_state", None),
+        "time_created": tc.isoformat() if tc else None,
+        "time_modified": tm.isoformat() if tm else None,
+    }
+
+
+def _record_from_json(obj: dict) -> dict:
+    """Build the object record from a raw (camelCase) ListObjects JSON entry.
+
+    Produces the same record as `_record_from_model` without SDK models.
+    """
+    get = obj.get
+    tc = get("timeCreated")
+    tm = get("timeModified")
+    return {
+        "name": get("name"),
+        "size": get("size"),
+        "etag": get("etag"),
+        "md5": get("md5"),
+        "storage_tier": get("storageTier"),
+        "archival_state": get("archivalState"),
+        "time_created": datetime.fromisoformat(tc).isoformat() if tc else None,
+        "time_modified": datetime.fromisoformat(tm).isoformat() if tm else None,
+    }
+
+
+def _retry_after(e: ServiceError) -> Optional[float]:
+    """Seconds to wait according to the response's Retry-After header, if any."""
+    headers = getattr(e, "headers", None) or {}
+    value = next((v for k, v in headers.items() if k.lower() == "retry-after"), None)
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _call_with_retries(
+    func,
+    *args,
+    max_retries: int = 5,
+    base_delay: float = 0.5,
+    factor: float = 2.0,
+    limiter: Optional[AdaptiveRateLimiter] = None,
+    **kwargs,
+):
+    """Call SDK function with jittered exponential backoff on retryable ServiceError.
+
+    With a `limiter`, every attempt first takes a token from it and reports
+    success or throttling back, so all callers sharing it slow down together.
+    """
     attempt = 0
     while True:
+        if limiter:
+            limiter.acquire()
         try:
-            return func(*args, **kwargs)
+            result = func(*args, **kwargs)
         except ServiceError as e:
             if e.status in RETRYABLE_STATUS and attempt < max_retries:
-                delay = base_delay * (factor ** attempt)
+                retry_after = _retry_after(e)
+                if limiter and e.status == 429:
+                    limiter.on_throttle(retry_after)
+                # Full jitter keeps throttled callers from retrying in lockstep
+                delay = max(retry_after or 0.0, random.uniform(0, base_delay * (factor ** attempt)))
                 logger.warning(f"Retryable OCI error {e.status}; retrying in {delay:.2f}s (attempt {attempt+1}/{max_retries})")
                 time.sleep(delay)
                 attempt += 1
                 continue
             raise
+        if limiter:
+            limiter.on_success()
+        return result
+
+
+def iter_object_pages(
+    namespace: str,
+    bucket: str,
+    prefix: str,
+    region: str,
+    *,
+    limit: int = 1000,
+    max_retries: int = 5,
+    backoff_base: float = 0.5,
+    backoff_factor: float = 2.0,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    raw: bool = False,
+) -> Iterator[Tuple[list, Optional[str]]]:
+    """Yield (objects, next_start) for each page, next_start being None on the last.
+
+    Objects are SDK `ObjectSummary` models, or raw JSON dicts with `raw`;
+    `page_records` turns either into records.
+    """
+    object_client, _, _ = get_clients(region, raw=raw)
+    limiter = get_rate_limiter(region)
+    while True:
+        resp = _call_with_retries(
+            object_client.list_objects,
+            namespace,
+            bucket,
+            prefix=prefix or None,
+            start=start,
+            end=end,
+            limit=limit,
+            # Ask SDK to include all commonly-needed summary fields
+            fields=LIST_FIELDS,
+            retry_strategy=NO_SDK_RETRY,
+            max_retries=max_retries,
+            base_delay=backoff_base,
+            factor=backoff_factor,
+            limiter=limiter,
+        ).data
+        if raw:
+            objects = resp.get("objects") or []
+            start = resp.get("nextStartWith")
+        else:
+            objects = getattr(resp, "objects", None) or []
+            start = getattr(resp, "next_start_with", None)
+        yield objects, start
+        if not start:
+            break
+
+
+def page_records(objects: list, raw: bool = False) -> List[dict]:
+    """Records for a page returned by `iter_object_pages`."""
+    to_record = _record_from_json if raw else _record_from_model
+    return [to_record(obj) for obj in objects]
 
 
 def _iter_objects(
@@ -41,66 +206,233 @@ def _iter_objects(
     max_retries: int = 5,
     backoff_base: float = 0.5,
     backoff_factor: float = 2.0,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    on_page: Optional[Callable[[Optional[str]], None]] = None,
+    raw: bool = False,
 ) -> Iterator[dict]:
+    """Yield object summaries page by page.
+
+    `on_page` is called with the next page cursor (None once the listing is
+    exhausted) after all objects of a page have been yielded. With `raw` the
+    response JSON is turned straight into records, skipping SDK models.
+    """
+    to_record = _record_from_json if raw else _record_from_model
+    for objects, next_start in iter_object_pages(
+        namespace,
+        bucket,
+        prefix,
+        region,
+        limit=limit,
+        max_retries=max_retries,
+        backoff_base=backoff_base,
+        backoff_factor=backoff_factor,
+        start=start,
+        end=end,
+        raw=raw,
+    ):
+        for obj in objects:
+            yield to_record(obj)
+        if on_page:
+            on_page(next_start)
+
+
+# ListObjects pages read per bucket to discover prefixes; a large flat bucket
+# would otherwise be listed once in full just to find none
+DISCOVERY_MAX_PAGES = 10
+# Characters probed for start keys when prefixes do not split a bucket enough
+SAMPLE_PROBES = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+
+
+def _list_prefixes(
+    namespace: str,
+    bucket: str,
+    prefix: str,
+    region: str,
+    *,
+    max_pages: int = DISCOVERY_MAX_PAGES,
+    max_retries: int = 5,
+    backoff_base: float = 0.5,
+    backoff_factor: float = 2.0,
+) -> Tuple[List[str], int]:
+    """Immediate sub-prefixes of `prefix` (delimiter "/") in at most `max_pages` pages.
+
+    Returns the prefixes found and the number of pages read; when that is
+    `max_pages`, later prefixes may be missing.
+    """
     object_client, _, _ = get_clients(region)
+    limiter = get_rate_limiter(region)
+    found: List[str] = []
     start = None
-    while True:
+    pages = 0
+    while pages < max_pages:
         resp: ListObjects = _call_with_retries(
             object_client.list_objects,
             namespace,
             bucket,
             prefix=prefix or None,
+            delimiter="/",
             start=start,
-            limit=limit,
-            # Ask SDK to include all commonly-needed summary fields
-            fields="name,size,md5,timeCreated,timeModified,etag,storageTier,archivalState",
+            limit=1000,
+            fields="name",
+            retry_strategy=NO_SDK_RETRY,
             max_retries=max_retries,
             base_delay=backoff_base,
             factor=backoff_factor,
+            limiter=limiter,
         ).data
-        objs = getattr(resp, "objects", None) or []
-        # Debug: log what fields are present on the first object
-        # if objs:
-        #     first = objs[0]
-        #     present = [
-        #         k
-        #         for k in (
-        #             "name",
-        #             "size",
-        #             "etag",
-        #             "md5",
-        #             "time_created",
-        #             "time_modified",
-        #             "storage_tier",
-        #             "archival_state",
-        #         )
-        #         if hasattr(first, k)
-        #     ]
-        #     logger.debug(
-        #         f"list_objects: bucket={bucket} prefix={prefix!r} count={len(objs)} "
-        #         f"fields_present={present} next_start_with={getattr(resp, 'next_start_with', None)}"
-        #     )
-        # else:
-        #     logger.debug(
-        #         f"list_objects: bucket={bucket} prefix={prefix!r} count=0 next_start_with={getattr(resp, 'next_start_with', None)}"
-        #     )
-
-        for obj in objs:
-            tc = getattr(obj, "time_created", None)
-            tm = getattr(obj, "time_modified", None)
-            yield {
-                "name": getattr(obj, "name", None),
-                "size": getattr(obj, "size", None),
-                "etag": getattr(obj, "etag", None),
-                "md5": getattr(obj, "md5", None),
-                "storage_tier": getattr(obj, "storage_tier", None),
-                "archival_state": getattr(obj, "archival_state", None),
-                "time_created": tc.isoformat() if tc else None,
-                "time_modified": tm.isoformat() if tm else None,
-            }
+        pages += 1
+        found.extend(getattr(resp, "prefixes", None) or [])
         start = getattr(resp, "next_start_with", None)
         if not start:
+            return found, pages
+    return found, max_pages
+
+
+def _sample_start_keys(
+    namespace: str,
+    bucket: str,
+    region: str,
+    *,
+    probes: int,
+    max_retries: int = 5,
+    backoff_base: float = 0.5,
+    backoff_factor: float = 2.0,
+) -> List[str]:
+    """Keys found at up to `probes` points spread over the key space, one small request each.
+
+    Each probe lists a single key from a leading character on, so the keys
+    returned split the bucket by its actual first characters.
+    """
+    object_client, _, _ = get_clients(region)
+    limiter = get_rate_limiter(region)
+    step = max(1, len(SAMPLE_PROBES) // max(1, probes))
+    keys: List[str] = []
+    for probe in SAMPLE_PROBES[::step]:
+        resp: ListObjects = _call_with_retries(
+            object_client.list_objects,
+            namespace,
+            bucket,
+            start=probe,
+            limit=1,
+            fields="name",
+            retry_strategy=NO_SDK_RETRY,
+            max_retries=max_retries,
+            base_delay=backoff_base,
+            factor=backoff_factor,
+            limiter=limiter,
+        ).data
+        objects = getattr(resp, "objects", None) or []
+        if objects:
+            keys.append(objects[0].name)
+    return keys
+
+
+def split_ranges(boundaries: List[str], target: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Up to `target` contiguous (start, end) ranges split at evenly spaced `boundaries`.
+
+    Start is inclusive, end exclusive and None unbounded, so the ranges
+    together cover every key.
+    """
+    boundaries = sorted(set(boundaries))
+    if not boundaries or target <= 1:
+        return [(None, None)]
+    n = min(target, len(boundaries) + 1)
+    splits = [boundaries[math.ceil(i * len(boundaries) / n) - 1] for i in range(1, n)]
+    splits = sorted(set(splits))
+    edges: List[Optional[str]] = [None, *splits, None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def discover_shards(
+    namespace: str,
+    bucket: str,
+    region: str,
+    *,
+    target: int,
+    max_depth: int = 3,
+    max_pages: int = DISCOVERY_MAX_PAGES,
+    max_retries: int = 5,
+    backoff_base: float = 0.5,
+    backoff_factor: float = 2.0,
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Split a bucket's key space into up to `target` contiguous key ranges.
+
+    Prefixes discovered with delimiter "/" (descending up to `max_depth`
+    levels while there are fewer than `target`) are used as split points,
+    reading at most `max_pages` listing pages in all. When that yields too
+    few prefixes, or the budget ran out before every prefix was seen (e.g.
+    a large flat bucket), keys sampled across the key space are added as
+    split points. See `split_ranges` for the shape of the result.
+    """
+    retry = dict(max_retries=max_retries, backoff_base=backoff_base, backoff_factor=backoff_factor)
+    boundaries: List[str] = []
+    frontier = [""]
+    budget = max_pages
+    for _ in range(max_depth):
+        children: List[str] = []
+        for p in frontier:
+            if budget <= 0:
+                break
+            found, pages = _list_prefixes(namespace, bucket, p, region, max_pages=budget, **retry)
+            children.extend(found)
+            budget -= pages
+            if len(boundaries) + len(children) >= target:
+                break
+        if not children:
             break
+        boundaries.extend(children)
+        if len(boundaries) >= target or budget <= 0:
+            break
+        frontier = children
+
+    if target > 1 and (len(boundaries) < target - 1 or budget <= 0):
+        boundaries.extend(_sample_start_keys(namespace, bucket, region, probes=target * 2, **retry))
+
+    shards = split_ranges(boundaries, target)
+    logger.debug(
+        f"discover_shards: bucket={bucket} split points={len(set(boundaries))} "
+        f"pages={max_pages - budget} shards={len(shards)}"
+    )
+    return shards
+
+
+def pending_shards(units: List[Shard], checkpoint: Optional[Checkpoint]) -> List[Tuple[Shard, Optional[str]]]:
+    """(shard, start) pairs still to list, resuming each shard from its checkpoint."""
+    pending: List[Tuple[Shard, Optional[str]]] = []
+    for unit in units:
+        cursor, done = checkpoint.resume(unit) if checkpoint else (None, False)
+        if not done:
+            pending.append((unit, cursor or unit[1]))
+    return pending
+
+
+class OrderedCheckpoint:
+    """Save cursors of pages that are persisted out of order.
+
+    Pages of a shard are numbered from 0 as they are fetched. A cursor is
+    passed on to the wrapped checkpoint only once its page and every earlier
+    page of the same shard have been reported with `done`.
+    """
+
+    def __init__(self, checkpoint: Checkpoint) -> None:
+        self.checkpoint = checkpoint
+        self._next: dict = {}
+        self._finished: dict = {}
+        self._lock = threading.Lock()
+
+    def done(self, shard: Shard, seq: int, next_start: Optional[str]) -> None:
+        with self._lock:
+            finished = self._finished.setdefault(shard, {})
+            finished[seq] = next_start
+            expected = self._next.get(shard, 0)
+            if expected not in finished:
+                return
+            while expected in finished:
+                cursor = finished.pop(expected)
+                expected += 1
+            self._next[shard] = expected
+            self.checkpoint.save(shard, cursor, cursor is None)
 
 
 def list_objects(
@@ -109,72 +441,134 @@ def list_objects(
     region: str,
     prefixes: Optional[List[str]] = None,
     *,
-    limit: int = 1000,    
+    limit: int = 1000,
     max_retries: int = 5,
     backoff_base: float = 0.5,
     backoff_factor: float = 2.0,
     concurrency: int = 0,
+    auto_shard: bool = False,
+    shards_per_worker: int = 4,
+    shards: Optional[List[Tuple[Optional[str], Optional[str]]]] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    raw: bool = False,
 ) -> Iterable[dict]:
     """Stream objects under optional prefixes with pagination, retries.
 
     - Streams results (iterator) instead of returning a materialized list.
     - Adds exponential backoff for retryable errors.
     - Optional `concurrency` executes per-prefix scans in parallel threads.
+    - With `auto_shard` (and no explicit prefixes) the bucket is split into
+      key ranges by `discover_shards` and those are scanned concurrently;
+      an explicit `shards` plan of (start, end) ranges skips discovery.
+    - With `checkpoint`, each shard resumes from its saved cursor (finished
+      shards are skipped) and cursors are saved from the consuming thread,
+      only after every object before them has been yielded.
+    - With `raw`, pages are read as plain JSON instead of SDK models (see
+      `_iter_objects`); the records yielded are identical.
     """
     selected_prefixes = prefixes or [""]
+    units: List[Shard] = [(p, None, None) for p in selected_prefixes]
+
+    if shards:
+        units = [("", s, e) for s, e in shards]
+    elif auto_shard and not prefixes and concurrency and concurrency > 1:
+        discovered = discover_shards(
+            namespace,
+            bucket,
+            region,
+            target=concurrency * max(1, shards_per_worker),
+            max_retries=max_retries,
+            backoff_base=backoff_base,
+            backoff_factor=backoff_factor,
+        )
+        units = [("", s, e) for s, e in discovered]
+
+    # Resume each shard from its checkpoint, dropping the ones already finished
+    pending = pending_shards(units, checkpoint)
+
+    def scan(unit: Shard, start: Optional[str], on_page) -> Iterator[dict]:
+        return _iter_objects(
+            namespace,
+            bucket,
+            unit[0],
+            region,
+            limit=limit,
+            max_retries=max_retries,
+            backoff_base=backoff_base,
+            backoff_factor=backoff_factor,
+            start=start,
+            end=unit[2],
+            on_page=on_page,
+            raw=raw,
+        )
 
-    if concurrency and concurrency > 1 and len(selected_prefixes) > 1:
-        # Concurrent scan per prefix; stream results via a queue to avoid materializing.
+    def save(page_end: _PageEnd) -> None:
+        if checkpoint:
+            checkpoint.save(page_end.shard, page_end.next_start, page_end.next_start is None)
+
+    if concurrency and concurrency > 1 and len(pending) > 1:
+        # Concurrent scan per prefix/shard; stream results via a queue to avoid materializing.
         import queue
 
         def generator() -> Iterator[dict]:
             q: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=concurrency * 2)
             sentinel = object()
+            errors: List[BaseException] = []
+            # Set once the consumer is gone so workers never block on a full queue
+            stop = threading.Event()
+
+            def put(item) -> None:
+                while not stop.is_set():
+                    try:
+                        q.put(item, timeout=0.1)
+                        return
+                    except queue.Full:
+                        continue
+                raise _Cancelled()
 
-            def worker(pfx: str):
+            def worker(unit: Shard, start: Optional[str]):
                 try:
-                    for item in _iter_objects(
-                        namespace,
-                        bucket,
-                        pfx,
-                        region,
-                        limit=limit,                        
-                        max_retries=max_retries,
-                        backoff_base=backoff_base,
-                        backoff_factor=backoff_factor,
-                    ):
-                        q.put(item)
-                finally:
-                    q.put(sentinel)  # signal completion of this worker
+                    # Page ends travel through the queue behind their objects
+                    for item in scan(unit, start, lambda nxt: put(_PageEnd(unit, nxt))):
+                        put(item)
+                except _Cancelled:
+                    return
+                except BaseException as e:
+                    errors.append(e)
+                try:
+                    put(sentinel)  # signal completion of this worker
+                except _Cancelled:
+                    pass
 
             # Launch workers
             with ThreadPoolExecutor(max_workers=concurrency) as ex:
-                for p in selected_prefixes:
-                    ex.submit(worker, p)
-
-                completed = 0
-                total = len(selected_prefixes)
-                while completed < total:
-                    item = q.get()
-                    if item is sentinel:
-                        completed += 1
-                    else:
-                        yield item  # stream to caller
+                try:
+                    for unit, start in pending:
+                        ex.submit(worker, unit, start)
+
+                    completed = 0
+                    total = len(pending)
+                    while completed < total:
+                        item = q.get()
+                        if item is sentinel:
+                            completed += 1
+                        elif isinstance(item, _PageEnd):
+                            save(item)
+                        else:
+                            yield item  # stream to caller
+                finally:
+                    # Consumer stopped early (closed generator or error): release the workers
+                    stop.set()
+
+            # Surface shard failures so callers never mistake a partial listing for a complete one
+            if errors:
+                raise errors[0]
 
         return generator()
 
     # Sequential (streaming) over a single or multiple prefixes
     def generator_seq() -> Iterator[dict]:
-        for p in selected_prefixes:
-            yield from _iter_objects(
-                namespace,
-                bucket,
-                p,
-                region,
-                limit=limit,                
-                max_retries=max_retries,
-                backoff_base=backoff_base,
-                backoff_factor=backoff_factor,
-            )
+        for unit, start in pending:
+            yield from scan(unit, start, lambda nxt, unit=unit: save(_PageEnd(unit, nxt)))
 
     return generator_seq()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+from typing import AsyncIterator, List, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+import httpx
+from oci.exceptions import ServiceError
+
+from .auth import get_clients
+from .objects import LIST_FIELDS, RETRYABLE_STATUS, Checkpoint, Shard, _record_from_json, _retry_after, pending_shards
+from .ratelimit import get_rate_limiter
+from oci_object_discovery_service.utils.logger import logger
+
+
+default_max_in_flight = int(os.getenv("ASYNC_MAX_IN_FLIGHT", "512"))
+# Pages buffered between listing and the consumer (bounds memory per listing)
+default_page_queue_size = int(os.getenv("ASYNC_PAGE_QUEUE_SIZE", "16"))
+
+
+class _SignableRequest:
+    """The request attributes the OCI signer reads and writes."""
+
+    def __init__(self, method: str, url: str) -> None:
+        parts = urlsplit(url)
+        self.method = method
+        self.url = url
+        self.path_url = parts.path + (f"?{parts.query}" if parts.query else "")
+        self.headers: dict = {}
+        self.body = None
+
+
+class AsyncObjectLister:
+    """Asyncio counterpart of `objects._iter_objects`/`objects.list_objects`.
+
+    Requests are signed with the signer of the region's shared OCI clients
+    and sent over one pooled `httpx.AsyncClient`, so thousands of page
+    requests can be in flight across buckets and shards without a thread per
+    pagination chain. In-flight requests are capped by `max_in_flight`, go
+    through the region's shared `AdaptiveRateLimiter`, and are retried with
+    jittered backoff honouring Retry-After, as in the threaded path. Use as
+    an async context manager.
+    """
+
+    def __init__(
+        self,
+        region: str,
+        *,
+        max_in_flight: int = default_max_in_flight,
+        limit: int = 1000,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_factor: float = 2.0,
+    ) -> None:
+        object_client, _, _ = get_clients(region)
+        self._signer = object_client.base_client.signer
+        self._endpoint = object_client.base_client.update_endpoint_template_for_options().rstrip("/")
+        self._limiter = get_rate_limiter(region)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+        self.limit = limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_factor = backoff_factor
+
+    async def __aenter__(self) -> "AsyncObjectLister":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def _get(self, path: str, params: dict) -> dict:
+        query = urlencode({k: v for k, v in params.items() if v is not None}, quote_via=quote)
+        url = f"{self._endpoint}{path}?{query}"
+        attempt = 0
+        while True:
+            await self._limiter.acquire_async()
+            try:
+                async with self._slots:
+                    request = _SignableRequest("GET", url)
+                    self._signer(request)
+                    resp = await self._http.get(url, headers=request.headers)
+            except httpx.TransportError as e:
+                error: Exception = e
+                status = None
+                retry_after = None
+            else:
+                if resp.status_code < 300:
+                    self._limiter.on_success()
+                    return resp.json()
+                body = resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {}
+                error = ServiceError(resp.status_code, body.get("code"), resp.headers, body.get("message", resp.text))
+                status = resp.status_code
+                retry_after = _retry_after(error)
+                if status not in RETRYABLE_STATUS:
+                    raise error
+            if attempt >= self.max_retries:
+                raise error
+            if status == 429:
+                self._limiter.on_throttle(retry_after)
+            delay = max(retry_after or 0.0, random.uniform(0, self.backoff_base * (self.backoff_factor ** attempt)))
+            logger.warning(f"Retryable OCI error {status or error}; retrying in {delay:.2f}s (attempt {attempt+1}/{self.max_retries})")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def iter_pages(
+        self, namespace: str, bucket: str, shard: Shard, start: Optional[str] = None
+    ) -> AsyncIterator[Tuple[List[dict], Optional[str]]]:
+        """Yield (records, next_start) for each page of one shard."""
+        prefix, shard_start, end = shard
+        path = f"/n/{quote(namespace, safe='')}/b/{quote(bucket, safe='')}/o"
+        start = start or shard_start
+        while True:
+            data = await self._get(
+                path,
+                {"prefix": prefix or None, "start": start, "end": end, "limit": self.limit, "fields": LIST_FIELDS},
+            )
+            start = data.get("nextStartWith")
+            yield [_record_from_json(o) for o in data.get("objects") or []], start
+            if not start:
+                break
+
+    async def pages(
+        self,
+        namespace: str,
+        bucket: str,
+        shards: Optional[List[Tuple[Optional[str], Optional[str]]]] = None,
+        *,
+        checkpoint: Optional[Checkpoint] = None,
+        queue_size: int = default_page_queue_size,
+    ) -> AsyncIterator[List[dict]]:
+        """Stream pages of records for a bucket, listing all shards concurrently.
+
+        Same resume/checkpoint contract as `objects.list_objects`: a page's
+        cursor is saved only after the consumer has come back for the next
+        page, i.e. after it has handled every record before that cursor.
+        """
+        units: List[Shard] = [("", s, e) for s, e in shards] if shards else [("", None, None)]
+        pending = pending_shards(units, checkpoint)
+
+        q: "asyncio.Queue" = asyncio.Queue(maxsize=queue_size)
+        finished = object()
+        errors: List[Exception] = []
+
+        async def produce(unit: Shard, start: Optional[str]) -> None:
+            try:
+                async for records, next_start in self.iter_pages(namespace, bucket, unit, start):
+                    await q.put((unit, records, next_start))
+            except Exception as e:
+                errors.append(e)
+            await q.put(finished)
+
+        tasks = [asyncio.create_task(produce(unit, start)) for unit, start in pending]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await q.get()
+                if item is finished:
+                    remaining -= 1
+                    continue
+                unit, records, next_start = item
+                if records:
+                    yield records
+                if checkpoint:
+                    await asyncio.to_thread(checkpoint.save, unit, next_start, next_start is None)
+            # Surface shard failures so callers never mistake a partial listing for a complete one
+            if errors:
+                raise errors[0]
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
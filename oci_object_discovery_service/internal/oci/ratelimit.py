@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from oci_object_discovery_service.utils.logger import logger
+
+
+default_initial_rate = float(os.getenv("OCI_RATE_LIMIT_INITIAL", "50"))
+default_min_rate = float(os.getenv("OCI_RATE_LIMIT_MIN", "1"))
+default_max_rate = float(os.getenv("OCI_RATE_LIMIT_MAX", "2000"))
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate adapts to throttling (AIMD).
+
+    Every successful call adds about `increase` requests/s per second of
+    traffic; a throttled call multiplies the rate by `decrease`, at most once
+    per `cooldown` seconds so a burst of 429s from concurrent callers counts
+    as one congestion signal. A server `Retry-After` hint pauses every caller
+    until it has passed. Safe to share between threads and event loops.
+    """
+
+    def __init__(
+        self,
+        rate: float = default_initial_rate,
+        *,
+        min_rate: float = default_min_rate,
+        max_rate: float = default_max_rate,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+    ) -> None:
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._rate = min(max(rate, min_rate), max_rate)
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Current allowed requests per second."""
+        return self._rate
+
+    def acquire(self) -> None:
+        """Block until the caller may send one request."""
+        while True:
+            wait = self._reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Asyncio counterpart of `acquire`; waits without blocking the loop."""
+        while True:
+            wait = self._reserve()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def _reserve(self) -> float:
+        """Take a token and return 0, or return how long to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            # Refill, allowing at most one second worth of burst
+            self._tokens = min(max(self._rate, 1.0), self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self._rate
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._rate = min(self.max_rate, self._rate + self.increase / self._rate)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._rate = max(self.min_rate, self._rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            rate = self._rate
+        logger.info(f"[ratelimit] Throttled; reducing request rate to {rate:.1f}/s")
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(region: str) -> AdaptiveRateLimiter:
+    """Return the limiter shared by every caller targeting `region`."""
+    limiter = _limiters.get(region)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(region, AdaptiveRateLimiter())
+    return limiter
+
+
+def current_rates() -> Dict[str, float]:
+    """Current request rate per region, for logging and metrics."""
+    return {region: limiter.rate for region, limiter in _limiters.items()}
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from oci_object_discovery_service.utils.logger import logger
+
+
+default_queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))
+# Seconds between queue depth reports while a pipeline runs (0 disables)
+default_report_interval = float(os.getenv("PIPELINE_REPORT_INTERVAL", "30"))
+
+# How often blocked queue operations wake up to check for cancellation
+_POLL = 0.1
+_END = object()
+
+
+class PipelineCancelled(Exception):
+    """Raised by `Pipeline.run` when the pipeline was stopped from outside."""
+
+
+class _Stage:
+    def __init__(self, name: str, func: Callable[[Any], Optional[Iterable[Any]]], workers: int, queue_size: int) -> None:
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        # Items waiting for this stage
+        self.inbox: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self.active = self.workers
+        self.items = 0
+        self.busy = 0.0
+
+
+class Pipeline:
+    """Run items through stages on threads joined by bounded queues.
+
+    Each stage calls `func(item)` on `workers` threads; whatever it returns
+    (an iterable, possibly a generator, or None) is passed item by item to
+    the next stage. Items reach a multi-worker stage in order but may leave
+    it out of order. Bounded queues give backpressure: a slow stage fills the
+    queue in front of it and stalls the stages upstream, so memory stays
+    bounded and `depths()` shows where work piles up. The first error in any
+    stage, or `stop()`, cancels every stage; no thread stays blocked on a
+    queue once `run` returns.
+    """
+
+    def __init__(self, name: str, *, report_interval: float = default_report_interval) -> None:
+        self.name = name
+        self.report_interval = report_interval
+        self._stages: List[_Stage] = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._errors: List[BaseException] = []
+
+    def stage(
+        self,
+        name: str,
+        func: Callable[[Any], Optional[Iterable[Any]]],
+        *,
+        workers: int = 1,
+        queue_size: int = default_queue_size,
+    ) -> "Pipeline":
+        self._stages.append(_Stage(name, func, workers, queue_size))
+        return self
+
+    def stop(self) -> None:
+        """Cancel the pipeline; `run` raises `PipelineCancelled` unless a stage failed."""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def depths(self) -> Dict[str, str]:
+        """Items queued in front of each stage, as "queued/capacity"."""
+        return {s.name: f"{s.inbox.qsize()}/{s.inbox.maxsize}" for s in self._stages}
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Items processed and seconds spent working, per stage."""
+        return {s.name: {"items": s.items, "busy": round(s.busy, 2)} for s in self._stages}
+
+    def run(self, source: Iterable[Any]) -> None:
+        """Feed `source` through the stages and wait until everything is processed."""
+        if not self._stages:
+            raise ValueError("Pipeline has no stages")
+        threads = [threading.Thread(target=self._feed, args=(source,), name=f"{self.name}-feed", daemon=True)]
+        for index, stage in enumerate(self._stages):
+            nxt = self._stages[index + 1] if index + 1 < len(self._stages) else None
+            threads += [
+                threading.Thread(target=self._work, args=(stage, nxt), name=f"{self.name}-{stage.name}-{i}", daemon=True)
+                for i in range(stage.workers)
+            ]
+        for t in threads:
+            t.start()
+        try:
+            next_report = time.monotonic() + self.report_interval
+            for t in threads:
+                while t.is_alive():
+                    t.join(_POLL)
+                    if self.report_interval and time.monotonic() >= next_report:
+                        logger.info(f"[pipeline {self.name}] queue depth {self.depths()}")
+                        next_report = time.monotonic() + self.report_interval
+        except BaseException:
+            # e.g. KeyboardInterrupt: make every stage give up before re-raising
+            self.stop()
+            raise
+        logger.debug(f"[pipeline {self.name}] finished: {self.stats()}")
+        if self._errors:
+            raise self._errors[0]
+        if self.stopped:
+            raise PipelineCancelled(self.name)
+
+    def _fail(self, error: BaseException) -> None:
+        with self._lock:
+            self._errors.append(error)
+        self._stop.set()
+
+    def _put(self, q: "queue.Queue[Any]", item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: "queue.Queue[Any]") -> Any:
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _feed(self, source: Iterable[Any]) -> None:
+        first = self._stages[0]
+        try:
+            for item in source:
+                if not self._put(first.inbox, item):
+                    return
+        except BaseException as e:
+            self._fail(e)
+            return
+        for _ in range(first.workers):
+            self._put(first.inbox, _END)
+
+    def _work(self, stage: _Stage, nxt: Optional[_Stage]) -> None:
+        try:
+            while True:
+                item = self._get(stage.inbox)
+                if item is _END:
+                    break
+                started = time.monotonic()
+                blocked = 0.0
+                out = stage.func(item)
+                # The last stage's return value is discarded
+                if nxt is not None:
+                    for result in out or ():
+                        waited = time.monotonic()
+                        if not self._put(nxt.inbox, result):
+                            break
+                        blocked += time.monotonic() - waited
+                with self._lock:
+                    stage.items += 1
+                    # Time spent waiting on a full downstream queue is not work
+                    stage.busy += time.monotonic() - started - blocked
+        except BaseException as e:
+            logger.error(f"[pipeline {self.name}] Stage {stage.name} failed: {e}")
+            self._fail(e)
+        finally:
+            with self._lock:
+                stage.active -= 1
+                last = stage.active == 0
+            # The last worker of a stage tells the next stage its input is complete
+            if last and nxt is not None:
+                for _ in range(nxt.workers):
+                    self._put(nxt.inbox, _END)
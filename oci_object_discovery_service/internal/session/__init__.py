@@ -1,8 +1,29 @@
+from datetime import datetime
+from typing import Optional
+
+from oci_object_discovery_service.internal import notify
 from oci_object_discovery_service.internal.db.repository import (
     create_session as _create_session,
+    find_active_session,
+    job_key,
+    last_completed_at as _last_completed_at,
 )
 
+__all__ = ["create_session", "has_active_session", "job_key", "last_completed_at"]
+
 
-def create_session(job: dict) -> bool:
-    _create_session(job)
+def create_session(job: dict, priority: Optional[int] = None) -> bool:
+    """Queue a session for `job`; False if it was merged into a pending one."""
+    session_id = _create_session(job, priority)
+    if session_id is None:
+        return False
+    notify.publish(session_id)
     return True
+
+
+def has_active_session(job: dict) -> bool:
+    return find_active_session(job) is not None
+
+
+def last_completed_at(job: dict) -> Optional[datetime]:
+    return _last_completed_at(job)
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from bson import Decimal128, ObjectId
+
+
+def _default(value: Any) -> Any:
+    """BSON types orjson does not encode itself."""
+    if isinstance(value, (ObjectId, Decimal128)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a response in one pass; ObjectId and Decimal128 become strings, datetimes ISO 8601."""
+    # orjson encodes datetimes itself and only calls `_default` for other types
+    return orjson.dumps(value, default=_default)
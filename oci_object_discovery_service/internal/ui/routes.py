@@ -1,74 +1,315 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
+import base64
+import binascii
+import functools
+import hashlib
+import inspect
+import json
 import os
-import re
-from bson import ObjectId
+import time
+from typing import Any, NamedTuple
+from oci_object_discovery_service.internal.cache import get_cache
+from oci_object_discovery_service.internal.db.schema import API_PROJECTION, from_stored, projection
+from oci_object_discovery_service.internal.db.search import DEFAULT_SEARCH_MODE, SEARCH_MODES, search_query
+from oci_object_discovery_service.internal.ui.encoding import dumps
 
 load_dotenv()
 database_uri = os.getenv("MONGO_URI", "mongodb://mongo:27017")
 database_name = os.getenv("DATABASE_NAME", "ods")
 buckets_collection_name = os.getenv("BUCKETS_COLLECTION", "buckets")
 objects_collection_name = os.getenv("OBJECTS_COLLECTION", "objects")
+bucket_stats_collection_name = os.getenv("BUCKET_STATS_COLLECTION", "bucket_stats")
+object_partitions_collection_name = os.getenv("OBJECT_PARTITIONS_COLLECTION", "object_partitions")
+catalogue_state_collection_name = os.getenv("CATALOGUE_STATE_COLLECTION", "catalogue_state")
+# How long the catalogue generation is trusted before it is read again
+cache_generation_poll_seconds = float(os.getenv("CACHE_GENERATION_POLL_SECONDS", "1"))
+# Exact counts for filtered listings are reused for this many seconds
+count_cache_seconds = float(os.getenv("OBJECTS_COUNT_CACHE_SECONDS", "60"))
+count_cache_size = 256
 
 router = APIRouter()
 client = AsyncIOMotorClient(database_uri)
 db = client[database_name]
 objects_collection = db[objects_collection_name]
 buckets_collection = db[buckets_collection_name]
+bucket_stats_collection = db[bucket_stats_collection_name]
+object_partitions_collection = db[object_partitions_collection_name]
+catalogue_state_collection = db[catalogue_state_collection_name]
 
 
-def serialize_doc(doc):
-    """Recursively convert ObjectId to str in a MongoDB document."""
-    if isinstance(doc, list):
-        return [serialize_doc(d) for d in doc]
-    if isinstance(doc, dict):
-        return {k: serialize_doc(v) for k, v in doc.items()}
-    if isinstance(doc, ObjectId):
-        return str(doc)
-    return doc
+def parse_fields(fields: str | None) -> tuple[list[str] | None, dict]:
+    """Requested API fields (comma separated) and the Mongo projection serving them."""
+    if not fields:
+        return None, API_PROJECTION
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    try:
+        return names, projection(names)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+_generation = {"value": 0, "read_at": float("-inf")}
+
+
+async def catalogue_generation() -> int:
+    """Counter bumped whenever a scan session finishes (see repository)."""
+    now = time.monotonic()
+    if now - _generation["read_at"] >= cache_generation_poll_seconds:
+        doc = await catalogue_state_collection.find_one({"_id": "generation"}, {"value": 1})
+        _generation["value"] = (doc or {}).get("value", 0)
+        _generation["read_at"] = now
+    return _generation["value"]
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def cached_response(request: Request, build) -> Response:
+    """Serve a JSON response from the cache, or a 304 when the client's copy is current.
+
+    Responses only change when a scan finishes, so cache entries and ETags
+    are keyed on the catalogue generation together with the request.
+    """
+    generation = await catalogue_generation()
+    params = sorted(request.query_params.multi_items())
+    digest = hashlib.sha1(f"{request.url.path}?{params}".encode()).hexdigest()[:20]
+    etag = f'"{generation}-{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    cache = get_cache()
+    key = f"{generation}:{digest}"
+    body = await cache.get(key) if cache else None
+    if body is None:
+        body = dumps(await build())
+        if cache:
+            await cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached(route):
+    """Serve `route` through `cached_response`; FastAPI still sees its own parameters."""
+    signature = inspect.signature(route)
+    request_param = inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+
+    @functools.wraps(route)
+    async def wrapper(*args, request: Request, **kwargs):
+        return await cached_response(request, lambda: route(*args, **kwargs))
+
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), request_param])
+    return wrapper
+
+
+class ObjectSource(NamedTuple):
+    partition: str
+    collection: Any
+    # Buckets of the main collection already moved to a partition, not yet deleted
+    moved: tuple[str, ...] = ()
+
+    def query(self, query: dict) -> dict:
+        """`query` restricted to the objects this source still owns."""
+        if not self.moved:
+            return query
+        return {"$and": [query, {"bucket": {"$nin": list(self.moved)}}]}
+
+
+async def object_sources() -> list[ObjectSource]:
+    """Collections holding objects, in listing order.
+
+    The main collection ("") comes first, then namespaces whose full
+    refreshes swapped in a collection of their own.
+    """
+    partitions = await object_partitions_collection.find(
+        {}, {"namespace": 1, "collection": 1, "moved_buckets": 1}
+    ).to_list(length=None)
+    moved = tuple(m["bucket"] for p in partitions for m in p.get("moved_buckets") or ())
+    sources = [ObjectSource("", objects_collection, moved)]
+    sources += sorted(ObjectSource(p["namespace"], db[p["collection"]]) for p in partitions)
+    return sources
+
+
+def encode_cursor(partition: str, doc: dict) -> str:
+    """Opaque token pointing just after `doc` (partition, then the page order)."""
+    raw = json.dumps([partition, doc["bucket"], doc["name"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[str, str, str]:
+    try:
+        partition, bucket, name = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return partition, bucket, name
+
+
+def page_order(bucket: str | None, searching: bool) -> list[tuple[str, int]]:
+    """
+    Sort of a page, matching an index so each page reads only its own entries:
+    (bucket, name) for listings, and (name_lc, bucket, name) for searches,
+    which filter on name_lc.
+    """
+    order = [("name_lc", 1), ("bucket", 1), ("name", 1)] if searching else [("bucket", 1), ("name", 1)]
+    # With a bucket filter the (bucket, ...) variant of the index is used
+    return [key for key in order if not (bucket and key[0] == "bucket")]
+
+
+def after_cursor(last_bucket: str, last_name: str, order: list[tuple[str, int]]) -> dict:
+    """Filter for documents after the cursor in `order` (see page_order)."""
+    last = {"bucket": last_bucket, "name": last_name, "name_lc": last_name.lower()}
+    return {
+        "$or": [
+            {**{f: last[f] for f, _ in order[:i]}, field: {"$gt": last[field]}}
+            for i, (field, _) in enumerate(order)
+        ]
+    }
+
+
+_count_cache: dict[str, tuple[float, int]] = {}
+
+
+async def cached_count(collection, query: dict) -> int:
+    key = f"{collection.name}:{query!r}"
+    now = time.monotonic()
+    hit = _count_cache.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
+    total = await collection.count_documents(query)
+    if len(_count_cache) >= count_cache_size:
+        _count_cache.clear()
+    _count_cache[key] = (now + count_cache_seconds, total)
+    return total
+
+
+async def count_objects(sources: list, query: dict, bucket: str | None, total: str) -> tuple[int | None, bool]:
+    """Total for a listing as (count, exact); the estimate is None when there is none cheap."""
+    if total == "exact":
+        return sum([await cached_count(s.collection, s.query(query)) for s in sources]), True
+    if not query:
+        return sum([await s.collection.estimated_document_count() for s in sources]), False
+    if bucket and list(query) == ["bucket"]:
+        # Listings filter on the bucket name, which several namespaces may share
+        stats = await bucket_stats_collection.find({"bucket": bucket}, {"objects": 1}).to_list(length=None)
+        return (sum(s.get("objects", 0) for s in stats) if stats else None), False
+    return None, False
 
 
 @router.get("/objects")
+@cached
 async def list_objects(
     bucket: str | None = Query(default=None),
     q: str | None = Query(default=None),
-    skip: int = Query(default=0, ge=0),
+    mode: str = Query(default=DEFAULT_SEARCH_MODE, pattern="^(" + "|".join(SEARCH_MODES) + ")$"),
+    cursor: str | None = Query(default=None),
     limit: int = Query(default=10, ge=1, le=1000),
+    total: str = Query(default="estimate", pattern="^(none|estimate|exact)$"),
+    fields: str | None = Query(default=None),
 ):
     """
     List objects with optional bucket filter and keyword search.
-    Pagination via skip/limit. Returns total for client-side pagination if desired.
+    `mode` is "prefix", "segment" (whole path segments) or "substring"; the
+    default is "substring" with SEARCH_NGRAMS and "prefix" without, as a
+    substring search then scans the whole name index.
+    Pagination is keyset-based on (bucket, name), or on (name_lc, bucket,
+    name) with `q`: pass the returned `next` token as `cursor` (with the same
+    `bucket` and `q`) to get the following page; every page costs the same.
+    `total` is "estimate" (default: collection or bucket stats, null when a
+    search is applied), "exact" (counted, cached briefly) or "none".
+    `fields` (e.g. "name,data.size") returns only those fields and fetches
+    only them from Mongo.
     """
     query: dict = {}
     if bucket:
         query["bucket"] = bucket
-    if q and q.strip():
-        query["name"] = {"$regex": re.escape(q.strip()), "$options": "i"}
+    searching = bool(q and q.strip())
+    if searching:
+        query.update(search_query(q, mode))
+    order = page_order(bucket, searching)
 
-    total = await objects_collection.count_documents(query)
-    cursor = objects_collection.find(query).skip(skip).limit(limit)
-    results = await cursor.to_list(length=limit)
+    names, fetch = parse_fields(fields)
+    sources = await object_sources()
+    start = decode_cursor(cursor) if cursor else None
+    results: list = []
+    for source in sources:
+        partition = source.partition
+        page_query = query
+        if start is not None:
+            if partition < start[0]:
+                continue
+            if partition == start[0]:
+                page_query = {"$and": [query, after_cursor(start[1], start[2], order)]}
+        want = limit + 1 - len(results)
+        found = source.collection.find(source.query(page_query), fetch).sort(order).limit(want)
+        results += [(partition, d) for d in await found.to_list(length=want)]
+        if len(results) > limit:
+            break
+    has_more = len(results) > limit
+    results = results[:limit]
+
+    count, exact = (None, False) if total == "none" else await count_objects(sources, query, bucket, total)
     return {
-        "results": serialize_doc(results),
-        "total": total,
-        "skip": skip,
+        "results": [from_stored(d, names) for _, d in results],
+        "next": encode_cursor(*results[-1]) if has_more else None,
         "limit": limit,
-        "has_more": skip + len(results) < total,
+        "has_more": has_more,
+        "total": count,
+        "total_exact": exact,
     }
 
 
 @router.get("/buckets")
+@cached
 async def list_buckets():
     results = await buckets_collection.find().to_list(length=100)
-    return {"results": serialize_doc(results)}
+    return {"results": results}
+
+
+@router.get("/stats")
+@cached
+async def get_stats():
+    """
+    Object count and bytes, in total and per storage tier and archival state.
+    Read from per-bucket stats kept by the scanner, so the cost grows with the
+    number of buckets rather than objects.
+    """
+    buckets = []
+    totals: dict = {"objects": 0, "bytes": 0, "storage_tiers": {}, "archival_states": {}}
+    async for doc in bucket_stats_collection.find({"scan_id": {"$exists": True}}, {"scan": 0}):
+        buckets.append(doc)
+        totals["objects"] += doc.get("objects", 0)
+        totals["bytes"] += doc.get("bytes", 0)
+        for group in ("storage_tiers", "archival_states"):
+            for key, counts in doc.get(group, {}).items():
+                agg = totals[group].setdefault(key, {"objects": 0, "bytes": 0})
+                agg["objects"] += counts.get("objects", 0)
+                agg["bytes"] += counts.get("bytes", 0)
+    return {
+        "bucket_count": await buckets_collection.estimated_document_count(),
+        "object_count": totals["objects"],
+        "total_bytes": totals["bytes"],
+        "storage_tiers": totals["storage_tiers"],
+        "archival_states": totals["archival_states"],
+        "results": buckets,
+    }
 
 
 @router.get("/search")
-async def search_objects(q: str = Query(..., min_length=1)):
-    regex = re.escape(q)  # prevent regex injection
-    cursor = objects_collection.find(
-        {"name": {"$regex": regex, "$options": "i"}}
-    ).limit(50)
-    results = await cursor.to_list(length=50)
-    return {"results": serialize_doc(results)}
+@cached
+async def search_objects(
+    q: str = Query(..., min_length=1),
+    mode: str = Query(default=DEFAULT_SEARCH_MODE, pattern="^(" + "|".join(SEARCH_MODES) + ")$"),
+    fields: str | None = Query(default=None),
+):
+    names, fetch = parse_fields(fields)
+    results: list = []
+    for source in await object_sources():
+        cursor = source.collection.find(source.query(search_query(q, mode)), fetch).limit(50 - len(results))
+        results += await cursor.to_list(length=50 - len(results))
+        if len(results) >= 50:
+            break
+    return {"results": [from_stored(d, names) for d in results]}
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+# Ensure project root is on sys.path when running from tests/
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from oci_object_discovery_service.internal.db import schema
+from oci_object_discovery_service.internal.ui.encoding import dumps
+
+
+def make_page(page_size: int) -> list[dict]:
+    """A page of stored object documents as Mongo returns them."""
+    base = datetime(2024, 1, 1)
+    scan_id = ObjectId()
+    docs = []
+    for i in range(page_size):
+        ts = base + timedelta(seconds=i)
+        record = {
+            "name": f"data/2024/01/01/part-{i:08d}.parquet",
+            "size": 1024 * (i + 1),
+            "etag": f"etag-{i:08d}",
+            "md5": "1B2M2Y8AsgTpgAmY7PhCfg==",
+            "storage_tier": "Standard",
+            "time_created": ts,
+            "time_modified": ts,
+        }
+        doc = schema.to_stored("bench", record, scan_id=scan_id, updated_at=ts)
+        docs.append({"_id": ObjectId(), **doc})
+    return docs
+
+
+def project(docs: list[dict], fields: list[str]) -> list[dict]:
+    """What Mongo returns for `schema.projection(fields)`."""
+    keep = {k for k, v in schema.projection(fields).items() if v}
+    return [{k: v for k, v in d.items() if k in keep} for d in docs]
+
+
+def serialize_doc(doc):
+    """The recursive walk responses used to go through."""
+    if isinstance(doc, list):
+        return [serialize_doc(d) for d in doc]
+    if isinstance(doc, dict):
+        return {k: serialize_doc(v) for k, v in doc.items()}
+    if isinstance(doc, ObjectId):
+        return str(doc)
+    return doc
+
+
+def previous_path(docs: list[dict]) -> bytes:
+    body = {"results": serialize_doc([schema.from_stored(d) for d in docs])}
+    return json.dumps(jsonable_encoder(body)).encode()
+
+
+def fast_path(docs: list[dict]) -> bytes:
+    return dumps({"results": [schema.from_stored(d) for d in docs]})
+
+
+def run(name: str, func, docs: list[dict], pages: int, baseline: float | None = None) -> float:
+    func(docs)
+    start = time.perf_counter()
+    for _ in range(pages):
+        size = len(func(docs))
+    per_page = (time.perf_counter() - start) / pages * 1000
+    speedup = f"  ({baseline / per_page:.1f}x)" if baseline else ""
+    print(f"{name:<28} {per_page:7.2f} ms/page  {size:>8} bytes{speedup}")
+    return per_page
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare API response encoding paths for object pages (offline)")
+    parser.add_argument("--pages", type=int, default=50, help="Number of pages to encode per path")
+    parser.add_argument("--page-size", type=int, default=1000, help="Objects per page")
+    parser.add_argument("--fields", default="name,data.size", help="Projection for the fields= run")
+    args = parser.parse_args()
+
+    docs = make_page(args.page_size)
+    fields = args.fields.split(",")
+    previous = run("serialize_doc", previous_path, docs, args.pages)
+    run("dumps", fast_path, docs, args.pages, previous)
+    run(f"dumps fields={args.fields}", lambda d: dumps({"results": [schema.from_stored(x, fields) for x in d]}),
+        project(docs, fields), args.pages, previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from cryptography.hazmat.primitives.asymmetric import rsa
+from oci.auth.signers import SecurityTokenSigner
+from oci.object_storage import ObjectStorageClient
+
+# Ensure project root is on sys.path when running from tests/
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from oci_object_discovery_service.internal.db.models import ObjectDoc
+from oci_object_discovery_service.internal.db.repository import object_fields
+from oci_object_discovery_service.internal.oci.objects import _record_from_json, _record_from_model
+
+
+def make_page(page_size: int) -> bytes:
+    """A ListObjects response body as returned by the API."""
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    objects = []
+    for i in range(page_size):
+        ts = (base + timedelta(seconds=i)).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        objects.append(
+            {
+                "name": f"data/2024/01/01/part-{i:08d}.parquet",
+                "size": 1024 * (i + 1),
+                "md5": "1B2M2Y8AsgTpgAmY7PhCfg==",
+                "timeCreated": ts,
+                "timeModified": ts,
+                "etag": f"etag-{i:08d}",
+                "storageTier": "Standard",
+                "archivalState": None,
+            }
+        )
+    return json.dumps({"objects": objects, "prefixes": [], "nextStartWith": "data/2025/"}).encode()
+
+
+def make_client(raw: bool) -> ObjectStorageClient:
+    # Offline client: only used for response deserialization, never sends requests
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    signer = SecurityTokenSigner("bench", key)
+    return ObjectStorageClient({"region": "us-ashburn-1"}, signer=signer, skip_deserialization=raw)
+
+
+def sdk_path(client: ObjectStorageClient, body: bytes, scan_id, now) -> int:
+    resp = client.base_client.deserialize_response_data(body, "ListObjects")
+    count = 0
+    for obj in resp.objects:
+        record = _record_from_model(obj)
+        ObjectDoc(bucket="bench", name=record["name"], data=record, updated_at=now, scan_id=scan_id).to_mongo()
+        count += 1
+    return count
+
+
+def fast_path(client: ObjectStorageClient, body: bytes, scan_id, now) -> int:
+    resp = client.base_client.deserialize_response_data(body, "ListObjects")
+    count = 0
+    for obj in resp["objects"]:
+        object_fields("bench", _record_from_json(obj), scan_id=scan_id, updated_at=now)
+        count += 1
+    return count
+
+
+def run(name: str, func, client, body: bytes, pages: int) -> float:
+    scan_id = ObjectId()
+    now = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    total = 0
+    for _ in range(pages):
+        total += func(client, body, scan_id, now)
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed
+    print(f"{name:<10} {total} objects in {elapsed:.2f}s -> {rate:,.0f} objects/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare SDK-model and raw-JSON object listing paths (offline)")
+    parser.add_argument("--pages", type=int, default=50, help="Number of pages to process per path")
+    parser.add_argument("--page-size", type=int, default=1000, help="Objects per page")
+    args = parser.parse_args()
+
+    body = make_page(args.page_size)
+    sdk = run("sdk", sdk_path, make_client(False), body, args.pages)
+    fast = run("fast-path", fast_path, make_client(True), body, args.pages)
+    print(f"speedup    {fast / sdk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Unit test setup.
+
+Importing `internal.db` connects to MongoDB and creates indexes, and the API
+routes connect through motor at import, so the tests run against mongomock
+instead of a server.
+"""
+
+import asyncio
+
+import mongomock
+import mongomock_motor
+import motor.motor_asyncio
+import pymongo
+import pytest
+
+pymongo.MongoClient = mongomock.MongoClient
+motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+
+
+@pytest.fixture
+def mongo():
+    """The worker's database, emptied after the test; indexes created at import are kept."""
+    from oci_object_discovery_service.internal.db import db
+
+    existing = set(db.list_collection_names())
+    yield db
+    for name in db.list_collection_names():
+        if name in existing:
+            db[name].delete_many({})
+        else:
+            db.drop_collection(name)
+
+
+@pytest.fixture
+def api_db():
+    """The API routes' database (a client of its own), dropped after the test.
+
+    Its methods are coroutines: `asyncio.run(api_db.objects.insert_many(...))`.
+    """
+    from oci_object_discovery_service.internal.ui import routes
+
+    yield routes.db
+    for name in asyncio.run(routes.db.list_collection_names()):
+        asyncio.run(routes.db.drop_collection(name))
+
+
+@pytest.fixture
+def api(api_db, monkeypatch):
+    """HTTP client of the UI and export routes, without the response cache."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from oci_object_discovery_service.internal.export import router as export_router
+    from oci_object_discovery_service.internal.ui import routes
+
+    monkeypatch.setattr(routes, "get_cache", lambda: None)
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api/ui")
+    app.include_router(export_router, prefix="/api/v1")
+    with TestClient(app) as client:
+        yield client
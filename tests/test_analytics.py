@@ -0,0 +1,66 @@
+from oci_object_discovery_service.internal.db import repository
+from oci_object_discovery_service.internal.db.schema import to_stored
+
+# Objects without a modification time: mongomock cannot subtract naive
+# stored datetimes from the aware time the pipeline measures ages against
+
+
+def row(mongo, bucket, namespace):
+    return mongo.object_analytics.find_one({"namespace": namespace, "bucket": bucket})
+
+
+def test_same_bucket_name_in_partition_and_main_collection(mongo):
+    mongo.buckets.insert_many([{"name": "backups", "namespace": "ns1"}, {"name": "backups", "namespace": "ns2"}])
+    mongo.object_partitions.insert_one({"namespace": "ns1", "collection": "objects.ns1"})
+    mongo["objects.ns1"].insert_one(to_stored("backups", {"name": "a", "size": 10}))
+    mongo.objects.insert_many([to_stored("backups", {"name": "b", "size": 5}), to_stored("backups", {"name": "c", "size": 5})])
+
+    assert repository.refresh_bucket_analytics("backups", "ns1")
+    assert repository.refresh_bucket_analytics("backups", "ns2")
+
+    assert (row(mongo, "backups", "ns1")["objects"], row(mongo, "backups", "ns1")["bytes"]) == (1, 10)
+    assert (row(mongo, "backups", "ns2")["objects"], row(mongo, "backups", "ns2")["bytes"]) == (2, 10)
+
+
+def test_name_shared_in_main_collection_is_aggregated_once(mongo):
+    mongo.buckets.insert_many([{"name": "backups", "namespace": "ns1"}, {"name": "backups", "namespace": "ns2"}])
+    mongo.objects.insert_many([to_stored("backups", {"name": "a", "size": 1}), to_stored("backups", {"name": "b", "size": 2})])
+
+    repository.refresh_bucket_analytics("backups", "ns1")
+    repository.refresh_bucket_analytics("backups", "ns2")
+    assert mongo.object_analytics.count_documents({}) == 1
+    assert row(mongo, "backups", None)["objects"] == 2
+
+    # Once the name is no longer shared, the namespace gets its own row
+    mongo.buckets.delete_one({"namespace": "ns2"})
+    repository.refresh_bucket_analytics("backups", "ns1")
+    assert [d["namespace"] for d in mongo.object_analytics.find()] == ["ns1"]
+
+
+def test_scans_reaggregate_at_most_once_per_interval(mongo):
+    mongo.buckets.insert_one({"name": "logs", "namespace": "ns1"})
+    mongo.objects.insert_one(to_stored("logs", {"name": "a", "size": 1}))
+
+    assert repository.refresh_bucket_analytics("logs", "ns1", min_interval=3600)
+    mongo.objects.insert_one(to_stored("logs", {"name": "b", "size": 1}))
+    assert not repository.refresh_bucket_analytics("logs", "ns1", min_interval=3600)
+    assert row(mongo, "logs", "ns1")["objects"] == 1
+    # Without an interval (refreshes, the refresh_analytics command) it always runs
+    assert repository.refresh_bucket_analytics("logs", "ns1")
+    assert row(mongo, "logs", "ns1")["objects"] == 2
+
+
+def test_legacy_documents_are_counted(mongo):
+    mongo.buckets.insert_one({"name": "logs", "namespace": "ns1"})
+    mongo.objects.insert_many(
+        [
+            {"bucket": "logs", "name": "old", "data": {"name": "old", "size": 7, "storage_tier": "Archive"}},
+            to_stored("logs", {"name": "new", "size": 3, "storage_tier": "Archive"}),
+        ]
+    )
+
+    repository.refresh_bucket_analytics("logs", "ns1")
+
+    doc = row(mongo, "logs", "ns1")
+    assert (doc["objects"], doc["bytes"]) == (2, 10)
+    assert doc["storage_tiers"] == [{"key": "Archive", "objects": 2, "bytes": 10}]
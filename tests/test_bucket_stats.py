@@ -0,0 +1,44 @@
+from bson import ObjectId
+
+from oci_object_discovery_service.internal.db import repository
+
+
+def scan(bucket, namespace, records, scan_id=None):
+    scan_id = scan_id or ObjectId()
+    repository.start_bucket_stats(bucket, namespace, scan_id)
+    repository.add_bucket_stats(bucket, namespace, scan_id, records)
+    repository.finish_bucket_stats(bucket, namespace, scan_id)
+    return scan_id
+
+
+def test_same_bucket_name_in_two_namespaces_keeps_both(mongo):
+    scan("backups", "ns1", [{"name": "a", "size": 10, "storage_tier": "Standard"}])
+    scan("backups", "ns2", [{"name": "b", "size": 99}, {"name": "c", "size": 1}])
+
+    rows = {d["namespace"]: d for d in mongo.bucket_stats.find({"bucket": "backups"})}
+    assert rows["ns1"]["objects"] == 1 and rows["ns1"]["bytes"] == 10
+    assert rows["ns2"]["objects"] == 2 and rows["ns2"]["bytes"] == 100
+    assert rows["ns1"]["storage_tiers"] == {"Standard": {"objects": 1, "bytes": 10}}
+
+
+def test_rescan_replaces_counters(mongo):
+    scan("logs", "ns1", [{"name": "a", "size": 10, "archival_state": "Archived"}])
+    scan("logs", "ns1", [{"name": "b", "size": 5}])
+
+    doc = mongo.bucket_stats.find_one({"namespace": "ns1", "bucket": "logs"})
+    assert (doc["objects"], doc["bytes"]) == (1, 5)
+    assert doc["archival_states"] == {"none": {"objects": 1, "bytes": 5}}
+    assert "scan" not in doc
+
+
+def test_resumed_scan_keeps_its_counts(mongo):
+    scan_id = ObjectId()
+    repository.start_bucket_stats("logs", "ns1", scan_id)
+    repository.add_bucket_stats("logs", "ns1", scan_id, [{"name": "a", "size": 1}])
+    # The worker went away and another one resumes the same scan
+    repository.start_bucket_stats("logs", "ns1", scan_id)
+    repository.add_bucket_stats("logs", "ns1", scan_id, [{"name": "b", "size": 2}])
+    repository.finish_bucket_stats("logs", "ns1", scan_id)
+
+    doc = mongo.bucket_stats.find_one({"namespace": "ns1", "bucket": "logs"})
+    assert (doc["objects"], doc["bytes"]) == (2, 3)
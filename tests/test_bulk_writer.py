@@ -0,0 +1,85 @@
+import threading
+import time
+
+from pymongo.errors import AutoReconnect
+
+from oci_object_discovery_service.internal.db import repository
+from oci_object_discovery_service.internal.db.repository import BulkWriter
+
+
+class BlockingCollection:
+    """Wraps a collection; `bulk_write` waits for `release` (or raises `error`)."""
+
+    def __init__(self, collection, error=None):
+        self.collection = collection
+        self.name = collection.name
+        self.error = error
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def bulk_write(self, ops, ordered=True):
+        self.started.set()
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return self.collection.bulk_write(ops, ordered=ordered)
+
+
+def test_batches_are_written_at_batch_size(mongo):
+    writer = BulkWriter(mongo.bulk_test, batch_size=2, flush_interval=60)
+    for i in range(5):
+        writer.upsert({"key": i}, {"n": i})
+    assert mongo.bulk_test.count_documents({}) == 4
+    with writer:
+        pass
+    assert mongo.bulk_test.count_documents({}) == 5
+    assert writer.stats["batches"] == 3 and writer.stats["upserted"] == 5
+
+
+def test_write_errors_are_counted_and_later_batches_still_written(mongo):
+    failed = []
+    with BulkWriter(mongo.bulk_test, batch_size=2, flush_interval=60, on_error=failed.extend) as writer:
+        writer.insert({"_id": 1})
+        writer.insert({"_id": 1})
+        writer.insert({"_id": 2})
+    assert writer.stats["errors"] == 1 and len(failed) == 1
+    assert sorted(d["_id"] for d in mongo.bulk_test.find()) == [1, 2]
+
+
+def test_lost_batch_counts_every_operation_as_failed(mongo):
+    collection = BlockingCollection(mongo.bulk_test, error=AutoReconnect("connection closed"))
+    collection.release.set()
+    with BulkWriter(collection, batch_size=10, flush_interval=60) as writer:
+        for i in range(3):
+            writer.insert({"_id": i})
+    assert writer.stats == {"batches": 1, "upserted": 0, "modified": 0, "matched": 0, "errors": 3}
+
+
+def test_flush_waits_for_batches_written_by_other_threads(mongo):
+    collection = BlockingCollection(mongo.bulk_test)
+    writer = BulkWriter(collection, batch_size=1, flush_interval=60)
+    adder = threading.Thread(target=writer.insert, args=({"_id": 1},))
+    adder.start()
+    assert collection.started.wait(5)
+
+    flusher = threading.Thread(target=writer.flush)
+    flusher.start()
+    flusher.join(0.1)
+    assert flusher.is_alive()
+
+    collection.release.set()
+    flusher.join(5)
+    adder.join(5)
+    assert not flusher.is_alive()
+    assert mongo.bulk_test.count_documents({}) == 1
+
+
+def test_buffered_operations_are_flushed_after_the_interval(mongo, monkeypatch):
+    monkeypatch.setattr(repository, "_interval_flusher", repository._IntervalFlusher(tick=0.01))
+    writer = BulkWriter(mongo.bulk_test, batch_size=100, flush_interval=0.05)
+    writer.insert({"_id": 1})
+    deadline = time.monotonic() + 5
+    while mongo.bulk_test.count_documents({}) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert mongo.bulk_test.count_documents({}) == 1
+    assert writer.stats["batches"] == 1
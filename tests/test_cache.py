@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from oci_object_discovery_service.internal.cache import MemoryCache
+from oci_object_discovery_service.internal.ui import routes
+
+
+@pytest.fixture
+def cache(api, monkeypatch):
+    cache = MemoryCache()
+    monkeypatch.setattr(routes, "get_cache", lambda: cache)
+    # Read the generation on every request
+    monkeypatch.setattr(routes, "cache_generation_poll_seconds", 0)
+    monkeypatch.setitem(routes._generation, "value", 0)
+    return cache
+
+
+def bump_generation(api_db, value):
+    asyncio.run(api_db.catalogue_state.update_one({"_id": "generation"}, {"$set": {"value": value}}, upsert=True))
+
+
+def bucket_names(res):
+    return [b["name"] for b in res.json()["results"]]
+
+
+def test_unchanged_response_is_not_modified(api, cache):
+    first = api.get("/api/ui/buckets")
+    etag = first.headers["etag"]
+
+    again = api.get("/api/ui/buckets", headers={"If-None-Match": etag})
+
+    assert again.status_code == 304 and again.headers["etag"] == etag and again.content == b""
+    assert api.get("/api/ui/buckets", params={"x": "1"}, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_responses_change_with_the_catalogue_generation(api, api_db, cache):
+    asyncio.run(api_db.buckets.insert_one({"name": "logs", "namespace": "ns1"}))
+    first = api.get("/api/ui/buckets")
+
+    # Writes between scans are not seen until a scan finishes
+    asyncio.run(api_db.buckets.insert_one({"name": "backups", "namespace": "ns1"}))
+    assert bucket_names(api.get("/api/ui/buckets")) == ["logs"]
+
+    bump_generation(api_db, 1)
+    res = api.get("/api/ui/buckets", headers={"If-None-Match": first.headers["etag"]})
+    assert res.status_code == 200 and res.headers["etag"] != first.headers["etag"]
+    assert sorted(bucket_names(res)) == ["backups", "logs"]
@@ -0,0 +1,45 @@
+from bson import ObjectId
+
+from oci_object_discovery_service.internal.db import repository, schema
+from oci_object_discovery_service.internal.db.repository import ObjectDeltaWriter, object_fields, object_writer
+
+
+def scan(records, scan_id, bucket="logs", namespace="ns1"):
+    with ObjectDeltaWriter(object_writer(namespace), scan_id, batch_size=2) as delta:
+        for record in records:
+            delta.add_fields(object_fields(bucket, record, scan_id=scan_id))
+    return delta
+
+
+def test_only_new_and_changed_objects_are_rewritten(mongo):
+    mongo.buckets.insert_one({"name": "logs", "namespace": "ns1"})
+    first, second = ObjectId(), ObjectId()
+    scan([{"name": "a", "etag": "1"}, {"name": "b", "etag": "1"}, {"name": "c", "etag": "1"}], first)
+
+    delta = scan([{"name": "a", "etag": "1"}, {"name": "b", "etag": "2"}, {"name": "d", "etag": "1"}], second)
+
+    assert delta.stats == {"new": 1, "changed": 1, "unchanged": 1}
+    docs = {d["name"]: d for d in mongo.objects.find()}
+    assert docs["a"][schema.SCAN_ID] == second and docs["b"][schema.ETAG] == "2"
+    assert docs["c"][schema.SCAN_ID] == first
+
+    assert repository.delete_stale_objects("logs", second, "ns1") == 1
+    assert sorted(docs) == ["a", "b", "c", "d"]
+    assert sorted(d["name"] for d in mongo.objects.find()) == ["a", "b", "d"]
+
+
+def test_legacy_documents_are_rewritten_even_if_unchanged(mongo):
+    mongo.objects.insert_one({"bucket": "logs", "name": "a", "data": {"name": "a", "etag": "1"}})
+
+    delta = scan([{"name": "a", "etag": "1"}], ObjectId())
+
+    assert delta.stats["changed"] == 1
+    assert not schema.is_legacy(mongo.objects.find_one({"name": "a"}))
+
+
+def test_sweep_skips_bucket_name_shared_in_main_collection(mongo):
+    mongo.buckets.insert_many([{"name": "logs", "namespace": "ns1"}, {"name": "logs", "namespace": "ns2"}])
+    mongo.objects.insert_one(schema.to_stored("logs", {"name": "ns2-object"}, scan_id=ObjectId()))
+
+    assert repository.delete_stale_objects("logs", ObjectId(), "ns1") == 0
+    assert mongo.objects.count_documents({}) == 1
@@ -0,0 +1,20 @@
+from datetime import date, datetime, timezone
+
+import orjson
+import pytest
+from bson import Decimal128, ObjectId
+
+from oci_object_discovery_service.internal.ui.encoding import dumps
+
+
+def test_bson_and_date_values_are_encoded():
+    oid = ObjectId()
+    body = orjson.loads(
+        dumps({"id": oid, "n": Decimal128("1.50"), "at": datetime(2024, 1, 1, tzinfo=timezone.utc), "on": date(2024, 1, 2)})
+    )
+    assert body == {"id": str(oid), "n": "1.50", "at": "2024-01-01T00:00:00+00:00", "on": "2024-01-02"}
+
+
+def test_unknown_types_are_rejected():
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
@@ -0,0 +1,62 @@
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+from oci_object_discovery_service.internal import export
+from oci_object_discovery_service.internal.db.schema import to_stored
+
+
+@pytest.fixture
+def objects(api_db):
+    asyncio.run(
+        api_db.objects.insert_many(
+            [to_stored("logs", {"name": f"app/{i}", "size": i, "storage_tier": "Standard"}) for i in range(3)]
+            + [to_stored("logs", {"name": "other", "size": 9})]
+        )
+    )
+    asyncio.run(api_db["objects.ns1"].insert_one(to_stored("backups", {"name": "app/db", "size": 7})))
+    asyncio.run(api_db.object_partitions.insert_one({"namespace": "ns1", "collection": "objects.ns1"}))
+
+
+def test_ndjson_streams_every_partition(api, objects):
+    res = api.get("/api/v1/export", params={"prefix": "app/"})
+
+    assert res.status_code == 200 and res.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert sorted((r["bucket"], r["name"]) for r in rows) == [("backups", "app/db")] + [("logs", f"app/{i}") for i in range(3)]
+    assert rows[0]["storage_tier"] == "Standard" and "name_lc" not in rows[0]
+
+
+def test_csv_has_a_header_and_fixed_columns(api, objects):
+    res = api.get("/api/v1/export", params={"format": "csv", "bucket": "logs"})
+
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert list(rows[0]) == list(export.COLUMNS)
+    assert sorted(r["name"] for r in rows) == ["app/0", "app/1", "app/2", "other"]
+
+
+def test_gzip_stream_decodes_to_the_same_rows(api, objects):
+    plain = api.get("/api/v1/export", params={"bucket": "logs"})
+    gzipped = api.get("/api/v1/export", params={"bucket": "logs", "gzip": "true"})
+
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.text == plain.text
+
+
+def test_batches_are_bounded(objects):
+    async def collect():
+        return [len(batch) async for batch in export.iter_batches({}, batch_size=2)]
+
+    assert asyncio.run(collect()) == [2, 2, 1]
+
+
+def test_parquet_row_groups(api, objects):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    res = api.get("/api/v1/export", params={"format": "parquet"})
+
+    table = pq.read_table(io.BytesIO(res.content))
+    assert table.num_rows == 5 and table.schema.names == list(export.COLUMNS)
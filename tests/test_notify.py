@@ -0,0 +1,44 @@
+import threading
+import time
+
+from oci_object_discovery_service.internal import notify
+from oci_object_discovery_service.internal.notify import InMemoryNotifier
+
+
+def test_wait_times_out_without_notification():
+    notifier = InMemoryNotifier()
+    started = time.monotonic()
+    assert notifier.wait(0.05) is False
+    assert time.monotonic() - started >= 0.04
+
+
+def test_notification_before_wait_is_not_lost():
+    notifier = InMemoryNotifier()
+    notifier.publish("s1")
+    notifier.publish("s2")
+    assert notifier.wait(0) is True
+    # Both notifications were coalesced into one wake-up
+    assert notifier.wait(0) is False
+
+
+def test_publish_wakes_waiting_thread():
+    notifier = InMemoryNotifier()
+    woken = []
+    waiter = threading.Thread(target=lambda: woken.append(notifier.wait(5)))
+    waiter.start()
+    time.sleep(0.05)
+    notifier.publish()
+    waiter.join(1)
+    assert woken == [True]
+
+
+def test_module_publish_uses_process_notifier():
+    notifier = InMemoryNotifier()
+    notify.set_notifier(notifier)
+    try:
+        notify.publish("s1")
+        assert notifier.wait(0) is True
+    finally:
+        notify.set_notifier(None)
+    # Without a notifier publishing is a no-op
+    notify.publish("s2")
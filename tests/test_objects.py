@@ -0,0 +1,134 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from oci_object_discovery_service.internal.oci import objects
+from oci_object_discovery_service.internal.oci.objects import OrderedCheckpoint, discover_shards, split_ranges
+
+
+def in_range(key, shard):
+    start, end = shard
+    return (start is None or key >= start) and (end is None or key < end)
+
+
+def assert_partition(shards, keys):
+    """Every key falls in exactly one of the contiguous `shards`."""
+    assert shards[0][0] is None and shards[-1][1] is None
+    for (_, end), (start, _) in zip(shards, shards[1:]):
+        assert end == start
+    for key in keys:
+        assert sum(in_range(key, s) for s in shards) == 1
+
+
+@pytest.mark.parametrize("boundaries, target", [([], 8), (["a", "b"], 1), (["a"], 0)])
+def test_split_ranges_single_range(boundaries, target):
+    assert split_ranges(boundaries, target) == [(None, None)]
+
+
+def test_split_ranges_uses_every_boundary_when_few():
+    assert split_ranges(["c/", "a/", "b/", "a/"], 8) == [(None, "a/"), ("a/", "b/"), ("b/", "c/"), ("c/", None)]
+
+
+def test_split_ranges_spreads_many_boundaries():
+    boundaries = [f"{i:03d}/" for i in range(100)]
+    shards = split_ranges(boundaries, 4)
+    assert len(shards) == 4
+    assert_partition(shards, boundaries)
+    counts = [sum(in_range(b, s) for b in boundaries) for s in shards]
+    assert all(abs(c - len(boundaries) / 4) <= 1 for c in counts)
+
+
+class FakeObjectStorage:
+    """ListObjects over an in-memory sorted key list."""
+
+    def __init__(self, keys):
+        self.keys = sorted(keys)
+        self.calls = 0
+
+    def list_objects(self, namespace, bucket, prefix=None, delimiter=None, start=None, limit=1000, **kwargs):
+        self.calls += 1
+        names, prefixes = [], []
+        rest = [k for k in self.keys if k.startswith(prefix or "") and (start is None or k >= start)]
+        next_start = None
+        for key in rest:
+            if len(names) + len(prefixes) >= limit:
+                next_start = key
+                break
+            tail = key[len(prefix or ""):]
+            if delimiter and delimiter in tail:
+                sub = (prefix or "") + tail[: tail.index(delimiter) + 1]
+                if not prefixes or prefixes[-1] != sub:
+                    prefixes.append(sub)
+                continue
+            names.append(key)
+        data = SimpleNamespace(
+            objects=[SimpleNamespace(name=n) for n in names], prefixes=prefixes, next_start_with=next_start
+        )
+        return SimpleNamespace(data=data, headers={}, status=200)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    def install(keys):
+        client = FakeObjectStorage(keys)
+        monkeypatch.setattr(objects, "get_clients", lambda region: (client, None, None))
+        return client
+
+    return install
+
+
+def test_discover_shards_splits_on_prefixes(storage):
+    keys = [f"{p}/{i:04d}" for p in "abcdefgh" for i in range(50)]
+    storage(keys)
+    shards = discover_shards("ns", "b", "r", target=4, max_retries=0)
+    assert len(shards) == 4
+    assert_partition(shards, keys)
+    assert all(any(in_range(k, s) for k in keys) for s in shards)
+
+
+def test_discover_shards_caps_pages_on_flat_bucket(storage):
+    rng = random.Random(7)
+    keys = [f"{rng.getrandbits(32):08x}" for _ in range(5000)]
+    client = storage(keys)
+    shards = discover_shards("ns", "b", "r", target=4, max_pages=2, max_retries=0)
+    # Two listing pages, then one small request per sampled start key
+    assert client.calls <= 2 + len(objects.SAMPLE_PROBES)
+    assert 1 < len(shards) <= 4
+    assert_partition(shards, keys)
+
+
+class RecordingCheckpoint:
+    def __init__(self):
+        self.saved = []
+
+    def resume(self, shard):
+        return None, False
+
+    def save(self, shard, next_start, done):
+        self.saved.append((shard, next_start, done))
+
+
+def test_ordered_checkpoint_waits_for_earlier_pages():
+    inner = RecordingCheckpoint()
+    checkpoint = OrderedCheckpoint(inner)
+    shard = ("", None, None)
+    checkpoint.done(shard, 1, "k200")
+    checkpoint.done(shard, 2, "k300")
+    assert inner.saved == []
+    checkpoint.done(shard, 0, "k100")
+    # Pages 0-2 are all persisted: only the furthest cursor is saved
+    assert inner.saved == [(shard, "k300", False)]
+    checkpoint.done(shard, 3, None)
+    assert inner.saved[-1] == (shard, None, True)
+
+
+def test_ordered_checkpoint_tracks_shards_separately():
+    inner = RecordingCheckpoint()
+    checkpoint = OrderedCheckpoint(inner)
+    a, b = ("", None, "m"), ("", "m", None)
+    checkpoint.done(b, 0, "n1")
+    checkpoint.done(a, 1, "b1")
+    assert inner.saved == [(b, "n1", False)]
+    checkpoint.done(a, 0, "a1")
+    assert inner.saved[-1] == (a, "b1", False)
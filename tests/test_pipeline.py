@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from oci_object_discovery_service.internal.pipeline import Pipeline, PipelineCancelled
+
+
+def pipeline_threads(name):
+    return [t for t in threading.enumerate() if t.name.startswith(f"{name}-") and t.is_alive()]
+
+
+def test_items_flow_through_every_stage():
+    out = []
+    lock = threading.Lock()
+
+    def store(item):
+        with lock:
+            out.append(item)
+
+    pipeline = (
+        Pipeline("p-flow", report_interval=0)
+        .stage("split", lambda n: [n, n + 100], workers=2)
+        .stage("double", lambda n: [n * 2], workers=3, queue_size=1)
+        .stage("store", store)
+    )
+    pipeline.run(range(10))
+    assert sorted(out) == sorted([n * 2 for n in range(10)] + [(n + 100) * 2 for n in range(10)])
+    assert pipeline.stats()["store"]["items"] == 20
+
+
+def test_stage_error_stops_every_stage_and_is_raised():
+    def fail(n):
+        if n == 3:
+            raise RuntimeError("boom")
+        return [n]
+
+    pipeline = (
+        Pipeline("p-error", report_interval=0)
+        .stage("fail", fail)
+        # A slow stage behind a small queue keeps upstream blocked on put
+        .stage("slow", lambda n: time.sleep(0.05), queue_size=1)
+    )
+    with pytest.raises(RuntimeError, match="boom"):
+        pipeline.run(iter(range(1000)))
+    assert pipeline.stopped
+    assert pipeline_threads("p-error") == []
+
+
+def test_source_error_is_raised():
+    def source():
+        yield 1
+        raise ValueError("bad source")
+
+    with pytest.raises(ValueError, match="bad source"):
+        Pipeline("p-source", report_interval=0).stage("noop", lambda n: None).run(source())
+
+
+def test_stop_cancels_run():
+    pipeline = Pipeline("p-stop", report_interval=0).stage("slow", lambda n: time.sleep(0.01))
+    threading.Timer(0.1, pipeline.stop).start()
+    with pytest.raises(PipelineCancelled):
+        pipeline.run(iter(int, 1))  # endless source
+    assert pipeline_threads("p-stop") == []
+
+
+def test_pipeline_without_stages_is_rejected():
+    with pytest.raises(ValueError):
+        Pipeline("p-empty").run([1])
@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+from oci_object_discovery_service.internal.oci.ratelimit import AdaptiveRateLimiter
+
+
+def test_throttle_decreases_rate_once_per_cooldown():
+    limiter = AdaptiveRateLimiter(100, min_rate=1, decrease=0.5, cooldown=60)
+    limiter.on_throttle()
+    assert limiter.rate == 50
+    # A burst of 429s from concurrent callers is one congestion signal
+    limiter.on_throttle()
+    assert limiter.rate == 50
+
+
+def test_rate_stays_within_bounds():
+    limiter = AdaptiveRateLimiter(4, min_rate=2, max_rate=4.5, increase=10, decrease=0.1, cooldown=0)
+    limiter.on_throttle()
+    assert limiter.rate == 2
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.rate == 4.5
+
+
+def test_success_increases_rate_additively():
+    limiter = AdaptiveRateLimiter(10, increase=1)
+    limiter.on_success()
+    assert limiter.rate == 10.1
+
+
+def test_acquire_paces_requests():
+    limiter = AdaptiveRateLimiter(20, min_rate=20, max_rate=20)
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    # One token up front, then one every 1/20 s
+    assert time.monotonic() - started >= 0.12
+
+
+def test_retry_after_pauses_every_caller():
+    limiter = AdaptiveRateLimiter(1000)
+    limiter.on_throttle(retry_after=0.2)
+    started = time.monotonic()
+    asyncio.run(limiter.acquire_async())
+    assert time.monotonic() - started >= 0.15
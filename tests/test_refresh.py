@@ -0,0 +1,63 @@
+from bson import ObjectId
+
+from oci_object_discovery_service.internal.db import repository
+from oci_object_discovery_service.internal.db.schema import to_stored
+
+
+def refresh_parent(mongo, namespace, staged):
+    """A refresh session of `namespace` whose bucket tasks finished, having staged `staged`."""
+    parent_id = ObjectId()
+    mongo.scan_sessions.insert_one({"_id": parent_id, "job": {"oci_namespace": namespace}, "status": "waiting"})
+    repository.start_refresh(parent_id, namespace)
+    mongo[repository.staging_collection_name(namespace, parent_id)].insert_many(
+        [to_stored(bucket, {"name": name}) for bucket, name in staged]
+    )
+    return parent_id
+
+
+def test_first_refresh_moves_buckets_out_of_main_collection(mongo, monkeypatch):
+    monkeypatch.setattr(repository, "analytics_refresh", False)
+    mongo.buckets.insert_many(
+        [{"name": "logs", "namespace": "ns1"}, {"name": "backups", "namespace": "ns1"}, {"name": "backups", "namespace": "ns2"}]
+    )
+    mongo.objects.insert_many([to_stored("logs", {"name": "old"}), to_stored("backups", {"name": "ns2-object"})])
+    parent_id = refresh_parent(mongo, "ns1", [("logs", "a"), ("backups", "b")])
+
+    assert repository.complete_parent_if_done(parent_id)
+
+    partition = mongo.object_partitions.find_one({"namespace": "ns1"})
+    assert partition["collection"] == repository.partition_collection_name("ns1")
+    assert "moved_buckets" not in partition
+    assert mongo[partition["collection"]].count_documents({}) == 2
+    # "backups" also belongs to ns2 in the main collection: left alone
+    assert [d["name"] for d in mongo.objects.find()] == ["ns2-object"]
+
+
+def test_interrupted_cleanup_is_finished_by_next_swap(mongo, monkeypatch):
+    monkeypatch.setattr(repository, "analytics_refresh", False)
+    mongo.buckets.insert_one({"name": "logs", "namespace": "ns1"})
+    mongo.objects.insert_one(to_stored("logs", {"name": "old"}))
+    mongo.object_partitions.insert_one(
+        {"namespace": "ns1", "collection": "objects.ns1", "moved_buckets": [{"namespace": "ns1", "bucket": "logs"}]}
+    )
+    parent_id = refresh_parent(mongo, "ns1", [("logs", "a")])
+
+    assert repository.complete_parent_if_done(parent_id)
+
+    assert mongo.objects.count_documents({}) == 0
+    assert "moved_buckets" not in mongo.object_partitions.find_one({"namespace": "ns1"})
+
+
+def test_refresh_with_duplicate_staged_objects_is_discarded(mongo, monkeypatch):
+    monkeypatch.setattr(repository, "analytics_refresh", False)
+    mongo.buckets.insert_one({"name": "logs", "namespace": "ns1"})
+    mongo.objects.insert_one(to_stored("logs", {"name": "old"}))
+    parent_id = refresh_parent(mongo, "ns1", [("logs", "a"), ("logs", "a")])
+    staging = repository.staging_collection_name("ns1", parent_id)
+
+    assert repository.complete_parent_if_done(parent_id)
+
+    assert staging not in mongo.list_collection_names()
+    assert mongo.object_partitions.count_documents({}) == 0
+    assert mongo.objects.count_documents({}) == 1
+    assert mongo.scan_sessions.find_one({"_id": parent_id})["status"] == "completed"
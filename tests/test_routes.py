@@ -0,0 +1,41 @@
+import asyncio
+
+from oci_object_discovery_service.internal.db.schema import to_stored
+
+
+def stored(bucket, name):
+    return to_stored(bucket, {"name": name})
+
+
+def pages(api, **params):
+    """Every page of /objects, following the `next` cursors."""
+    out, cursor = [], None
+    while True:
+        body = api.get("/api/ui/objects", params={**params, "cursor": cursor} if cursor else params).json()
+        out.append([(d["bucket"], d["name"]) for d in body["results"]])
+        cursor = body["next"]
+        if cursor is None:
+            return out
+
+
+def test_listing_cursor_round_trip(api, api_db):
+    asyncio.run(api_db.objects.insert_many([stored("b", "x"), stored("a", "y"), stored("a", "x")]))
+    asyncio.run(api_db["objects.ns1"].insert_many([stored("a", "z"), stored("c", "w")]))
+    asyncio.run(api_db.object_partitions.insert_one({"namespace": "ns1", "collection": "objects.ns1"}))
+
+    assert pages(api, limit=2) == [[("a", "x"), ("a", "y")], [("b", "x"), ("a", "z")], [("c", "w")]]
+    assert pages(api, limit=1, bucket="a") == [[("a", "x")], [("a", "y")], [("a", "z")]]
+
+
+def test_search_pages_follow_lowercased_name_order(api, api_db):
+    names = [("b", "Logs/1"), ("a", "logs/2"), ("a", "LOGS/1"), ("a", "other"), ("c", "logs/1")]
+    asyncio.run(api_db.objects.insert_many([stored(b, n) for b, n in names]))
+
+    flat = [item for page in pages(api, q="logs", mode="prefix", limit=2) for item in page]
+    assert flat == [("a", "LOGS/1"), ("b", "Logs/1"), ("c", "logs/1"), ("a", "logs/2")]
+    flat = [item for page in pages(api, q="logs", mode="prefix", bucket="a", limit=1) for item in page]
+    assert flat == [("a", "LOGS/1"), ("a", "logs/2")]
+
+
+def test_invalid_cursor_is_rejected(api, api_db):
+    assert api.get("/api/ui/objects", params={"cursor": "not-a-cursor"}).status_code == 400
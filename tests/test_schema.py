@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from oci_object_discovery_service.internal.db import schema
+
+
+RECORD = {
+    "name": "logs/2024/a.gz",
+    "size": "1024",
+    "etag": "e1",
+    "md5": "1B2M2Y8AsgTpgAmY7PhCfg==",
+    "storage_tier": "Archive",
+    "archival_state": "Restored",
+    "time_created": "2024-01-01T00:00:00Z",
+    "time_modified": "2024-01-02T03:04:05.123000+00:00",
+    "custom": "kept",
+}
+
+
+def test_to_stored_is_compact():
+    scan_id = ObjectId()
+    doc = schema.to_stored("b1", RECORD, scan_id=scan_id, updated_at=datetime(2024, 2, 1))
+    assert doc["bucket"] == "b1"
+    assert doc[schema.SIZE] == 1024
+    assert doc[schema.STORAGE_TIER] == schema.STORAGE_TIERS.index("Archive")
+    assert doc[schema.ARCHIVAL_STATE] == schema.ARCHIVAL_STATES.index("Restored")
+    assert isinstance(doc[schema.TIME_MODIFIED], datetime)
+    assert doc[schema.EXTRA] == {"custom": "kept"}
+    assert doc[schema.SCAN_ID] == scan_id
+    assert "data" not in doc
+
+
+def test_round_trip_keeps_api_shape():
+    scan_id = ObjectId()
+    updated_at = datetime(2024, 2, 1)
+    doc = schema.from_stored(schema.to_stored("b1", RECORD, scan_id=scan_id, updated_at=updated_at))
+    assert doc["bucket"] == "b1"
+    assert doc["name"] == RECORD["name"]
+    assert doc["updated_at"] == updated_at
+    assert doc["scan_id"] == scan_id
+    data = doc["data"]
+    assert data["size"] == 1024
+    assert data["storage_tier"] == "Archive"
+    assert data["archival_state"] == "Restored"
+    assert data["custom"] == "kept"
+    assert datetime.fromisoformat(data["time_created"]) == datetime.fromisoformat("2024-01-01T00:00:00+00:00")
+    assert datetime.fromisoformat(data["time_modified"]) == datetime.fromisoformat(RECORD["time_modified"])
+    # Search fields never reach the API
+    assert not set(schema.SEARCH_FIELDS) & set(doc)
+
+
+def test_unknown_enum_values_are_kept_as_strings():
+    doc = schema.to_stored("b1", {"name": "a", "storage_tier": "Deep"})
+    assert doc[schema.STORAGE_TIER] == "Deep"
+    assert schema.from_stored(doc)["data"]["storage_tier"] == "Deep"
+
+
+def test_missing_values_are_not_stored():
+    doc = schema.to_stored("b1", {"name": "a", "size": None, "md5": None})
+    assert schema.SIZE not in doc and schema.MD5 not in doc
+    assert schema.from_stored(doc)["data"]["size"] is None
+
+
+def test_legacy_documents_convert_and_read_alike():
+    legacy = {
+        "_id": ObjectId(),
+        "bucket": "b1",
+        "name": "a",
+        "data": {"name": "a", "size": 5, "etag": "e1", "storage_tier": "Standard", "time_modified": "2024-01-01T00:00:00+00:00"},
+        "updated_at": datetime(2024, 2, 1),
+        "scan_id": ObjectId(),
+    }
+    stored = schema.legacy_to_stored(legacy)
+    assert stored["_id"] == legacy["_id"]
+    assert not schema.is_legacy(stored)
+    assert schema.from_stored(stored)["data"]["storage_tier"] == "Standard"
+    assert schema.from_stored(legacy) == legacy
+    assert schema.version(stored) == schema.version(legacy)
+
+
+def test_projection_and_field_selection():
+    fetch = schema.projection(["name", "data.size"])
+    assert fetch == {"bucket": 1, "name": 1, schema.SIZE: 1, "data.size": 1, "_id": 0}
+    doc = schema.to_stored("b1", RECORD)
+    assert schema.from_stored(doc, ["name", "data.size"]) == {"name": RECORD["name"], "data": {"size": 1024}}
+    with pytest.raises(ValueError):
+        schema.projection(["bogus"])
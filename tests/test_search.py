@@ -0,0 +1,31 @@
+from oci_object_discovery_service.internal.db import search
+from oci_object_discovery_service.internal.db.search import query_grams, search_fields, search_query
+
+
+def test_default_mode_is_index_backed():
+    assert search.DEFAULT_SEARCH_MODE == ("substring" if search.search_ngrams else "prefix")
+
+
+def test_prefix_is_anchored():
+    assert search_query("Logs/2024", "prefix") == {"name_lc": {"$regex": "^logs/2024"}}
+
+
+def test_segment_matches_whole_segments():
+    query = search_query("logs/2024", "segment")
+    assert query["name_tokens"] == {"$all": ["logs", "2024"]}
+    assert query["name_lc"] == {"$regex": "(^|/)logs/2024(/|$)"}
+
+
+def test_substring_uses_grams_only_when_indexed(monkeypatch):
+    monkeypatch.setattr(search, "search_ngrams", False)
+    assert search_query("report", "substring") == {"name_lc": {"$regex": "report"}}
+    monkeypatch.setattr(search, "search_ngrams", True)
+    query = search_query("report", "substring")
+    assert query["name_grams"] == {"$all": query_grams("report")}
+    assert "name_grams" in search_fields("a/report.csv")
+
+
+def test_query_grams_put_most_selective_first():
+    grams = query_grams("/2024/report")
+    assert len(grams) == search.QUERY_GRAMS
+    assert grams[0].isalpha()
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+from oci_object_discovery_service.internal.db import repository
+from oci_object_discovery_service.internal.db.repository import (
+    claim_next_pending_session,
+    create_child_sessions,
+    create_session,
+    heartbeat_session,
+    mark_session_completed,
+)
+
+
+def job(name="nightly", tenancy="t1", region="r1"):
+    return {"name": name, "oci_tenancy_name": tenancy, "oci_namespace": "ns1", "oci_region": region}
+
+
+def test_claim_leases_the_session_to_its_owner(mongo):
+    session_id = create_session(job())
+
+    claimed = claim_next_pending_session("w1")
+
+    assert claimed.id == session_id
+    raw = mongo.scan_sessions.find_one({"_id": session_id})
+    assert (raw["status"], raw["lease_owner"]) == ("in_progress", "w1")
+    assert claim_next_pending_session("w2") is None
+    assert heartbeat_session(session_id, "w1")
+    assert not heartbeat_session(session_id, "w2")
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_cannot_complete(mongo):
+    session_id = create_session(job())
+    claim_next_pending_session("w1")
+    stale = datetime.now(timezone.utc) - timedelta(seconds=repository.session_lease_seconds + 60)
+    mongo.scan_sessions.update_one({"_id": session_id}, {"$set": {"heartbeat_at": stale}})
+
+    assert claim_next_pending_session("w2").id == session_id
+
+    assert not heartbeat_session(session_id, "w1")
+    assert not mark_session_completed(session_id, "w1")
+    assert mongo.scan_sessions.find_one({"_id": session_id})["status"] == "in_progress"
+    assert mark_session_completed(session_id, "w2")
+    assert mongo.scan_sessions.find_one({"_id": session_id})["status"] == "completed"
+
+
+def test_children_are_claimed_per_bucket_and_complete_the_parent(mongo, monkeypatch):
+    monkeypatch.setattr(repository, "analytics_refresh", False)
+    parent_id = create_session(job())
+    parent = claim_next_pending_session("w1")
+    raw_parent = mongo.scan_sessions.find_one({"_id": parent_id})
+
+    assert create_child_sessions(raw_parent, [{"name": "small", "size": 1}, {"name": "big", "size": 100}]) == 2
+    # Expanding again (a reclaimed parent) does not duplicate children
+    assert create_child_sessions(raw_parent, [{"name": "small", "size": 1}, {"name": "big", "size": 100}]) == 2
+    assert mongo.scan_sessions.count_documents({"parent_id": parent.id}) == 2
+
+    first = claim_next_pending_session("w1", parent_id=parent_id)
+    second = claim_next_pending_session("w2", parent_id=parent_id)
+    assert [first.bucket, second.bucket] == ["big", "small"]
+
+    assert mark_session_completed(first.id, "w1")
+    assert not repository.complete_parent_if_done(parent_id)
+    assert mark_session_completed(second.id, "w2")
+    assert repository.complete_parent_if_done(parent_id)
+    assert mongo.scan_sessions.find_one({"_id": parent_id})["status"] == "completed"
+
+
+def test_higher_priority_is_claimed_first(mongo):
+    low = create_session(job("low"))
+    high = create_session(job("high"), priority=5)
+
+    assert [claim_next_pending_session("w").id for _ in range(2)] == [high, low]
+
+
+def test_pending_sessions_of_different_queues_alternate(mongo):
+    busy = [create_session(job(f"busy-{i}", tenancy="t1")) for i in range(3)]
+    other = create_session(job("other", tenancy="t2"))
+
+    claimed = [claim_next_pending_session("w").id for _ in range(4)]
+
+    # The other tenancy's session does not wait behind the whole busy queue
+    assert claimed.index(other) <= 1
+    assert [s for s in claimed if s != other] == busy
+
+
+def test_second_run_of_a_pending_job_is_merged(mongo):
+    session_id = create_session(job(), priority=1)
+
+    assert create_session(job(), priority=3) is None
+    assert create_session(job(), priority=2) is None
+
+    raw = mongo.scan_sessions.find_one({"_id": session_id})
+    assert mongo.scan_sessions.count_documents({}) == 1 and raw["priority"] == 3
+    # Once claimed, the job can be queued again
+    claim_next_pending_session("w")
+    assert create_session(job()) is not None